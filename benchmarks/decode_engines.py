@@ -0,0 +1,70 @@
+"""Compares the DecodeEngines of EntityProtobufConverter, decoding a page of
+entities of a wide model, one entity at a time and as a page.
+
+    poetry run python -m benchmarks.decode_engines
+"""
+from datetime import datetime, timezone
+import timeit
+from pydantic import create_model
+from sarvam_datastore import (
+    DatastoreConfig,
+    DatastoreModelHelper,
+    DatastoreModelHelperRegistry,
+    DecodeEngine,
+    EntityProtobufConverter,
+)
+
+FIELDS = 50
+PAGE_SIZE = 500
+REPEAT = 10
+
+field_types = [int, str, float, bool, datetime]
+WideModel = create_model(  # type: ignore
+    "WideModel",
+    id=(int, ...),
+    **{f"f{i}": (field_types[i % len(field_types)], ...) for i in range(FIELDS)},
+)
+sample_values = [1, "value", 1.5, True, datetime(2023, 5, 1, tzinfo=timezone.utc)]
+
+
+def main():
+    config = DatastoreConfig(key=[("Wide", "id")])
+    helper = DatastoreModelHelper(WideModel, config)
+    registry = DatastoreModelHelperRegistry()
+    registry.register(helper)
+    converter = EntityProtobufConverter(registry)
+
+    objs = [
+        WideModel(
+            id=idx + 1,
+            **{f"f{i}": sample_values[i % len(sample_values)] for i in range(FIELDS)},
+        )
+        for idx in range(PAGE_SIZE)
+    ]
+    entity_pbs = [converter.to_protobuf(obj) for obj in objs]
+
+    print(f"{FIELDS} fields, {PAGE_SIZE} entities per page")
+    print(f"{'engine':<12}{'per entity ms':>16}{'per page ms':>14}")
+    for engine in DecodeEngine:
+        config.decode_engine = engine
+        assert converter.from_protobuf_multi(entity_pbs) == objs
+
+        per_entity = min(
+            timeit.repeat(
+                lambda: [converter.from_protobuf(pb) for pb in entity_pbs],
+                number=1,
+                repeat=REPEAT,
+            )
+        )
+        per_page = min(
+            timeit.repeat(
+                lambda: converter.from_protobuf_multi(entity_pbs),
+                number=1,
+                repeat=REPEAT,
+            )
+        )
+        print(f"{engine.value:<12}{per_entity * 1000:>16.2f}{per_page * 1000:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Compares encoding entities with and without an EncodingCache, for an object
+with large text and bytes fields, which the cache is meant for, and for a wide
+object of small values.
+
+    poetry run python -m benchmarks.encoding_cache
+"""
+from datetime import datetime, timezone
+import timeit
+from pydantic import create_model
+from sarvam_datastore import (
+    DatastoreConfig,
+    DatastoreModelHelper,
+    DatastoreModelHelperRegistry,
+    EncodingCache,
+    EntityProtobufConverter,
+)
+
+FIELDS = 50
+BLOB_SIZE = 500_000
+NUMBER = 200
+REPEAT = 5
+
+field_types = [int, str, float, bool, datetime]
+WideModel = create_model(  # type: ignore
+    "WideModel",
+    id=(int, ...),
+    **{f"f{i}": (field_types[i % len(field_types)], ...) for i in range(FIELDS)},
+)
+sample_values = [1, "value", 1.5, True, datetime(2023, 5, 1, tzinfo=timezone.utc)]
+BlobModel = create_model(  # type: ignore
+    "BlobModel", id=(int, ...), text=(str, ...), data=(bytes, ...)
+)
+
+
+def main():
+    registry = DatastoreModelHelperRegistry()
+    registry.register(
+        DatastoreModelHelper(WideModel, DatastoreConfig(key=[("Wide", "id")]))
+    )
+    registry.register(
+        DatastoreModelHelper(
+            BlobModel,
+            DatastoreConfig(
+                key=[("Blob", "id")], exclude_from_indexes=["text", "data"]
+            ),
+        )
+    )
+    converter = EntityProtobufConverter(registry)
+    cached = EntityProtobufConverter(registry, encoding_cache=EncodingCache())
+
+    objs = {
+        "wide": WideModel(
+            id=1,
+            **{f"f{i}": sample_values[i % len(sample_values)] for i in range(FIELDS)},
+        ),
+        "blob": BlobModel(id=1, text="x" * BLOB_SIZE, data=b"y" * BLOB_SIZE),
+    }
+
+    print(f"{'object':<8}{'encode us':>12}{'cached us':>12}")
+    for name, obj in objs.items():
+        assert cached.to_protobuf(obj) == converter.to_protobuf(obj)
+        plain_time, cached_time = (
+            min(
+                timeit.repeat(
+                    lambda: conv.to_protobuf(obj), number=NUMBER, repeat=REPEAT
+                )
+            )
+            / NUMBER
+            for conv in (converter, cached)
+        )
+        print(f"{name:<8}{plain_time * 1e6:>12.1f}{cached_time * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
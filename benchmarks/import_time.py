@@ -0,0 +1,71 @@
+"""Measures the import time of the converter only path (what batch converters,
+tests and CLIs import) and of the repository path, with python -X importtime,
+and prints the slowest modules. Exits with 1 if the converter only path takes
+longer than --budget-ms.
+
+    poetry run python -m benchmarks.import_time --budget-ms 1000
+"""
+import argparse
+import subprocess
+import sys
+
+CONVERTER_ONLY = (
+    "from sarvam_datastore import"
+    " DatastoreModelHelper, DatastoreModelHelperRegistry, EntityProtobufConverter"
+)
+REPOSITORY = "from sarvam_datastore import DatastoreRepository"
+REPEAT = 5
+
+
+def import_times(statement: str) -> dict[str, tuple[int, int]]:
+    """the (self, cumulative) import time in us, by module, for a fresh
+    interpreter running statement"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:") :].split("|")
+        times[module.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def total_ms(statement: str) -> tuple[float, dict[str, tuple[int, int]]]:
+    """the best of REPEAT runs of the total import time, in ms"""
+    best = None
+    for _ in range(REPEAT):
+        times = import_times(statement)
+        total = sum(self_us for self_us, _ in times.values()) / 1000
+        if best is None or total < best[0]:
+            best = (total, times)
+    assert best is not None
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    converter_ms, converter_times = total_ms(CONVERTER_ONLY)
+    repository_ms, _ = total_ms(REPOSITORY)
+    print(f"{'converter only':<16}{converter_ms:>10.1f} ms")
+    print(f"{'repository':<16}{repository_ms:>10.1f} ms")
+
+    print("\nslowest modules of the converter only path (self ms):")
+    slowest = sorted(converter_times.items(), key=lambda item: -item[1][0])[:10]
+    for module, (self_us, _) in slowest:
+        print(f"  {module:<60}{self_us / 1000:>8.1f}")
+
+    if args.budget_ms is not None and converter_ms > args.budget_ms:
+        print(f"\nconverter only path is over the budget of {args.budget_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
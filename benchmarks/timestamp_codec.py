@@ -0,0 +1,125 @@
+"""Compares the timestamp codec with the previous per-value conversion, which
+went through Timestamppb and DatetimeWithNanoseconds, for every time flavor in
+ATOMIC_TYPES. Checks that both give the same values, and prints the timings.
+
+    poetry run python -m benchmarks.timestamp_codec
+"""
+from datetime import date, datetime, time, timedelta, timezone
+import timeit
+from pydantic import NaiveDatetime, AwareDatetime
+from google.cloud.datastore_v1.types import Value as Valuepb
+from google.protobuf.timestamp_pb2 import Timestamp as Timestamppb
+from proto.datetime_helpers import DatetimeWithNanoseconds
+from sarvam_datastore._timestamp_codec import (
+    decode_timestamp,
+    decode_timestamps,
+    encode_timestamp,
+    encode_timestamps,
+)
+
+UTC_EPOCH = datetime.fromtimestamp(0, tz=timezone.utc)
+COUNT = 1000
+REPEAT = 20
+
+
+def legacy_encode(value):
+    if isinstance(value, time):
+        value = datetime.combine(UTC_EPOCH, value)
+    elif isinstance(value, timedelta):
+        value = UTC_EPOCH + value
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime.combine(value, time(hour=0, minute=0, second=0), timezone.utc)
+
+    if not value.tzinfo:
+        value = value.replace(tzinfo=timezone.utc)
+    else:
+        value = value.astimezone(timezone.utc)
+
+    return Timestamppb(seconds=int(value.timestamp()), nanos=value.microsecond * 1000)
+
+
+def legacy_decode(timestamp_pb, field_type):
+    valuepb = DatetimeWithNanoseconds.from_timestamp_pb(timestamp_pb)
+    value = datetime(
+        valuepb.year,
+        valuepb.month,
+        valuepb.day,
+        valuepb.hour,
+        valuepb.minute,
+        valuepb.second,
+        microsecond=valuepb.nanosecond // 1000,
+        tzinfo=timezone.utc,
+    )
+
+    if field_type == date:
+        return value.date()
+    elif field_type == time:
+        return value.timetz()
+    elif field_type == timedelta:
+        return value - UTC_EPOCH
+    elif field_type == NaiveDatetime:
+        return value.replace(tzinfo=None)
+    return value
+
+
+def sample_values(field_type):
+    base = datetime(2023, 5, 1, 10, 30, 15, 123456, timezone.utc)
+    values = [base + timedelta(seconds=17 * i, microseconds=i) for i in range(COUNT)]
+    if field_type == NaiveDatetime:
+        return [v.replace(tzinfo=None) for v in values]
+    elif field_type == date:
+        return [v.date() for v in values]
+    elif field_type == time:
+        return [v.timetz() for v in values]
+    elif field_type == timedelta:
+        return [v - UTC_EPOCH for v in values]
+    return values
+
+
+def bench(fn):
+    return min(timeit.repeat(fn, number=1, repeat=REPEAT))
+
+
+def main():
+    print(f"{'type':<16}{'op':<8}{'legacy ms':>12}{'codec ms':>12}{'speedup':>10}")
+    for field_type in (datetime, AwareDatetime, NaiveDatetime, date, time, timedelta):
+        values = sample_values(field_type)
+
+        # parity
+        legacy_pbs = [legacy_encode(v) for v in values]
+        value_pb = Valuepb.pb()()
+        encode_timestamps(value_pb.array_value.values, values)
+        codec_pbs = [v.timestamp_value for v in value_pb.array_value.values]
+        assert legacy_pbs == codec_pbs, field_type
+        legacy_values = [legacy_decode(pb, field_type) for pb in legacy_pbs]
+        codec_values = decode_timestamps(value_pb.array_value.values, field_type)
+        assert legacy_values == codec_values == values, field_type
+
+        timestamp_pb = Timestamppb()
+        encode_times = (
+            bench(lambda: [legacy_encode(v) for v in values]),
+            bench(lambda: [encode_timestamp(timestamp_pb, v) for v in values]),
+        )
+        decode_times = (
+            bench(lambda: [legacy_decode(pb, field_type) for pb in codec_pbs]),
+            bench(
+                lambda: decode_timestamps(value_pb.array_value.values, field_type),
+            ),
+        )
+        single_decode = bench(
+            lambda: [
+                decode_timestamp(pb.seconds, pb.nanos, field_type) for pb in codec_pbs
+            ],
+        )
+
+        name = getattr(field_type, "__name__", str(field_type))
+        for op, (legacy, codec) in (("encode", encode_times), ("decode", decode_times)):
+            print(
+                f"{name:<16}{op:<8}{legacy * 1000:>12.3f}{codec * 1000:>12.3f}"
+                f"{legacy / codec:>9.1f}x"
+            )
+        print(f"{name:<16}{'decode1':<8}{'':>12}{single_decode * 1000:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,105 @@
-from ._repository import (
-    DatastoreRepository,
-    DatastoreBatch,
-    DatastoreMutationResult,
-)
-from ._datastore_iterator import DatastoreIterator
-from ._geo_point import GeoPoint
-from ._model_helper import (
-    DatastoreModelHelper,
-    DatastoreConfig,
-    DatastoreProperty,
-    AtomicProperty,
-    EntityProperty,
-    ReferenceProperty,
-    GenericType,
-)
-from ._model_registry import DatastoreModelHelperRegistry
-from ._converter import EntityProtobufConverter
+"""The public names are loaded lazily, on first access, so that processes which
+only convert entities don't import the datastore client stack (the
+google.cloud.datastore client library and the async page iterators)."""
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from ._repository import (
+        DatastoreRepository,
+        DatastoreBatch,
+        DatastoreMutationResult,
+    )
+    from ._datastore_iterator import DatastoreIterator
+    from ._geo_point import GeoPoint
+    from ._model_helper import (
+        DatastoreModelHelper,
+        DatastoreConfig,
+        DatastoreProperty,
+        AtomicProperty,
+        EntityProperty,
+        ReferenceProperty,
+        GenericType,
+        DecodeEngine,
+        DatastoreVector,
+        VectorDtype,
+        VectorProperty,
+    )
+    from ._model_registry import DatastoreModelHelperRegistry
+    from ._converter import EntityProtobufConverter
+    from ._lazy_entity import LazyEntity
+    from ._columnar import Column, ColumnBatch, ColumnarDecoder
+    from ._process_pool import ProcessPoolConverter
+    from ._encoding_cache import EncodingCache
+    from ._compression import CompressionCodec
+    from ._entity_size import EntitySize, EntitySizeException, EntitySizeStats
+    from ._index_advisor import IndexAdvisor, IndexReport, QueryUsage
+    from ._client_pool import ChannelSelection, DatastoreClientPool
+    from ._write_throttle import ThrottleEvent, WriteThrottle
+    from ._hedging import HedgingPolicy, RetryBudget
+
+# the module of each public name
+_LAZY_ATTRS = {
+    "DatastoreRepository": "_repository",
+    "DatastoreBatch": "_repository",
+    "DatastoreMutationResult": "_repository",
+    "DatastoreIterator": "_datastore_iterator",
+    "GeoPoint": "_geo_point",
+    "DatastoreModelHelper": "_model_helper",
+    "DatastoreConfig": "_model_helper",
+    "DatastoreProperty": "_model_helper",
+    "AtomicProperty": "_model_helper",
+    "EntityProperty": "_model_helper",
+    "ReferenceProperty": "_model_helper",
+    "GenericType": "_model_helper",
+    "DecodeEngine": "_model_helper",
+    "DatastoreVector": "_model_helper",
+    "VectorDtype": "_model_helper",
+    "VectorProperty": "_model_helper",
+    "DatastoreModelHelperRegistry": "_model_registry",
+    "EntityProtobufConverter": "_converter",
+    "LazyEntity": "_lazy_entity",
+    "Column": "_columnar",
+    "ColumnBatch": "_columnar",
+    "ColumnarDecoder": "_columnar",
+    "ProcessPoolConverter": "_process_pool",
+    "EncodingCache": "_encoding_cache",
+    "CompressionCodec": "_compression",
+    "EntitySize": "_entity_size",
+    "EntitySizeException": "_entity_size",
+    "EntitySizeStats": "_entity_size",
+    "IndexAdvisor": "_index_advisor",
+    "IndexReport": "_index_advisor",
+    "QueryUsage": "_index_advisor",
+    "ChannelSelection": "_client_pool",
+    "DatastoreClientPool": "_client_pool",
+    "ThrottleEvent": "_write_throttle",
+    "WriteThrottle": "_write_throttle",
+    "HedgingPolicy": "_hedging",
+    "RetryBudget": "_hedging",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    # __import__ rather than importlib.import_module, to show in -X importtime
+    module = __import__(module_name, globals(), None, [name], 1)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_LAZY_ATTRS])
+
 
 __all__ = [
     "DatastoreRepository",
     "DatastoreBatch",
     "DatastoreMutationResult",
     "DatastoreIterator",
-    "ServiceBaseModel",
     "GeoPoint",
     "DatastoreModelHelper",
     "DatastoreConfig",
@@ -33,4 +110,27 @@ __all__ = [
     "EntityProperty",
     "ReferenceProperty",
     "GenericType",
+    "DecodeEngine",
+    "DatastoreVector",
+    "VectorDtype",
+    "VectorProperty",
+    "LazyEntity",
+    "Column",
+    "ColumnBatch",
+    "ColumnarDecoder",
+    "ProcessPoolConverter",
+    "EncodingCache",
+    "CompressionCodec",
+    "EntitySize",
+    "EntitySizeException",
+    "EntitySizeStats",
+    "IndexAdvisor",
+    "IndexReport",
+    "QueryUsage",
+    "ChannelSelection",
+    "DatastoreClientPool",
+    "ThrottleEvent",
+    "WriteThrottle",
+    "HedgingPolicy",
+    "RetryBudget",
 ]
@@ -0,0 +1,105 @@
+"""Finds the fields of decoded objects which changed since they were decoded,
+for DatastoreRepository.update_fields. A frozen copy of the stored fields of
+each object is kept aside, by object identity, while the object lives, so the
+objects (and their pydantic state, e.g. model_fields_set) are left untouched."""
+from dataclasses import fields, is_dataclass
+from typing import Any, Iterable
+import weakref
+from pydantic import BaseModel
+
+
+class _Unhashable(Exception):
+    pass
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return (type(value), tuple(_freeze(v) for v in value.__dict__.values()))
+    elif isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    elif isinstance(value, dict):
+        return tuple((_freeze(k), _freeze(v)) for k, v in value.items())
+    elif is_dataclass(value):
+        return (
+            type(value),
+            tuple(_freeze(getattr(value, f.name)) for f in fields(value)),
+        )
+    elif isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in value)
+    elif value.__hash__ is None:
+        # mutable values could change in place, after being frozen
+        raise _Unhashable()
+    elif isinstance(value, float):
+        # exact, so that -0.0 != 0.0 and nan == nan
+        return (type(value), value.hex())
+    elif isinstance(value, int):
+        # 1 == 1.0 == True, but they are encoded differently
+        return (type(value), value)
+    return value
+
+
+# the snapshot of a field which is not set, e.g. on partial models
+_MISSING = object()
+
+
+def _snapshot(value: Any) -> Any:
+    try:
+        return _freeze(value)
+    except _Unhashable:
+        # can not be compared, so always treated as changed
+        return object()
+
+
+class ChangeTracker:
+    """Snapshots of the stored fields of decoded objects, compared with their
+    current values to find the changed fields. Unlike tracking assignments,
+    this also finds in place changes, e.g. appending to a list field."""
+
+    def __init__(self):
+        self._snapshots: dict[int, tuple[weakref.ref, dict[str, Any]]] = {}
+
+    def track(self, obj: Any, field_names: Iterable[str]):
+        """snapshot the fields of obj, e.g. when it was decoded"""
+        key = id(obj)
+        snapshots = self._snapshots
+
+        def forget(ref: weakref.ref):
+            entry = snapshots.get(key)
+            if entry is not None and entry[0] is ref:
+                del snapshots[key]
+
+        snapshots[key] = (
+            weakref.ref(obj, forget),
+            {name: _snapshot(getattr(obj, name, _MISSING)) for name in field_names},
+        )
+
+    def _fields(self, obj: Any) -> dict[str, Any] | None:
+        entry = self._snapshots.get(id(obj))
+        if entry is None or entry[0]() is not obj:
+            return None
+        return entry[1]
+
+    def is_tracked(self, obj: Any) -> bool:
+        return self._fields(obj) is not None
+
+    def changed_fields(self, obj: Any) -> list[str]:
+        """the fields of obj which changed since they were snapshot, or an empty
+        list if obj is not tracked"""
+        fields = self._fields(obj)
+        if fields is None:
+            return []
+        return [
+            name
+            for name, snapshot in fields.items()
+            if _snapshot(getattr(obj, name, _MISSING)) != snapshot
+        ]
+
+    def mark_saved(self, obj: Any, field_names: Iterable[str]):
+        """snapshot the given fields of a tracked obj again, e.g. after they
+        were written, so that its other changes are still found"""
+        fields = self._fields(obj)
+        if fields is None:
+            return
+        for name in field_names:
+            if name in fields:
+                fields[name] = _snapshot(getattr(obj, name, _MISSING))
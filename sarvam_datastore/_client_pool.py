@@ -0,0 +1,188 @@
+import asyncio
+import inspect
+from enum import StrEnum
+from typing import Any, Callable
+import weakref
+from google.cloud.datastore_v1 import DatastoreAsyncClient
+from google.cloud.datastore_v1.services.datastore.transports import (
+    DatastoreGrpcAsyncIOTransport,
+)
+
+
+class ChannelSelection(StrEnum):
+    ROUND_ROBIN = "round_robin"
+    LEAST_LOADED = "least_loaded"
+    """the client with the fewest RPCs in flight"""
+
+
+class DatastoreClientPoolException(Exception):
+    pass
+
+
+def _create_channel(*args, options=(), **kwargs):
+    # grpc shares subchannels (connections) between channels with the same
+    # target and args, unless each channel has its own subchannel pool
+    return DatastoreGrpcAsyncIOTransport.create_channel(
+        *args, options=[*options, ("grpc.use_local_subchannel_pool", 1)], **kwargs
+    )
+
+
+def default_client_factory() -> DatastoreAsyncClient:
+    """a DatastoreAsyncClient with its own grpc channel and connection"""
+    return DatastoreAsyncClient(
+        transport=DatastoreGrpcAsyncIOTransport(channel=_create_channel)
+    )
+
+
+class _PooledClient:
+    """A client of the pool, which counts the RPCs in flight"""
+
+    __slots__ = ("_pool", "_idx", "_client")
+
+    def __init__(self, pool: "DatastoreClientPool", idx: int, client: Any):
+        self._pool = pool
+        self._idx = idx
+        self._client = client
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        in_flight = self._pool._in_flight
+        idx = self._idx
+
+        async def tracked(*args, **kwargs):
+            in_flight[idx] += 1
+            try:
+                return await attr(*args, **kwargs)
+            finally:
+                in_flight[idx] -= 1
+
+        return tracked
+
+
+class DatastoreClientPool:
+    """A pool of DatastoreAsyncClients, each with its own grpc channel, shared
+    by repositories. Clients are created on first use.
+
+    Repositories use the default pool of the running event loop, from
+    DatastoreClientPool.default(), unless given a pool. The grpc channels of a
+    pool are bound to the event loop which created them, so a pool must only
+    be used from one event loop.
+    """
+
+    # the default pools, by event loop
+    _defaults: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def __init__(
+        self,
+        size: int = 4,
+        selection: ChannelSelection = ChannelSelection.ROUND_ROBIN,
+        client_factory: Callable[[], Any] | None = None,
+    ):
+        """create a pool
+
+        Args:
+            size (int): number of clients (channels)
+            selection (ChannelSelection): how a client is picked for a caller
+            client_factory (Callable[[], Any] | None): (Optional) creates a
+                client, by default a DatastoreAsyncClient with its own channel
+        """
+        if size < 1:
+            raise DatastoreClientPoolException(f"Pool size must be >= 1, got {size}")
+
+        self.size = size
+        self.selection = ChannelSelection(selection)
+        self._client_factory = client_factory or default_client_factory
+        self._clients: list[Any | None] = [None] * size
+        self._in_flight = [0] * size
+        self._next = 0
+        self._closed = False
+
+    @classmethod
+    def _running_loop(cls) -> asyncio.AbstractEventLoop:
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            raise DatastoreClientPoolException(
+                "The default client pool is per event loop, use it from a "
+                "coroutine or pass a client pool"
+            ) from None
+
+    @classmethod
+    def default(cls) -> "DatastoreClientPool":
+        """the pool of the running event loop, created on first use"""
+        loop = cls._running_loop()
+        pool = cls._defaults.get(loop)
+        if pool is None or pool._closed:
+            pool = cls._defaults[loop] = cls()
+        return pool
+
+    @classmethod
+    def set_default(cls, pool: "DatastoreClientPool | None"):
+        """replace the pool of the running event loop, e.g. with one of a
+        different size"""
+        loop = cls._running_loop()
+        if pool is None:
+            cls._defaults.pop(loop, None)
+        else:
+            cls._defaults[loop] = pool
+
+    @property
+    def in_flight(self) -> list[int]:
+        """the number of RPCs in flight, by client"""
+        return list(self._in_flight)
+
+    def _select(self) -> int:
+        start = self._next
+        self._next = (start + 1) % self.size
+        if self.selection == ChannelSelection.ROUND_ROBIN:
+            return start
+
+        # least loaded, ties broken round robin
+        in_flight = self._in_flight
+        return min(
+            ((start + offset) % self.size for offset in range(self.size)),
+            key=in_flight.__getitem__,
+        )
+
+    def client(self) -> Any:
+        """a client of the pool, to make RPCs with"""
+        if self._closed:
+            raise DatastoreClientPoolException("The client pool is closed")
+
+        idx = self._select()
+        client = self._clients[idx]
+        if client is None:
+            client = self._clients[idx] = self._client_factory()
+        return _PooledClient(self, idx, client)
+
+    def all_clients(self) -> list[Any]:
+        """every client of the pool, e.g. to open all channels up front"""
+        if self._closed:
+            raise DatastoreClientPoolException("The client pool is closed")
+
+        for idx, client in enumerate(self._clients):
+            if client is None:
+                self._clients[idx] = self._client_factory()
+        return [
+            _PooledClient(self, idx, client) for idx, client in enumerate(self._clients)
+        ]
+
+    async def close(self):
+        """close the channels of the pool. Clients of the pool must not be
+        used afterwards."""
+        self._closed = True
+        clients = [client for client in self._clients if client is not None]
+        self._clients = [None] * self.size
+        for client in clients:
+            transport = getattr(client, "transport", None)
+            if transport is not None and hasattr(transport, "close"):
+                await transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
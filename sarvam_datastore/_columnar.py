@@ -0,0 +1,325 @@
+from datetime import date, datetime, time, timedelta
+from enum import IntEnum
+from typing import TYPE_CHECKING, Any, Iterable, Sequence
+from pydantic import NaiveDatetime, AwareDatetime
+from ._model_helper import DatastoreModelHelper, GenericType
+from ._descriptors import PropertyDescriptor, AtomicDescriptor, ReferenceDescriptor
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+from ._converter import raw_pb
+
+if TYPE_CHECKING:
+    from ._converter import EntityProtobufConverter
+
+
+class ColumnarException(Exception):
+    pass
+
+
+# dtypes of the atomic types which are stored in typed arrays. timestamps are
+# stored as int64 nanoseconds since the epoch. All other types are stored
+# in object arrays.
+_COLUMN_DTYPES: dict[type, str] = {
+    bool: "bool",
+    int: "int64",
+    IntEnum: "int64",
+    float: "float64",
+    datetime: "int64",
+    date: "int64",
+    time: "int64",
+    timedelta: "int64",
+    NaiveDatetime: "int64",
+    AwareDatetime: "int64",
+}
+
+_FILL_VALUES = {"bool": False, "int64": 0, "float64": 0.0, "object": None}
+
+_NANOS_PER_SECOND = 1_000_000_000
+
+
+def _require_numpy():
+    if np is None:
+        raise ColumnarException(
+            "columnar decoding needs numpy - install sarvam-datastore[columnar]"
+        )
+
+
+class Column:
+    """The values of one property for a batch of entities"""
+
+    def __init__(self, name: str, values: Any, mask: Any):
+        """a new column
+
+        Args:
+            name (str): model field name
+            values (np.ndarray): the values, with a fill value where mask is set
+            mask (np.ndarray): bool array, True where the value is null or missing
+        """
+        self.name = name
+        self.values = values
+        self.mask = mask
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return f"Column {self.name} - {self.dtype}, {len(self)} rows"
+
+
+class ColumnBatch:
+    """A batch of entities, stored as one Column per model field"""
+
+    def __init__(self, columns: dict[str, Column], num_rows: int):
+        self.columns = columns
+        self.num_rows = num_rows
+
+    def __getitem__(self, name: str) -> Column:
+        return self.columns[name]
+
+    def __len__(self):
+        return self.num_rows
+
+    @classmethod
+    def concat(cls, batches: Sequence["ColumnBatch"]) -> "ColumnBatch":
+        """concatenate batches (e.g. pages of a query) with the same columns
+
+        Args:
+            batches (Sequence[ColumnBatch]): batches to concatenate
+
+        Returns:
+            ColumnBatch: one batch with all rows
+        """
+        _require_numpy()
+        if len(batches) == 0:
+            return cls({}, 0)
+
+        names = list(batches[0].columns)
+        for batch in batches:
+            if list(batch.columns) != names:
+                raise ColumnarException("cannot concat batches with different columns")
+
+        columns = {
+            name: Column(
+                name,
+                np.concatenate([batch.columns[name].values for batch in batches]),
+                np.concatenate([batch.columns[name].mask for batch in batches]),
+            )
+            for name in names
+        }
+        return cls(columns, sum(batch.num_rows for batch in batches))
+
+
+class ColumnarDecoder:
+    """Decodes entity protobufs of one model directly into a ColumnBatch,
+    without creating a model instance per entity.
+
+    Atomic properties are decoded straight from the protobuf values. Lists,
+    dicts and embedded entities are decoded through the converter into object
+    columns.
+    """
+
+    def __init__(
+        self, converter: "EntityProtobufConverter", helper: DatastoreModelHelper
+    ):
+        _require_numpy()
+        self._converter = converter
+        self._helper = helper
+
+        # columns are named after model fields, so a field which is both in
+        # the key and in a reference, or in two references, would have two
+        field_names: set[str] = set()
+        if helper.key_descriptor is not None:
+            field_names.update(
+                path_item.field_name for path_item in helper.key_descriptor.path_items
+            )
+        for property in helper.descriptors.values():
+            if isinstance(property, ReferenceDescriptor):
+                names = [path_item.field_name for path_item in property.key.path_items]
+            else:
+                names = [property.field_name]
+            for field_name in names:
+                if field_name in field_names:
+                    raise ColumnarException(
+                        f"Field {field_name} of {helper.cls.__name__} is decoded "
+                        "into more than one column"
+                    )
+                field_names.add(field_name)
+
+    @classmethod
+    def column_dtype(cls, property: PropertyDescriptor) -> str:
+        if (
+            isinstance(property, AtomicDescriptor)
+            and property.generic_type == GenericType.NONE
+        ):
+            return _COLUMN_DTYPES.get(property.field_type, "object")
+        return "object"
+
+    def decode(self, entity_pbs: Iterable[Any]) -> ColumnBatch:
+        """decode entity protobufs into a batch of columns
+
+        Args:
+            entity_pbs (Iterable[Any]): entity protobufs of the helper's kind
+
+        Returns:
+            ColumnBatch: the decoded batch
+        """
+        helper = self._helper
+        entity_pbs = [raw_pb(entity_pb) for entity_pb in entity_pbs]
+        num_rows = len(entity_pbs)
+
+        columns: dict[str, Column] = {}
+        key_descriptor = helper.key_descriptor
+        if key_descriptor is not None:
+            for idx, path_item in enumerate(key_descriptor.path_items):
+                columns[path_item.field_name] = self._decode_key_column(
+                    entity_pbs, idx, path_item.field_name, path_item.field_type
+                )
+
+        for datastore_name, property in helper.descriptors.items():
+            if isinstance(property, ReferenceDescriptor):
+                columns |= self._decode_reference_columns(
+                    entity_pbs, datastore_name, property
+                )
+                continue
+
+            dtype = self.column_dtype(property)
+            if dtype == "object":
+                column = self._decode_object_column(
+                    entity_pbs, datastore_name, property
+                )
+            else:
+                column = self._decode_typed_column(
+                    entity_pbs, datastore_name, property, dtype
+                )
+            columns[property.field_name] = column
+
+        return ColumnBatch(columns, num_rows)
+
+    def _decode_key_column(
+        self, entity_pbs: list[Any], idx: int, field_name: str, field_type: type
+    ) -> Column:
+        dtype = "int64" if field_type == int else "object"
+        id_type = "id" if field_type == int else "name"
+        fill = _FILL_VALUES[dtype]
+        values: list[Any] = []
+        mask: list[bool] = []
+        for entity_pb in entity_pbs:
+            path_pb = entity_pb.key.path
+            element_pb = path_pb[idx] if idx < len(path_pb) else None
+            if element_pb is not None and element_pb.WhichOneof("id_type") == id_type:
+                values.append(getattr(element_pb, id_type))
+                mask.append(False)
+            else:
+                values.append(fill)
+                mask.append(True)
+
+        return Column(
+            field_name, np.array(values, dtype=dtype), np.array(mask, dtype=bool)
+        )
+
+    def _decode_typed_column(
+        self,
+        entity_pbs: list[Any],
+        datastore_name: str,
+        property: AtomicDescriptor,
+        dtype: str,
+    ) -> Column:
+        pb_type = property.pb_type
+        is_timestamp = property.is_timestamp
+        fill = _FILL_VALUES[dtype]
+        values: list[Any] = []
+        mask: list[bool] = []
+        for entity_pb in entity_pbs:
+            properties_pb = entity_pb.properties
+            if datastore_name not in properties_pb:
+                values.append(fill)
+                mask.append(True)
+                continue
+
+            value_pb = properties_pb[datastore_name]
+            value_type = value_pb.WhichOneof("value_type")
+            if value_type == pb_type:
+                if is_timestamp:
+                    ts = value_pb.timestamp_value
+                    values.append(ts.seconds * _NANOS_PER_SECOND + ts.nanos)
+                else:
+                    values.append(getattr(value_pb, pb_type))
+                mask.append(False)
+            elif value_type == "null_value":
+                values.append(fill)
+                mask.append(True)
+            else:
+                raise ColumnarException(
+                    f"Expected {pb_type}, got {value_type}"
+                    f" for field {property.field_name}"
+                )
+
+        return Column(
+            property.field_name,
+            np.array(values, dtype=dtype),
+            np.array(mask, dtype=bool),
+        )
+
+    def _decode_object_column(
+        self, entity_pbs: list[Any], datastore_name: str, property: PropertyDescriptor
+    ) -> Column:
+        converter = self._converter
+        is_atomic = isinstance(property, AtomicDescriptor)
+        values = np.empty(len(entity_pbs), dtype=object)
+        mask = np.zeros(len(entity_pbs), dtype=bool)
+        for idx, entity_pb in enumerate(entity_pbs):
+            properties_pb = entity_pb.properties
+            if datastore_name not in properties_pb:
+                mask[idx] = True
+                continue
+
+            value_pb = properties_pb[datastore_name]
+            value_type = value_pb.WhichOneof("value_type")
+            if value_type == "null_value":
+                mask[idx] = True
+            elif (
+                is_atomic
+                and property.compression is None
+                and value_type in ("string_value", "blob_value")
+            ):
+                # skip creating enum instances
+                values[idx] = getattr(value_pb, value_type)
+            else:
+                values[idx] = converter.from_protobuf_property(
+                    properties_pb, datastore_name, property
+                )
+
+        return Column(property.field_name, values, mask)
+
+    def _decode_reference_columns(
+        self, entity_pbs: list[Any], datastore_name: str, property: ReferenceDescriptor
+    ) -> dict[str, Column]:
+        converter = self._converter
+        field_names = [path_item.field_name for path_item in property.key.path_items]
+        values = {name: np.empty(len(entity_pbs), dtype=object) for name in field_names}
+        masks = {name: np.ones(len(entity_pbs), dtype=bool) for name in field_names}
+        for idx, entity_pb in enumerate(entity_pbs):
+            properties_pb = entity_pb.properties
+            if datastore_name not in properties_pb:
+                continue
+
+            value_pb = properties_pb[datastore_name]
+            if value_pb.WhichOneof("value_type") != "key_value":
+                continue
+
+            key_values = converter.from_protobuf_key_values(
+                property.key, value_pb.key_value
+            )
+            for field_name, value in key_values:
+                values[field_name][idx] = value
+                masks[field_name][idx] = False
+
+        return {name: Column(name, values[name], masks[name]) for name in field_names}
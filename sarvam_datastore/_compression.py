@@ -0,0 +1,80 @@
+"""Compresses str/bytes property values into blobs with a small header, which
+identifies the codec. Values too small to compress are written behind the same
+header, with the raw codec id, so that no written blob is mistaken for a
+compressed one when reading."""
+from enum import StrEnum
+from functools import lru_cache
+from typing import Any
+import zlib
+
+
+@lru_cache(maxsize=None)
+def _zstd() -> Any:
+    """the zstd module, imported on first use, or None if not installed"""
+    try:
+        from compression import zstd  # type: ignore  # python 3.14+
+    except ImportError:  # pragma: no cover
+        try:
+            import zstandard as zstd  # type: ignore
+        except ImportError:
+            zstd = None
+    return zstd
+
+
+class CompressionCodec(StrEnum):
+    ZLIB = "zlib"
+    ZSTD = "zstd"
+
+
+class CompressionException(Exception):
+    pass
+
+
+MAGIC = b"\xffSDZ"
+_RAW_ID = b"\x00"
+_CODEC_IDS = {CompressionCodec.ZLIB: b"\x01", CompressionCodec.ZSTD: b"\x02"}
+_CODECS_BY_ID = {v[0]: k for k, v in _CODEC_IDS.items()}
+_HEADER_SIZE = len(MAGIC) + 1
+
+
+def is_codec_available(codec: CompressionCodec) -> bool:
+    return codec != CompressionCodec.ZSTD or _zstd() is not None
+
+
+def compress(data: bytes, codec: CompressionCodec | None) -> bytes:
+    """compresses data, and prefixes the header. Without a codec, data is
+    stored uncompressed behind the header."""
+    zstd = _zstd() if codec == CompressionCodec.ZSTD else None
+    if codec is None:
+        return MAGIC + _RAW_ID + data
+    elif codec == CompressionCodec.ZLIB:
+        payload = zlib.compress(data)
+    elif zstd is not None:
+        payload = zstd.compress(data)
+    else:
+        raise CompressionException("zstd compression needs the zstandard package")
+
+    return MAGIC + _CODEC_IDS[codec] + payload
+
+
+def is_compressed(blob: bytes) -> bool:
+    return blob[: len(MAGIC)] == MAGIC and len(blob) >= _HEADER_SIZE
+
+
+def decompress(blob: bytes) -> bytes:
+    """decompresses a blob created by compress. Blobs without the header
+    (written before compression was enabled) are returned as is."""
+    if not is_compressed(blob):
+        return blob
+
+    codec_id = blob[len(MAGIC)]
+    payload = memoryview(blob)[_HEADER_SIZE:]
+    if codec_id == _RAW_ID[0]:
+        return bytes(payload)
+
+    codec = _CODECS_BY_ID.get(codec_id)
+    if codec == CompressionCodec.ZLIB:
+        return zlib.decompress(payload)
+    elif codec == CompressionCodec.ZSTD and _zstd() is not None:
+        return _zstd().decompress(bytes(payload))
+    raise CompressionException(f"Cannot decompress blob with codec {codec}")
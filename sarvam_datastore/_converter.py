@@ -1,34 +1,63 @@
-from datetime import date, datetime, time, timedelta, timezone
+from datetime import date, datetime, time, timedelta
 from enum import IntEnum, StrEnum
-from typing import Any
-from pydantic import NaiveDatetime, AwareDatetime
+from typing import Any, Iterable
 from ._model_helper import (
     DatastoreModelHelper,
-    DatastoreProperty,
-    AtomicProperty,
     EntityProperty,
-    ReferenceProperty,
-    DatastoreModelKey,
     GeoPoint,
-    ATOMIC_TYPE_TO_DATASTORE_TYPE,
     GenericType,
+    DecodeEngine,
+)
+from ._descriptors import (
+    KeyDescriptor,
+    PropertyDescriptor,
+    AtomicDescriptor,
+    EntityDescriptor,
+    ReferenceDescriptor,
+    VectorDescriptor,
 )
 from google.cloud.datastore_v1.types import (
     Entity as Entitypb,
     Key as Keypb,
     Value as Valuepb,
 )
-from google.type import latlng_pb2
-from google.cloud.datastore_v1.types import entity as entity_pb2
 from google.protobuf import struct_pb2
-from google.protobuf.timestamp_pb2 import Timestamp as Timestamppb
-from proto.datetime_helpers import DatetimeWithNanoseconds
+from google.protobuf.message import Message
 from ._model_registry import DatastoreModelHelperRegistry
+from ._lazy_entity import LazyEntity
+from ._encoding_cache import EncodingCache, fingerprint
+from ._change_tracker import ChangeTracker
+from ._vector import pack_vector, unpack_vector
+from ._compression import compress, decompress
+from ._entity_size import (
+    EntitySize,
+    EntitySizeStats,
+    estimate_entity_size,
+    check_entity_size,
+)
+from ._timestamp_codec import (
+    encode_timestamp,
+    encode_timestamps,
+    decode_timestamp,
+    decode_timestamps,
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
-UTC_EPOCH = datetime.fromtimestamp(0, tz=timezone.utc)
+# The converter works on the raw google.protobuf messages underneath the
+# proto-plus wrappers, so that nested entities, keys and arrays are written
+# in place, without building intermediate messages and copying them.
+EntityRawpb = Entitypb.pb()
+KeyRawpb = Keypb.pb()
+ValueRawpb = Valuepb.pb()
+
+
+def raw_pb(message: Any) -> Message:
+    """returns the raw protobuf message underneath a proto-plus wrapper"""
+    if isinstance(message, Message):
+        return message
+    return type(message).pb(message)
 
 
 class EntityProtobufConverterException(Exception):
@@ -36,11 +65,33 @@ class EntityProtobufConverterException(Exception):
 
 
 class EntityProtobufConverter:
-    def __init__(self, registry: DatastoreModelHelperRegistry) -> None:
+    def __init__(
+        self,
+        registry: DatastoreModelHelperRegistry,
+        encoding_cache: EncodingCache | None = None,
+        size_guard: bool = False,
+        size_stats: EntitySizeStats | None = None,
+    ) -> None:
+        """create a converter
+
+        Args:
+            registry (DatastoreModelHelperRegistry): registry of model helpers
+            encoding_cache (EncodingCache | None): (Optional) cache of built
+                entity protobufs, to skip encoding unchanged objects again
+            size_guard (bool): raise EntitySizeException from to_protobuf for
+                entities over the Datastore size or index entry limits
+            size_stats (EntitySizeStats | None): (Optional) records the sizes
+                of the entities built by to_protobuf
+        """
         self.registry = registry
-
-    def _get_helper_from_entity_pb(self, entity_pb: Entitypb):
-        if entity_pb.key is None:
+        self.encoding_cache = encoding_cache
+        self.size_guard = size_guard
+        self.size_stats = size_stats
+        # changes of decoded objects of models with track_changes
+        self.change_tracker = ChangeTracker()
+
+    def _get_helper_from_entity_pb(self, entity_pb: Any):
+        if not entity_pb.HasField("key"):
             raise EntityProtobufConverterException("from_protobuf: Entity has no key")
 
         if len(entity_pb.key.path) == 0:
@@ -48,7 +99,7 @@ class EntityProtobufConverter:
                 "from_protobuf: Entity key has no path"
             )
 
-        kind = entity_pb.key.path[0].kind
+        kind = entity_pb.key.path[-1].kind
         helper = self.registry.get_by_kind(kind)
         if helper is None:
             raise EntityProtobufConverterException(
@@ -57,7 +108,7 @@ class EntityProtobufConverter:
         return helper
 
     def _get_helper(
-        self, entity_pb: Entitypb, clazz: type | None = None
+        self, entity_pb: Any, clazz: type | None = None
     ) -> DatastoreModelHelper:
         if clazz is not None:
             return self.registry.get_by_class(clazz)
@@ -72,6 +123,80 @@ class EntityProtobufConverter:
         *,
         entity_property: EntityProperty | None = None,
     ) -> Entitypb:
+        entity_pb = EntityRawpb()
+        cache = self.encoding_cache
+        if cache is None:
+            self.to_protobuf_raw(entity_pb, obj, project, namespace)
+            self._check_size(entity_pb)
+            return Entitypb.wrap(entity_pb)
+
+        obj_fingerprint = fingerprint(obj)
+        cached_pb = cache.get(obj, project, namespace, obj_fingerprint)
+        if cached_pb is None:
+            self.to_protobuf_raw(entity_pb, obj, project, namespace)
+            cached_pb = EntityRawpb()
+            cached_pb.CopyFrom(entity_pb)
+            cache.put(obj, project, namespace, obj_fingerprint, cached_pb)
+        else:
+            # callers may change the returned entity, so return a copy
+            entity_pb.CopyFrom(cached_pb)
+        self._check_size(entity_pb)
+        return Entitypb.wrap(entity_pb)
+
+    def to_protobuf_partial(
+        self,
+        obj: Any,
+        field_names: Iterable[str],
+        project: str = "",
+        namespace: str = "",
+    ) -> Entitypb:
+        """encodes the key and only the given model fields of obj, e.g. for an
+        update with a property mask"""
+        helper = self.registry.get_by_class(type(obj))
+        entity_pb = EntityRawpb()
+        self.to_protobuf_raw(
+            entity_pb, obj, project, namespace, helper.property_names(field_names)
+        )
+        self._check_size(entity_pb)
+        return Entitypb.wrap(entity_pb)
+
+    def _check_size(self, entity_pb: Any):
+        if self.size_guard or self.size_stats is not None:
+            size = estimate_entity_size(entity_pb)
+            if self.size_stats is not None:
+                self.size_stats.record(size)
+            if self.size_guard:
+                check_entity_size(size)
+
+    def estimate_size(self, entity_pb: Any) -> EntitySize:
+        """estimate the serialized size and the number of built-in index
+        entries of an entity protobuf, with a breakdown by property
+
+        Args:
+            entity_pb (Any): the entity protobuf
+
+        Returns:
+            EntitySize: the estimate
+        """
+        return estimate_entity_size(raw_pb(entity_pb))
+
+    def check_size(self, entity_pb: Any) -> EntitySize:
+        """estimate the size of an entity protobuf, and raise
+        EntitySizeException if it exceeds the Datastore limits"""
+        size = self.estimate_size(entity_pb)
+        check_entity_size(size)
+        return size
+
+    def to_protobuf_raw(
+        self,
+        entity_pb: Any,
+        obj: Any,
+        project: str = "",
+        namespace: str = "",
+        property_names: Iterable[str] | None = None,
+    ) -> None:
+        """writes obj into the (raw) entity protobuf entity_pb, in place. Only
+        the properties in property_names are written, if given."""
         clazz = type(obj)
         helper = self.registry.get_by_class(clazz)
         if helper is None:
@@ -79,37 +204,48 @@ class EntityProtobufConverter:
                 f"Model helper for class {clazz} not found"
             )
 
-        entity_pb = Entitypb()
-        if helper.key is not None:
-            key_pb = self.to_protobuf_key(
+        key_descriptor = helper.key_descriptor
+        if key_descriptor is not None:
+            self.to_protobuf_key_raw(
+                entity_pb.key,
                 obj,
-                helper.key,
+                key_descriptor,
                 project_id=project,
                 namespace_id=namespace,
             )
-            entity_pb._pb.key.CopyFrom(key_pb._pb)
 
-        for datastore_property_name, property in helper.properties.items():
-            value_pb = entity_pb.properties._pb.get_or_create(  # type: ignore
-                datastore_property_name
-            )
+        descriptors = helper.descriptors
+        if property_names is None:
+            properties = descriptors.items()
+        else:
+            properties = [(name, descriptors[name]) for name in property_names]
+
+        properties_pb = entity_pb.properties
+        for datastore_property_name, property in properties:
+            value_pb = properties_pb[datastore_property_name]
             value = getattr(obj, property.field_name, None)
             if value is None:
                 self.to_protobuf_null_value(value_pb, property)
+            elif isinstance(property, VectorDescriptor):
+                value_pb.blob_value = pack_vector(value, property.dtype)
+            elif property.packed:
+                self.to_protobuf_packed(value_pb, value, property)
             elif property.generic_type == GenericType.LIST:
                 self.to_protobuf_list(value_pb, value, property)
             elif property.generic_type == GenericType.DICT:
                 self.to_protobuf_dict(value_pb, value, property)
-            elif isinstance(property, AtomicProperty):
+            elif isinstance(property, AtomicDescriptor):
                 self.to_protobuf_atomic(value_pb, value, property)
-            elif isinstance(property, EntityProperty):
+            elif isinstance(property, EntityDescriptor):
                 self.to_protobuf_entity(value_pb, value, property)
-            elif isinstance(property, ReferenceProperty):
-                ref_key_pb = self.to_protobuf_key(
-                    obj, property.key, project_id=project, namespace_id=namespace
+            elif isinstance(property, ReferenceDescriptor):
+                self.to_protobuf_key_raw(
+                    value_pb.key_value,
+                    obj,
+                    property.key,
+                    project_id=project,
+                    namespace_id=namespace,
                 )
-                value_pb.key_value.CopyFrom(ref_key_pb._pb)
-
             else:
                 raise EntityProtobufConverterException(
                     f"Unknown property type {type(property)}"
@@ -122,59 +258,188 @@ class EntityProtobufConverter:
             ):
                 value_pb.exclude_from_indexes = True
 
-        return entity_pb
-
-    def from_protobuf(self, entity_pb: Entitypb, clazz: type | None = None) -> Any:
+    def from_protobuf(self, entity_pb: Any, clazz: type | None = None) -> Any:
+        entity_pb = raw_pb(entity_pb)
         helper = self._get_helper(entity_pb, clazz)
 
+        decode_engine = helper.config.decode_engine
+        if decode_engine == DecodeEngine.CONSTRUCT:
+            return self._loaded(
+                helper,
+                helper.cls.model_construct(
+                    **self.from_protobuf_values(entity_pb, helper)
+                ),
+            )
+        elif decode_engine == DecodeEngine.VALIDATE:
+            return self._loaded(
+                helper,
+                helper.cls.model_validate(self.from_protobuf_values(entity_pb, helper)),
+            )
+
         obj = helper.cls.model_construct()
 
-        if helper.key is not None:
-            self.from_protobuf_key(obj, helper.key, entity_pb.key)
+        key_descriptor = helper.key_descriptor
+        if key_descriptor is not None:
+            self.from_protobuf_key(obj, key_descriptor, entity_pb.key)
 
-        for datastore_property_name, property in helper.properties.items():
-            if datastore_property_name in entity_pb.properties:
-                value_pb = entity_pb.properties[datastore_property_name]
-                pb_type = value_pb._pb.WhichOneof("value_type")
-                if isinstance(property, ReferenceProperty):
-                    self.from_protobuf_key(obj, property.key, value_pb.key_value)
-                else:
-                    if pb_type == "null_value":
-                        value = self.from_protobuf_null_value(property)
-                    elif property.generic_type == GenericType.LIST:
-                        value = self.from_protobuf_list(value_pb, pb_type, property)
-                    elif property.generic_type == GenericType.DICT:
-                        value = self.from_protobuf_dict(value_pb, pb_type, property)
-                    elif isinstance(property, AtomicProperty):
-                        value = self.from_protobuf_atomic(value_pb, pb_type, property)
-                    elif isinstance(property, EntityProperty):
-                        value = self.from_protobuf_entity(value_pb, pb_type, property)
-                    else:
-                        raise EntityProtobufConverterException(
-                            f"Unknown property type {type(property)}"
-                            f" for field {property.field_name}"
-                        )
-                    setattr(obj, property.field_name, value)
+        properties_pb = entity_pb.properties
+        for datastore_property_name, property in helper.descriptors.items():
+            if (
+                isinstance(property, ReferenceDescriptor)
+                and datastore_property_name in properties_pb
+            ):
+                key_pb = properties_pb[datastore_property_name].key_value
+                self.from_protobuf_key(obj, property.key, key_pb)
             else:
-                self.to_protobuf_null_value(value_pb, property)
+                value = self.from_protobuf_property(
+                    properties_pb, datastore_property_name, property
+                )
+                setattr(obj, property.field_name, value)
+
+        return self._loaded(helper, obj)
 
+    def _loaded(self, helper: DatastoreModelHelper, obj: Any) -> Any:
+        """start the change tracking of a decoded obj, for models with
+        track_changes"""
+        if helper.config.track_changes:
+            self.change_tracker.track(obj, helper.field_properties)
         return obj
 
-    def to_protobuf_null_value(
-        self, value_pb: Valuepb, property_def: DatastoreProperty
-    ):
+    def from_protobuf_values(
+        self, entity_pb: Any, helper: DatastoreModelHelper
+    ) -> dict[str, Any]:
+        """decodes the (raw) entity protobuf into a dict of field values"""
+        values: dict[str, Any] = {}
+        key_descriptor = helper.key_descriptor
+        if key_descriptor is not None:
+            values.update(self.from_protobuf_key_values(key_descriptor, entity_pb.key))
+
+        properties_pb = entity_pb.properties
+        for datastore_property_name, property in helper.descriptors.items():
+            if (
+                isinstance(property, ReferenceDescriptor)
+                and datastore_property_name in properties_pb
+            ):
+                key_pb = properties_pb[datastore_property_name].key_value
+                values.update(self.from_protobuf_key_values(property.key, key_pb))
+            else:
+                values[property.field_name] = self.from_protobuf_property(
+                    properties_pb, datastore_property_name, property
+                )
+
+        return values
+
+    def from_protobuf_partial(
+        self, entity_pb: Any, field_names: Iterable[str], clazz: type | None = None
+    ) -> Any:
+        """decodes only the key and the given model fields of entity_pb, e.g. an
+        entity looked up with a property mask. The model is built with
+        model_construct, so the other fields keep their defaults, or are unset.
+        """
+        entity_pb = raw_pb(entity_pb)
+        helper = self._get_helper(entity_pb, clazz)
+
+        values: dict[str, Any] = {}
+        key_descriptor = helper.key_descriptor
+        if key_descriptor is not None:
+            values.update(self.from_protobuf_key_values(key_descriptor, entity_pb.key))
+
+        properties_pb = entity_pb.properties
+        descriptors = helper.descriptors
+        for datastore_property_name in helper.property_names(field_names):
+            property = descriptors[datastore_property_name]
+            if isinstance(property, ReferenceDescriptor):
+                if datastore_property_name in properties_pb:
+                    key_pb = properties_pb[datastore_property_name].key_value
+                    values.update(self.from_protobuf_key_values(property.key, key_pb))
+            else:
+                values[property.field_name] = self.from_protobuf_property(
+                    properties_pb, datastore_property_name, property
+                )
+
+        return self._loaded(helper, helper.cls.model_construct(**values))
+
+    def from_protobuf_multi(
+        self, entity_pbs: Iterable[Any], clazz: type | None = None
+    ) -> list[Any]:
+        """decodes a page of entity protobufs. Entities of models using
+        DecodeEngine.VALIDATE are validated with one call for the page."""
+        entity_pbs = [raw_pb(entity_pb) for entity_pb in entity_pbs]
+        helpers = [self._get_helper(entity_pb, clazz) for entity_pb in entity_pbs]
+        if len(helpers) == 0:
+            return []
+
+        helper = helpers[0]
+        if helper.config.decode_engine != DecodeEngine.VALIDATE or any(
+            other is not helper for other in helpers
+        ):
+            return [
+                self.from_protobuf(entity_pb, other.cls)
+                for entity_pb, other in zip(entity_pbs, helpers)
+            ]
+
+        objs = helper.list_adapter.validate_python(
+            [self.from_protobuf_values(entity_pb, helper) for entity_pb in entity_pbs]
+        )
+        return [self._loaded(helper, obj) for obj in objs]
+
+    def from_protobuf_lazy(
+        self, entity_pb: Any, clazz: type | None = None
+    ) -> LazyEntity:
+        """returns a LazyEntity, which decodes the fields of entity_pb on first
+        access, rather than all at once"""
+        entity_pb = raw_pb(entity_pb)
+        helper = self._get_helper(entity_pb, clazz)
+        return LazyEntity(self, helper, entity_pb)
+
+    def from_protobuf_property(
+        self,
+        properties_pb: Any,
+        datastore_property_name: str,
+        property: PropertyDescriptor,
+    ) -> Any:
+        """decodes one (non reference) property from the property map of an
+        entity protobuf"""
+        if datastore_property_name not in properties_pb:
+            return self.from_protobuf_null_value(property)
+
+        value_pb = properties_pb[datastore_property_name]
+        pb_type = value_pb.WhichOneof("value_type")
+        if property.packed and pb_type == "blob_value":
+            value_pb = ValueRawpb.FromString(value_pb.blob_value)
+            pb_type = value_pb.WhichOneof("value_type")
+
+        if pb_type == "null_value":
+            return self.from_protobuf_null_value(property)
+        elif isinstance(property, VectorDescriptor):
+            return self.from_protobuf_vector(value_pb, pb_type, property)
+        elif property.generic_type == GenericType.LIST:
+            return self.from_protobuf_list(value_pb, pb_type, property)
+        elif property.generic_type == GenericType.DICT:
+            return self.from_protobuf_dict(value_pb, pb_type, property)
+        elif isinstance(property, AtomicDescriptor):
+            return self.from_protobuf_atomic(value_pb, pb_type, property)
+        elif isinstance(property, EntityDescriptor):
+            return self.from_protobuf_entity(value_pb, pb_type, property)
+        else:
+            raise EntityProtobufConverterException(
+                f"Unknown property type {type(property)}"
+                f" for field {property.field_name}"
+            )
+
+    def to_protobuf_null_value(self, value_pb: Any, property_def: PropertyDescriptor):
         if (
             property_def.generic_type == GenericType.LIST
             or property_def.generic_type == GenericType.DICT
             or property_def.is_optional
         ):
-            setattr(value_pb, "null_value", struct_pb2.NULL_VALUE)
+            value_pb.null_value = struct_pb2.NULL_VALUE
         else:
             raise EntityProtobufConverterException(
                 f"Non-optional property {property_def.field_name} is None"
             )
 
-    def from_protobuf_null_value(self, property_def: DatastoreProperty):
+    def from_protobuf_null_value(self, property_def: PropertyDescriptor):
         if property_def.generic_type == GenericType.LIST:
             return []
         elif property_def.generic_type == GenericType.DICT:
@@ -190,13 +455,27 @@ class EntityProtobufConverter:
     def to_protobuf_key(
         self,
         obj: Any,
-        key_def: DatastoreModelKey,
+        key_def: KeyDescriptor,
         project_id: str | None = None,
         namespace_id: str | None = None,
         database_id: str | None = None,
     ) -> Keypb:
-        key_pb = Keypb()
+        key_pb = KeyRawpb()
+        self.to_protobuf_key_raw(
+            key_pb, obj, key_def, project_id, namespace_id, database_id
+        )
+        return Keypb.wrap(key_pb)
 
+    def to_protobuf_key_raw(
+        self,
+        key_pb: Any,
+        obj: Any,
+        key_def: KeyDescriptor,
+        project_id: str | None = None,
+        namespace_id: str | None = None,
+        database_id: str | None = None,
+    ) -> None:
+        """writes the key of obj into the (raw) key protobuf key_pb, in place"""
         if project_id is not None:
             key_pb.partition_id.project_id = project_id
 
@@ -207,8 +486,9 @@ class EntityProtobufConverter:
             key_pb.partition_id.namespace_id = namespace_id
 
         is_first = True
+        path_pb = key_pb.path
         for path_item in key_def.path_items:
-            element_pb = key_pb.PathElement()
+            element_pb = path_pb.add()
             element_pb.kind = path_item.kind
 
             value = getattr(obj, path_item.field_name, None)
@@ -229,77 +509,132 @@ class EntityProtobufConverter:
                         "It can only be an int or str"
                     )
 
-            key_pb.path.append(element_pb)
             is_first = False
 
-        return key_pb
+    def from_protobuf_key(self, obj: Any, key_def: KeyDescriptor, key_pb: Any):
+        for field_name, value in self.from_protobuf_key_values(key_def, key_pb):
+            setattr(obj, field_name, value)
 
-    def from_protobuf_key(
-        self, obj: Any, key_def: DatastoreModelKey, key_pb: Keypb
-    ) -> None:
+    def from_protobuf_key_values(
+        self, key_def: KeyDescriptor, key_pb: Any
+    ) -> list[tuple[str, int | str]]:
+        """returns the (field name, value) pairs of the key fields in key_pb"""
+        key_pb = raw_pb(key_pb)
         if len(key_pb.path) != len(key_def.path_items):
             raise EntityProtobufConverterException(
                 f"Key path length mismatch. Expected {len(key_def.path_items)},"
                 f" got {len(key_pb.path)}"
             )
 
-        for idx, path_item in enumerate(key_def.path_items):
-            element_pb = key_pb.path[idx]
-            if key_def.path_items[idx].kind != element_pb.kind:
+        values: list[tuple[str, int | str]] = []
+        for path_item, element_pb in zip(key_def.path_items, key_pb.path):
+            if path_item.kind != element_pb.kind:
                 raise EntityProtobufConverterException(
-                    f"Key path kind mismatch. Expected {key_def.path_items[idx].kind},"
+                    f"Key path kind mismatch. Expected {path_item.kind},"
                     f" got {element_pb.kind}"
                 )
-            if key_def.path_items[idx].field_type == int:
-                if element_pb.id is None:
+
+            id_type = element_pb.WhichOneof("id_type")
+            if id_type is None:
+                # incomplete key, leave the field as is
+                continue
+
+            if path_item.field_type == int:
+                if id_type != "id":
                     raise EntityProtobufConverterException(
-                        "Key path id mismatch. Expected int, got None"
+                        f"Key path id mismatch. Expected int, got {id_type}"
                     )
-                setattr(obj, path_item.field_name, element_pb.id)
-            elif key_def.path_items[idx].field_type == str:
-                if element_pb.name is None:
+                values.append((path_item.field_name, element_pb.id))
+            elif path_item.field_type == str:
+                if id_type != "name":
                     raise EntityProtobufConverterException(
-                        "Key path name mismatch. Expected str, got None"
+                        f"Key path name mismatch. Expected str, got {id_type}"
                     )
+                values.append((path_item.field_name, element_pb.name))
 
-                setattr(
-                    obj,
-                    path_item.field_name,
-                    element_pb.name,
-                )
+        return values
+
+    def to_protobuf_packed(
+        self, value_pb: Any, value: Any, property_def: PropertyDescriptor
+    ):
+        """encodes the value as usual, into a value protobuf which is then
+        serialized into one unindexed blob"""
+        packed_pb = ValueRawpb()
+        if property_def.generic_type == GenericType.LIST:
+            self.to_protobuf_list(packed_pb, value, property_def)
+        elif property_def.generic_type == GenericType.DICT:
+            self.to_protobuf_dict(packed_pb, value, property_def)
+        elif isinstance(property_def, EntityDescriptor):
+            self.to_protobuf_entity(packed_pb, value, property_def)
+        else:
+            raise EntityProtobufConverterException(
+                f"Property {property_def.field_name} cannot be packed"
+            )
+
+        value_pb.blob_value = packed_pb.SerializeToString()
+        value_pb.exclude_from_indexes = True
+
+    def from_protobuf_vector(
+        self, value_pb: Any, pb_type: str, property_def: VectorDescriptor
+    ) -> Any:
+        if pb_type == "blob_value":
+            return unpack_vector(
+                value_pb.blob_value, property_def.dtype, property_def.container
+            )
+        elif pb_type == "array_value":
+            # written as a list of doubles, before the field was a vector
+            values = [item_pb.double_value for item_pb in value_pb.array_value.values]
+            if property_def.container == list:
+                return values
+            return unpack_vector(
+                pack_vector(values, property_def.dtype),
+                property_def.dtype,
+                property_def.container,
+            )
+        else:
+            raise EntityProtobufConverterException(
+                f"Got pb_type {pb_type} for vector property {property_def.field_name}"
+            )
 
     def to_protobuf_list(
-        self, value_pb: Valuepb, value: Any, property_def: DatastoreProperty
+        self, value_pb: Any, value: Any, property_def: PropertyDescriptor
     ):
+        array_pb = value_pb.array_value
         if len(value) == 0:
-            array_value = entity_pb2.ArrayValue(values=[])._pb
-            value_pb.array_value.CopyFrom(array_value)
+            array_pb.SetInParent()
+        elif isinstance(property_def, AtomicDescriptor) and property_def.is_timestamp:
+            encode_timestamps(array_pb.values, value, property_def.exclude_from_indexes)
         else:
-            l_pb = value_pb.array_value.values
+            l_pb = array_pb.values
             for item in value:
-                i_pb = l_pb.add()  # type: ignore
-                if isinstance(property_def, AtomicProperty):
+                i_pb = l_pb.add()
+                if isinstance(property_def, AtomicDescriptor):
                     self.to_protobuf_atomic(i_pb, item, property_def)
-                elif isinstance(property_def, EntityProperty):
+                elif isinstance(property_def, EntityDescriptor):
                     self.to_protobuf_entity(i_pb, item, property_def)
 
                 if property_def.exclude_from_indexes:
                     i_pb.exclude_from_indexes = True
 
     def from_protobuf_list(
-        self, value_pb: Valuepb, pb_type: str, property_def: DatastoreProperty
+        self, value_pb: Any, pb_type: str, property_def: PropertyDescriptor
     ):
         if pb_type != "array_value":
             raise EntityProtobufConverterException(
                 f"Got pb_type {pb_type} for list property {property_def.field_name}"
             )
 
-        def get_value(item_value_pb: Valuepb):
-            pb_type = item_value_pb._pb.WhichOneof("value_type")
+        if isinstance(property_def, AtomicDescriptor) and property_def.is_timestamp:
+            return decode_timestamps(
+                value_pb.array_value.values, property_def.field_type
+            )
+
+        def get_value(item_value_pb: Any):
+            pb_type = item_value_pb.WhichOneof("value_type")
 
-            if isinstance(property_def, AtomicProperty):
+            if isinstance(property_def, AtomicDescriptor):
                 return self.from_protobuf_atomic(item_value_pb, pb_type, property_def)
-            elif isinstance(property_def, EntityProperty):
+            elif isinstance(property_def, EntityDescriptor):
                 return self.from_protobuf_entity(item_value_pb, pb_type, property_def)
 
         return [
@@ -307,40 +642,36 @@ class EntityProtobufConverter:
         ]
 
     def to_protobuf_dict(
-        self, value_pb: Valuepb, value: Any, property_def: DatastoreProperty
+        self, value_pb: Any, value: Any, property_def: PropertyDescriptor
     ):
         if len(value) == 0:
-            setattr(value_pb, "null_value", struct_pb2.NULL_VALUE)
+            value_pb.null_value = struct_pb2.NULL_VALUE
         else:
-            entity_pb = Entitypb()
+            properties_pb = value_pb.entity_value.properties
             for key, item in value.items():
-                item_value_pb = entity_pb.properties._pb.get_or_create(  # type: ignore
-                    key
-                )
-                if isinstance(property_def, AtomicProperty):
+                item_value_pb = properties_pb[key]
+                if isinstance(property_def, AtomicDescriptor):
                     self.to_protobuf_atomic(item_value_pb, item, property_def)
-                elif isinstance(property_def, EntityProperty):
+                elif isinstance(property_def, EntityDescriptor):
                     self.to_protobuf_entity(item_value_pb, item, property_def)
 
                 if property_def.exclude_from_indexes:
                     item_value_pb.exclude_from_indexes = True
 
-            value_pb.entity_value.CopyFrom(entity_pb._pb)
-
     def from_protobuf_dict(
-        self, value_pb: Valuepb, pb_type: str, property_def: DatastoreProperty
+        self, value_pb: Any, pb_type: str, property_def: PropertyDescriptor
     ):
         if pb_type != "entity_value":
             raise EntityProtobufConverterException(
                 f"Got pb_type {pb_type} for dict property {property_def.field_name}"
             )
 
-        def get_value(item_value_pb: Valuepb):
-            pb_type = item_value_pb._pb.WhichOneof("value_type")
+        def get_value(item_value_pb: Any):
+            pb_type = item_value_pb.WhichOneof("value_type")
 
-            if isinstance(property_def, AtomicProperty):
+            if isinstance(property_def, AtomicDescriptor):
                 return self.from_protobuf_atomic(item_value_pb, pb_type, property_def)
-            elif isinstance(property_def, EntityProperty):
+            elif isinstance(property_def, EntityDescriptor):
                 return self.from_protobuf_entity(item_value_pb, pb_type, property_def)
 
         return {
@@ -349,13 +680,12 @@ class EntityProtobufConverter:
         }
 
     def to_protobuf_entity(
-        self, value_pb: Valuepb, embedded_obj: Any, property_def: EntityProperty
+        self, value_pb: Any, embedded_obj: Any, property_def: EntityDescriptor
     ) -> None:
-        embedded_pb = self.to_protobuf(embedded_obj, entity_property=property_def)
-        value_pb.entity_value.CopyFrom(embedded_pb._pb)
+        self.to_protobuf_raw(value_pb.entity_value, embedded_obj)
 
     def from_protobuf_entity(
-        self, value_pb: Valuepb, pb_type: str, property_def: EntityProperty
+        self, value_pb: Any, pb_type: str, property_def: EntityDescriptor
     ) -> Any:
         if pb_type != "entity_value":
             raise EntityProtobufConverterException(
@@ -365,29 +695,48 @@ class EntityProtobufConverter:
         return embedded_obj
 
     def to_protobuf_atomic(
-        self, value_pb: Valuepb, value: Any, property_def: AtomicProperty
+        self, value_pb: Any, value: Any, property_def: AtomicDescriptor
     ) -> None:
-        pb_type = ATOMIC_TYPE_TO_DATASTORE_TYPE[property_def.field_type]
+        pb_type = property_def.pb_type
+        if property_def.compression is not None:
+            data = value.encode() if isinstance(value, str) else value
+            if len(data) >= property_def.compression_min_size:
+                value_pb.blob_value = compress(data, property_def.compression)
+                value_pb.exclude_from_indexes = True
+                return
+            elif not isinstance(value, str):
+                # small bytes values still get the header, so that they can
+                # not be mistaken for compressed ones. Small str values stay
+                # string values, which are never decompressed.
+                value_pb.blob_value = compress(data, None)
+                return
+
         if isinstance(value, GeoPoint):
-            pb_value = latlng_pb2.LatLng(
-                latitude=value.latitude, longitude=value.longitude
-            )
-            value_pb.geo_point_value.CopyFrom(pb_value)
+            geo_point_pb = value_pb.geo_point_value
+            geo_point_pb.latitude = value.latitude
+            geo_point_pb.longitude = value.longitude
         elif pb_type == "timestamp_value":
-            pb_value = self.to_protobuf_timestamp(value)
-            value_pb.timestamp_value.CopyFrom(pb_value)
+            self.to_protobuf_timestamp(value_pb.timestamp_value, value)
         else:
             pb_value = value
 
-            if property_def.field_type in [IntEnum, StrEnum]:
+            if property_def.is_enum:
                 pb_value = self.to_protobuf_enum(value, property_def)
 
             setattr(value_pb, pb_type, pb_value)
 
     def from_protobuf_atomic(
-        self, value_pb: Valuepb, pb_type: str, property_def: AtomicProperty
+        self, value_pb: Any, pb_type: str, property_def: AtomicDescriptor
     ) -> Any:
-        expected_type = ATOMIC_TYPE_TO_DATASTORE_TYPE[property_def.field_type]
+        expected_type = property_def.pb_type
+
+        if pb_type == "blob_value" and (
+            expected_type == "string_value" or property_def.compression is not None
+        ):
+            # compressed str / bytes values. str values are only stored as a
+            # blob when compressed
+            value = decompress(value_pb.blob_value)
+            return value.decode() if expected_type == "string_value" else value
 
         if pb_type != expected_type:
             raise EntityProtobufConverterException(
@@ -400,14 +749,14 @@ class EntityProtobufConverter:
                 latitude=value.latitude,
                 longitude=value.longitude,
             )
-        if property_def.field_type in [IntEnum, StrEnum]:
+        if property_def.is_enum:
             value = self.from_protobuf_enum(value, property_def)
         if pb_type == "timestamp_value":
             value = self.from_protobuf_timestamp(value, property_def)
         return value
 
     def to_protobuf_enum(
-        self, value: Any, property_def: AtomicProperty
+        self, value: Any, property_def: AtomicDescriptor
     ) -> IntEnum | StrEnum:
         if property_def.enum_class is None:
             raise EntityProtobufConverterException(
@@ -417,7 +766,7 @@ class EntityProtobufConverter:
         return property_def.enum_class(value)
 
     def from_protobuf_enum(
-        self, valuepb: Any, property_def: AtomicProperty
+        self, valuepb: Any, property_def: AtomicDescriptor
     ) -> IntEnum | StrEnum:
         if property_def.enum_class is None:
             raise EntityProtobufConverterException(
@@ -426,52 +775,16 @@ class EntityProtobufConverter:
 
         return property_def.enum_class(valuepb)
 
-    def to_protobuf_timestamp(self, value: datetime | time | timedelta) -> Any:
-        if isinstance(value, time):
-            value = datetime.combine(UTC_EPOCH, value)
-        elif isinstance(value, timedelta):
-            value = UTC_EPOCH + value
-        elif isinstance(value, date) and not isinstance(value, datetime):
-            value = datetime.combine(
-                value, time(hour=0, minute=0, second=0), timezone.utc
-            )
-
-        if not value.tzinfo:
-            value = value.replace(tzinfo=timezone.utc)
-        else:
-            value = value.astimezone(timezone.utc)
-
-        return Timestamppb(
-            seconds=int(value.timestamp()), nanos=value.microsecond * 1000
-        )
+    def to_protobuf_timestamp(
+        self, timestamp_pb: Any, value: datetime | date | time | timedelta
+    ) -> None:
+        encode_timestamp(timestamp_pb, value)
 
     def from_protobuf_timestamp(
         self,
-        valuepb: DatetimeWithNanoseconds,
-        property_def: AtomicProperty,
+        timestamp_pb: Any,
+        property_def: AtomicDescriptor,
     ) -> Any:
-        value = datetime(
-            valuepb.year,
-            valuepb.month,
-            valuepb.day,
-            valuepb.hour,
-            valuepb.minute,
-            valuepb.second,
-            microsecond=valuepb.nanosecond // 1000,
-            tzinfo=timezone.utc,
+        return decode_timestamp(
+            timestamp_pb.seconds, timestamp_pb.nanos, property_def.field_type
         )
-
-        if property_def.field_type == datetime:
-            return value
-        elif property_def.field_type == date:
-            return value.date()
-        elif property_def.field_type == time:
-            return value.timetz()
-        elif property_def.field_type == timedelta:
-            return value - UTC_EPOCH
-        elif property_def.field_type == NaiveDatetime:
-            return value.replace(tzinfo=None)
-        elif property_def.field_type == AwareDatetime:
-            return value
-        else:
-            return value
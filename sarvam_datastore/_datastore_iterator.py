@@ -1,4 +1,5 @@
 import base64
+from typing import Any, Awaitable, Callable
 from google.api_core import page_iterator_async, page_iterator
 from google.cloud.datastore.query import _pb_from_query
 
@@ -6,6 +7,8 @@ from google.cloud.datastore_v1.types import entity as entity_pb2
 from google.cloud.datastore_v1.types import query as query_pb2
 from google.cloud.datastore import helpers
 from ._converter import EntityProtobufConverter
+from ._columnar import ColumnarDecoder
+from ._hedging import HedgingPolicy
 
 
 _NOT_FINISHED = query_pb2.QueryResultBatch.MoreResultsType.NOT_FINISHED
@@ -76,6 +79,21 @@ class DatastoreIterator(page_iterator_async.AsyncIterator):
     :param raw_entity: (Optional) return the protobuf entity, rather than the
                        converted object.
 
+    :type lazy: bool
+    :param lazy: (Optional) return a :class:`LazyEntity` per entity, which
+                 decodes fields on first access, rather than the converted
+                 object.
+
+    :type on_page: callable
+    :param on_page: (Optional) awaited with the list of converted objects of
+                    each page, e.g. to prefetch their references. The page
+                    is decoded up front when given.
+
+    :type hedging: :class:`HedgingPolicy`
+    :param hedging: (Optional) hedges and retries the page fetches. The
+                    client's own retry is turned off, unless ``retry`` is
+                    given.
+
     """
 
     next_page_token = None
@@ -94,10 +112,20 @@ class DatastoreIterator(page_iterator_async.AsyncIterator):
         read_time=None,
         raw_entity=False,
         converter: EntityProtobufConverter | None = None,
+        lazy=False,
+        hedging: HedgingPolicy | None = None,
+        on_page: Callable[[list], Awaitable[Any]] | None = None,
     ):
+        if raw_entity:
+            item_to_value = _item_to_entity_raw
+        elif lazy:
+            item_to_value = _item_to_entity_lazy
+        else:
+            item_to_value = _item_to_entity
+
         super(DatastoreIterator, self).__init__(
             client=client,
-            item_to_value=_item_to_entity if not raw_entity else _item_to_entity_raw,
+            item_to_value=item_to_value,
             page_token=start_cursor,
             max_results=limit,
         )
@@ -112,6 +140,8 @@ class DatastoreIterator(page_iterator_async.AsyncIterator):
         self._more_results = True
         self._skipped_results = 0
         self._converter: EntityProtobufConverter | None = converter
+        self._hedging = hedging
+        self._on_page = on_page
 
     def _build_protobuf(self):
         """Build a query protobuf.
@@ -202,11 +232,13 @@ class DatastoreIterator(page_iterator_async.AsyncIterator):
 
         if self._retry is not None:
             kwargs["retry"] = self._retry
+        elif self._hedging is not None:
+            kwargs["retry"] = None
 
         if self._timeout is not None:
             kwargs["timeout"] = self._timeout
 
-        response_pb = await self.client.run_query(
+        response_pb = await self._run_query(
             request={
                 "project_id": self._query.project,
                 "partition_id": partition_id,
@@ -230,7 +262,7 @@ class DatastoreIterator(page_iterator_async.AsyncIterator):
             query_pb.start_cursor = response_pb.batch.skipped_cursor
             query_pb.offset -= response_pb.batch.skipped_results
 
-            response_pb = self.client.run_query(
+            response_pb = await self._run_query(
                 request={
                     "project_id": self._query.project,
                     "partition_id": partition_id,
@@ -241,13 +273,72 @@ class DatastoreIterator(page_iterator_async.AsyncIterator):
             )
 
         entity_pbs = self._process_query_results(response_pb)
+        if self.item_to_value is _item_to_entity and self._converter is not None:
+            # decode the page in one go, so that models can be built in bulk.
+            # Pages with unregistered kinds are decoded entity by entity.
+            registry = self._converter.registry
+            entities = None
+            if all(
+                registry.has_kind(entity_pb.key.path[-1].kind)
+                for entity_pb in entity_pbs
+            ):
+                entities = self._converter.from_protobuf_multi(entity_pbs)
+            elif self._on_page is not None:
+                entities = [
+                    _item_to_entity(self, entity_pb) for entity_pb in entity_pbs
+                ]
+
+            if entities is not None:
+                if self._on_page is not None:
+                    await self._on_page(entities)
+                return page_iterator.Page(self, entities, _item_to_entity_raw)
+
         return page_iterator.Page(self, entity_pbs, self.item_to_value)
 
+    async def _run_query(self, **kwargs):
+        if self._hedging is None:
+            return await self.client.run_query(**kwargs)
+        return await self._hedging.call(lambda: self.client.run_query(**kwargs))
+
+    async def column_batches(self, clazz: type | None = None):
+        """Decode each page of results into a ColumnBatch, rather than into
+        one object per entity. Needs numpy.
+
+        :type clazz: type
+        :param clazz: (Optional) the model class of the query's kind. Found
+                      from the query's kind when not given.
+
+        :rtype: async iterator of :class:`ColumnBatch`
+        :returns: one batch per page of results
+        """
+        if self._converter is None:
+            raise ValueError("column batches need a converter")
+        if self._started:
+            raise ValueError("Iterator has already started", self)
+
+        registry = self._converter.registry
+        if clazz is not None:
+            helper = registry.get_by_class(clazz)
+        else:
+            helper = registry.get_by_kind(self._query.kind)
+        decoder = ColumnarDecoder(self._converter, helper)
+
+        self.item_to_value = _item_to_entity_raw
+        async for page in self.pages:
+            yield decoder.decode(page)
+
 
 def _item_to_entity_raw(iterator, entity_pb):
     return entity_pb
 
 
+def _item_to_entity_lazy(iterator: DatastoreIterator, entity_pb):
+    if iterator._converter is None:
+        raise ValueError("lazy entities need a converter")
+
+    return iterator._converter.from_protobuf_lazy(entity_pb)
+
+
 def _item_to_entity(iterator: DatastoreIterator, entity_pb):
     """Convert a raw protobuf entity to the native object.
 
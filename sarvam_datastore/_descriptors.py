@@ -0,0 +1,88 @@
+"""Frozen, slotted counterparts of the pydantic property and key models of
+DatastoreModelHelper. The helper compiles them once, and EntityProtobufConverter
+reads only these in its per field loops, where plain slot reads are much
+cheaper than attribute reads on pydantic models."""
+from typing import Any
+
+
+class _FrozenDescriptor:
+    __slots__ = ()
+
+    def __init__(self, **values: Any):
+        for name in self._all_slots():
+            object.__setattr__(self, name, values[name])
+
+    @classmethod
+    def _all_slots(cls) -> list[str]:
+        return [
+            name
+            for klass in reversed(cls.__mro__)
+            for name in klass.__dict__.get("__slots__", ())
+        ]
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"{type(self).__name__} is frozen")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"{type(self).__name__} is frozen")
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self._all_slots()}
+
+    def __setstate__(self, state: dict[str, Any]):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    def __eq__(self, other: Any):
+        return type(self) is type(other) and self.__getstate__() == other.__getstate__()
+
+    def __hash__(self):
+        return hash((type(self), *self.__getstate__().values()))
+
+    def __repr__(self):
+        values = ", ".join(f"{k}={v!r}" for k, v in self.__getstate__().items())
+        return f"{type(self).__name__}({values})"
+
+
+class PathItemDescriptor(_FrozenDescriptor):
+    __slots__ = ("kind", "field_name", "field_type")
+
+
+class KeyDescriptor(_FrozenDescriptor):
+    __slots__ = ("path_items", "kind")
+
+
+class PropertyDescriptor(_FrozenDescriptor):
+    __slots__ = (
+        "datastore_field_name",
+        "field_name",
+        "is_optional",
+        "exclude_from_indexes",
+        "generic_type",
+        "packed",
+    )
+
+
+class AtomicDescriptor(PropertyDescriptor):
+    __slots__ = (
+        "field_type",
+        "enum_class",
+        "compression",
+        "compression_min_size",
+        # the Value oneof field the values are stored in
+        "pb_type",
+        "is_enum",
+        "is_timestamp",
+    )
+
+
+class EntityDescriptor(PropertyDescriptor):
+    __slots__ = ("entity_type", "clazz")
+
+
+class ReferenceDescriptor(PropertyDescriptor):
+    __slots__ = ("key",)
+
+
+class VectorDescriptor(PropertyDescriptor):
+    __slots__ = ("dtype", "container")
@@ -0,0 +1,149 @@
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+from uuid import UUID
+from pydantic import BaseModel
+
+
+# values which can not change in place, so they are compared as they are
+_ATOMIC_TYPES = (
+    str,
+    bytes,
+    int,
+    float,
+    type(None),
+    datetime,
+    date,
+    time,
+    timedelta,
+    Decimal,
+    UUID,
+    Enum,
+)
+_atomic_types: dict[type, bool] = {}
+
+
+def _is_atomic(value_type: type) -> bool:
+    atomic = _atomic_types.get(value_type)
+    if atomic is None:
+        atomic = _atomic_types[value_type] = issubclass(value_type, _ATOMIC_TYPES)
+    return atomic
+
+
+def fingerprint(obj: Any) -> tuple | None:
+    """the field values of obj, compared for equality to decide whether obj
+    changed, or None if obj is not a model or dataclass of atomic values (e.g.
+    str, bytes, numbers, datetimes and enums). Only the top level is looked at,
+    so this is cheap compared with encoding obj, but the fields of objects
+    holding containers or other models, which could change in place, are never
+    cached."""
+    if isinstance(obj, BaseModel):
+        values = tuple(obj.__dict__.values())
+    elif is_dataclass(obj):
+        values = tuple(getattr(obj, f.name) for f in fields(obj))
+    else:
+        return None
+
+    # 1 == 1.0 == True, but they are encoded differently
+    value_types = tuple(map(type, values))
+    if not all(map(_is_atomic, value_types)):
+        return None
+    if float in value_types:
+        # exact, so that -0.0 != 0.0 and nan == nan
+        values = tuple(v.hex() if type(v) is float else v for v in values)
+    return (type(obj), value_types, values)
+
+
+class _CacheEntry:
+    __slots__ = ("fingerprint", "entity_pb", "size")
+
+    def __init__(self, fingerprint: tuple, entity_pb: Any, size: int):
+        self.fingerprint = fingerprint
+        self.entity_pb = entity_pb
+        self.size = size
+
+
+class EncodingCache:
+    """An LRU cache of the entity protobufs built by EntityProtobufConverter,
+    bounded by the total serialized size of the cached entities.
+
+    Entries are keyed by object identity, type, project and namespace, and are
+    only used if the field values of the object are equal to its field values
+    when cached (compared by value, not by hash). Only objects whose fields
+    hold atomic values, e.g. str, bytes, numbers and datetimes, are cached.
+    Useful for objects with large text or bytes fields, which are upserted
+    repeatedly, without changes.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """create a cache
+
+        Args:
+            max_bytes (int): the maximum total serialized size of cached entities
+        """
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[tuple, _CacheEntry] = OrderedDict()
+
+    @classmethod
+    def _key(cls, obj: Any, project: str, namespace: str) -> tuple:
+        return (id(obj), type(obj), project, namespace)
+
+    def get(
+        self, obj: Any, project: str, namespace: str, obj_fingerprint: tuple | None
+    ) -> Any | None:
+        """returns the cached (raw) entity protobuf for obj, if it is unchanged"""
+        key = self._key(obj, project, namespace)
+        entry = self._entries.get(key)
+        if (
+            entry is None
+            or obj_fingerprint is None
+            or entry.fingerprint != obj_fingerprint
+        ):
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.entity_pb
+
+    def put(
+        self,
+        obj: Any,
+        project: str,
+        namespace: str,
+        obj_fingerprint: tuple | None,
+        entity_pb: Any,
+    ):
+        """cache the (raw) entity protobuf built for obj"""
+        if obj_fingerprint is None:
+            return
+
+        size = entity_pb.ByteSize()
+        if size > self.max_bytes:
+            return
+
+        key = self._key(obj, project, namespace)
+        old_entry = self._entries.pop(key, None)
+        if old_entry is not None:
+            self.size_bytes -= old_entry.size
+
+        self._entries[key] = _CacheEntry(obj_fingerprint, entity_pb, size)
+        self.size_bytes += size
+        while self.size_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size_bytes -= evicted.size
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,168 @@
+"""Estimates of the serialized size and the number of index entries of
+entities, checked against the Datastore limits before any RPC is sent."""
+from typing import Any, Iterable, Sequence
+
+# https://cloud.google.com/datastore/docs/concepts/limits
+MAX_ENTITY_BYTES = 1_048_572
+MAX_INDEX_ENTRIES = 20_000
+MAX_COMMIT_BYTES = 10 * 1024 * 1024
+MAX_COMMIT_MUTATIONS = 500
+
+# every indexed value gets an ascending and a descending built-in index entry
+BUILTIN_INDEX_ENTRIES_PER_VALUE = 2
+
+
+class EntitySizeException(Exception):
+    def __init__(self, message: str, kind: str | None, properties: list[str]):
+        super().__init__(message)
+        self.kind = kind
+        self.properties = properties
+
+
+class EntitySize:
+    """The estimated size of an entity, with a breakdown by property"""
+
+    __slots__ = ("kind", "total_bytes", "index_entries", "properties")
+
+    def __init__(
+        self,
+        kind: str | None,
+        total_bytes: int,
+        index_entries: int,
+        properties: dict[str, tuple[int, int]],
+    ):
+        """
+        Args:
+            kind (str | None): kind of the entity
+            total_bytes (int): serialized size of the entity
+            index_entries (int): estimated number of built-in index entries
+            properties (dict[str, tuple[int, int]]): bytes and index entries by
+                property name
+        """
+        self.kind = kind
+        self.total_bytes = total_bytes
+        self.index_entries = index_entries
+        self.properties = properties
+
+    def largest_properties(self, by_index_entries: bool = False) -> list[str]:
+        """property names, largest first"""
+        idx = 1 if by_index_entries else 0
+        return sorted(
+            self.properties, key=lambda name: self.properties[name][idx], reverse=True
+        )
+
+    def __repr__(self):
+        return (
+            f"EntitySize(kind={self.kind}, total_bytes={self.total_bytes},"
+            f" index_entries={self.index_entries})"
+        )
+
+
+def _count_index_entries(value_pb: Any) -> int:
+    if value_pb.exclude_from_indexes:
+        return 0
+
+    pb_type = value_pb.WhichOneof("value_type")
+    if pb_type == "array_value":
+        return sum(_count_index_entries(v) for v in value_pb.array_value.values)
+    elif pb_type == "entity_value":
+        return sum(
+            _count_index_entries(v) for v in value_pb.entity_value.properties.values()
+        )
+    return BUILTIN_INDEX_ENTRIES_PER_VALUE
+
+
+def estimate_entity_size(entity_pb: Any) -> EntitySize:
+    """estimate the size of a raw entity protobuf"""
+    kind = entity_pb.key.path[-1].kind if len(entity_pb.key.path) > 0 else None
+    properties = {}
+    index_entries = 0
+    for name, value_pb in entity_pb.properties.items():
+        value_index_entries = _count_index_entries(value_pb)
+        properties[name] = (value_pb.ByteSize(), value_index_entries)
+        index_entries += value_index_entries
+
+    return EntitySize(kind, entity_pb.ByteSize(), index_entries, properties)
+
+
+def check_entity_size(
+    size: EntitySize,
+    max_bytes: int = MAX_ENTITY_BYTES,
+    max_index_entries: int = MAX_INDEX_ENTRIES,
+):
+    """raise EntitySizeException if the entity exceeds the limits, naming the
+    largest properties"""
+    if size.total_bytes > max_bytes:
+        properties = size.largest_properties()[:3]
+        raise EntitySizeException(
+            f"Entity of kind {size.kind} is {size.total_bytes} bytes, more than"
+            f" {max_bytes}; largest properties: {', '.join(properties)}",
+            size.kind,
+            properties,
+        )
+    if size.index_entries > max_index_entries:
+        properties = size.largest_properties(by_index_entries=True)[:3]
+        raise EntitySizeException(
+            f"Entity of kind {size.kind} has {size.index_entries} index entries,"
+            f" more than {max_index_entries}; most indexed properties:"
+            f" {', '.join(properties)}",
+            size.kind,
+            properties,
+        )
+
+
+class EntitySizeStats:
+    """Histograms of entity sizes by kind, with power of two buckets"""
+
+    def __init__(self):
+        self._histograms: dict[str | None, dict[int, int]] = {}
+        self._totals: dict[str | None, tuple[int, int]] = {}
+
+    def record(self, size: EntitySize):
+        bucket = 1 << max(size.total_bytes - 1, 0).bit_length()
+        histogram = self._histograms.setdefault(size.kind, {})
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+        count, total_bytes = self._totals.get(size.kind, (0, 0))
+        self._totals[size.kind] = (count + 1, total_bytes + size.total_bytes)
+
+    def kinds(self) -> list[str | None]:
+        return list(self._histograms)
+
+    def histogram(self, kind: str | None) -> dict[int, int]:
+        """the number of entities by size bucket (upper bound in bytes)"""
+        return dict(sorted(self._histograms.get(kind, {}).items()))
+
+    def count(self, kind: str | None) -> int:
+        return self._totals.get(kind, (0, 0))[0]
+
+    def mean_bytes(self, kind: str | None) -> float:
+        count, total_bytes = self._totals.get(kind, (0, 0))
+        return total_bytes / count if count > 0 else 0.0
+
+    def clear(self):
+        self._histograms.clear()
+        self._totals.clear()
+
+
+def split_by_size(
+    items: Sequence[Any],
+    sizes: Iterable[int],
+    max_bytes: int = MAX_COMMIT_BYTES,
+    max_count: int = MAX_COMMIT_MUTATIONS,
+) -> list[list[Any]]:
+    """split items into chunks of at most max_count items, and at most
+    max_bytes in total (unless a single item is larger)"""
+    chunks: list[list[Any]] = []
+    chunk: list[Any] = []
+    chunk_bytes = 0
+    for item, size in zip(items, sizes):
+        if chunk and (len(chunk) >= max_count or chunk_bytes + size > max_bytes):
+            chunks.append(chunk)
+            chunk = []
+            chunk_bytes = 0
+        chunk.append(item)
+        chunk_bytes += size
+
+    if chunk:
+        chunks.append(chunk)
+    return chunks
@@ -0,0 +1,235 @@
+"""Hedged and retried reads. A read which has not returned within the hedge
+delay (fixed, or a percentile of the recent latencies) is sent again, and the
+first response wins. Hedges and retries are paid from a RetryBudget, so that
+they add at most a fraction of the read traffic when the backend is slow."""
+import asyncio
+from collections import deque
+import random
+import time
+from typing import Any, Awaitable, Callable, TypeVar
+from google.api_core import exceptions as core_exceptions
+
+# errors after which an idempotent read can be sent again
+TRANSIENT_ERRORS = (
+    core_exceptions.ServiceUnavailable,
+    core_exceptions.DeadlineExceeded,
+    core_exceptions.InternalServerError,
+)
+
+T = TypeVar("T")
+
+
+class HedgingException(Exception):
+    pass
+
+
+class RetryBudget:
+    """Allows retries (and hedges) up to a ratio of the requests, plus a
+    minimum number per second"""
+
+    def __init__(
+        self,
+        ratio: float = 0.1,
+        min_per_second: float = 1.0,
+        max_balance: float = 100.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """create a budget
+
+        Args:
+            ratio (float): retries allowed per request
+            min_per_second (float): retries allowed per second, whatever the
+                number of requests
+            max_balance (float): maximum retries saved up
+            clock (Callable[[], float]): monotonic clock, in seconds
+        """
+        if ratio < 0 or min_per_second < 0:
+            raise HedgingException("Retry budget ratio and rate must be >= 0")
+
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_balance = max_balance
+        self._clock = clock
+        self._balance = max_balance
+        self._updated_at = clock()
+
+    def _refill(self, amount: float = 0.0):
+        now = self._clock()
+        amount += (now - self._updated_at) * self.min_per_second
+        self._balance = min(self.max_balance, self._balance + amount)
+        self._updated_at = now
+
+    @property
+    def balance(self) -> float:
+        """the number of retries currently allowed"""
+        self._refill()
+        return self._balance
+
+    def record_request(self):
+        """deposit the share of a request"""
+        self._refill(self.ratio)
+
+    def try_withdraw(self) -> bool:
+        """take one retry from the budget, if there is one"""
+        self._refill()
+        if self._balance < 1:
+            return False
+        self._balance -= 1
+        return True
+
+
+class HedgingPolicy:
+    """Hedges and retries idempotent reads (lookups and query pages)"""
+
+    def __init__(
+        self,
+        delay: float | None = None,
+        percentile: float = 95.0,
+        initial_delay: float = 0.05,
+        min_delay: float = 0.001,
+        max_delay: float = 1.0,
+        min_samples: int = 20,
+        window: int = 1000,
+        max_hedges: int = 1,
+        max_retries: int = 2,
+        initial_backoff: float = 0.05,
+        max_backoff: float = 1.0,
+        retry_budget: RetryBudget | None = None,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ):
+        """create a policy
+
+        Args:
+            delay (float | None): (Optional) fixed hedge delay in seconds, by
+                default the percentile of the recent latencies
+            percentile (float): percentile of the recent latencies after
+                which a read is hedged
+            initial_delay (float): hedge delay until min_samples latencies
+                have been recorded
+            min_delay (float): minimum learned hedge delay
+            max_delay (float): maximum learned hedge delay
+            min_samples (int): latencies needed before the delay is learned
+            window (int): number of recent latencies kept
+            max_hedges (int): extra copies sent of a slow read
+            max_retries (int): retries of a read after transient errors
+            initial_backoff (float): seconds before the first retry, doubled
+                for every further retry
+            max_backoff (float): maximum seconds between retries
+            retry_budget (RetryBudget | None): (Optional) the budget paying for
+                hedges and retries, by default 10% of the reads
+            sleep (Callable[[float], Awaitable[Any]]): async sleep
+        """
+        if not 0 < percentile < 100:
+            raise HedgingException(f"Percentile must be in (0, 100), got {percentile}")
+
+        self.delay = delay
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.max_hedges = max_hedges
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.retry_budget = retry_budget or RetryBudget()
+        self._sleep = sleep
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._sorted: list[float] | None = None
+        # counters, for monitoring
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.retries = 0
+        self.budget_exhausted = 0
+
+    def record_latency(self, seconds: float):
+        self._latencies.append(seconds)
+        self._sorted = None
+
+    def hedge_delay(self) -> float:
+        """the seconds after which a read is hedged"""
+        if self.delay is not None:
+            return self.delay
+        if len(self._latencies) < self.min_samples:
+            return self.initial_delay
+
+        if self._sorted is None:
+            self._sorted = sorted(self._latencies)
+        idx = min(len(self._sorted) - 1, int(len(self._sorted) * self.percentile / 100))
+        return min(self.max_delay, max(self.min_delay, self._sorted[idx]))
+
+    async def _timed(self, read: Callable[[], Awaitable[T]]) -> tuple[T, float]:
+        start = time.perf_counter()
+        result = await read()
+        return result, time.perf_counter() - start
+
+    async def _hedged(self, read: Callable[[], Awaitable[T]]) -> T:
+        """run read, and copies of it if it is slow. The first successful
+        response wins; the error of the last copy is raised if all fail."""
+        tasks = [asyncio.ensure_future(self._timed(read))]
+        pending = set(tasks)
+        can_hedge = self.max_hedges > 0
+        error: BaseException | None = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=self.hedge_delay() if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        result, seconds = task.result()
+                        self.record_latency(seconds)
+                        if task is not tasks[0]:
+                            self.hedge_wins += 1
+                        return result
+                    if not isinstance(error, TRANSIENT_ERRORS):
+                        raise error
+
+                if len(done) == 0:
+                    # slow, hedge if the budget allows, else keep waiting
+                    if self.retry_budget.try_withdraw():
+                        self.hedges += 1
+                        task = asyncio.ensure_future(self._timed(read))
+                        tasks.append(task)
+                        pending.add(task)
+                        can_hedge = len(tasks) <= self.max_hedges
+                    else:
+                        self.budget_exhausted += 1
+                        can_hedge = False
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        assert error is not None
+        raise error
+
+    async def call(self, read: Callable[[], Awaitable[T]]) -> T:
+        """run an idempotent read, with hedging and retries
+
+        Args:
+            read (Callable[[], Awaitable[T]]): sends the read, e.g. a lookup
+
+        Returns:
+            T: the first response
+        """
+        self.retry_budget.record_request()
+        attempt = 0
+        while True:
+            try:
+                return await self._hedged(read)
+            except TRANSIENT_ERRORS:
+                if attempt >= self.max_retries:
+                    raise
+                if not self.retry_budget.try_withdraw():
+                    self.budget_exhausted += 1
+                    raise
+
+            self.retries += 1
+            seconds = min(self.max_backoff, self.initial_backoff * 2**attempt)
+            await self._sleep(seconds * random.uniform(0.5, 1.0))
+            attempt += 1
@@ -0,0 +1,291 @@
+"""Derives the composite indexes (index.yaml) needed by the queries run on the
+registered models, and the properties which are never queried, so that they
+can be added to DatastoreConfig.exclude_from_indexes."""
+from typing import Any, Iterable, Sequence
+from ._converter import EntityProtobufConverter, raw_pb
+from ._entity_size import estimate_entity_size
+from ._model_registry import DatastoreModelHelperRegistry
+from ._warm_up import build_sample
+
+# query filter operators which need the property to be the range of the index
+INEQUALITY_OPERATORS = {"<", "<=", ">", ">=", "!=", "NOT_IN", "not_in"}
+
+
+class IndexAdvisorException(Exception):
+    pass
+
+
+class QueryUsage:
+    """The properties a query filters and sorts on"""
+
+    __slots__ = ("kind", "equality", "inequality", "orders", "ancestor")
+
+    def __init__(
+        self,
+        kind: str,
+        equality: Sequence[str] = (),
+        inequality: Sequence[str] = (),
+        orders: Sequence[str] = (),
+        ancestor: bool = False,
+    ):
+        """
+        Args:
+            kind (str): kind of the query
+            equality (Sequence[str]): properties with equality (or IN) filters
+            inequality (Sequence[str]): properties with inequality filters
+            orders (Sequence[str]): sort orders, with a "-" prefix if descending
+            ancestor (bool): the query has an ancestor filter
+        """
+        self.kind = kind
+        self.equality = tuple(sorted(set(equality)))
+        self.inequality = tuple(dict.fromkeys(inequality))
+        self.orders = tuple(orders)
+        self.ancestor = ancestor
+
+    def properties(self) -> set[str]:
+        """the top level names of the properties used by the query"""
+        names = [
+            *self.equality,
+            *self.inequality,
+            *[o.lstrip("-") for o in self.orders],
+        ]
+        return {name.split(".")[0] for name in names}
+
+    def composite_index(self) -> tuple[bool, tuple[tuple[str, str], ...]] | None:
+        """the composite index (ancestor, ((property, direction), ...)) needed
+        by the query, or None if the built-in indexes serve it"""
+        # sorting on a property with an equality filter, or on a property
+        # sorted on before, does not change the order
+        orders: dict[str, str] = {}
+        for order in self.orders:
+            name = order.lstrip("-")
+            if name not in self.equality and name not in orders:
+                orders[name] = "desc" if order.startswith("-") else "asc"
+
+        if len(self.inequality) == 0 and len(orders) == 0:
+            # equality filters only, served by merging built-in indexes
+            return None
+
+        if (
+            not self.ancestor
+            and len(self.equality) == 0
+            and len({*self.inequality, *orders}) == 1
+        ):
+            # one property filtered by range and / or sorted
+            return None
+
+        properties: dict[str, str] = {name: "asc" for name in self.equality}
+        for name in self.inequality:
+            if name not in orders:
+                properties.setdefault(name, "asc")
+        for name, direction in orders.items():
+            properties.setdefault(name, direction)
+        if not self.ancestor and len(properties) == 1:
+            # served by the built-in index of the property
+            return None
+        return self.ancestor, tuple(properties.items())
+
+
+class KindIndexReport:
+    """The index advice for one kind"""
+
+    def __init__(
+        self,
+        kind: str,
+        composite_indexes: list[tuple[bool, tuple[tuple[str, str], ...]]],
+        queried_fields: list[str],
+        unused_fields: list[str],
+        index_entries_before: int,
+        index_entries_after: int,
+    ):
+        """
+        Args:
+            kind (str): the kind
+            composite_indexes (list): (ancestor, ((property, direction), ...))
+            queried_fields (list[str]): indexed fields used by queries
+            unused_fields (list[str]): indexed fields never used by queries,
+                which can be added to exclude_from_indexes
+            index_entries_before (int): index entries per entity, currently
+            index_entries_after (int): index entries per entity, with the
+                unused fields excluded
+        """
+        self.kind = kind
+        self.composite_indexes = composite_indexes
+        self.queried_fields = queried_fields
+        self.unused_fields = unused_fields
+        self.index_entries_before = index_entries_before
+        self.index_entries_after = index_entries_after
+
+    def __repr__(self):
+        return (
+            f"KindIndexReport(kind={self.kind},"
+            f" composite_indexes={len(self.composite_indexes)},"
+            f" unused_fields={self.unused_fields},"
+            f" index_entries={self.index_entries_before}"
+            f" -> {self.index_entries_after})"
+        )
+
+
+class IndexReport:
+    def __init__(self, kinds: list[KindIndexReport]):
+        self.kinds = kinds
+
+    def index_yaml(self) -> str:
+        """the composite indexes, in the format of index.yaml"""
+        lines = ["indexes:"]
+        for kind_report in self.kinds:
+            for ancestor, properties in kind_report.composite_indexes:
+                lines.append(f"- kind: {kind_report.kind}")
+                if ancestor:
+                    lines.append("  ancestor: yes")
+                lines.append("  properties:")
+                for name, direction in properties:
+                    lines.append(f"  - name: {name}")
+                    if direction == "desc":
+                        lines.append("    direction: desc")
+        if len(lines) == 1:
+            lines[0] = "indexes: []"
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """a human readable summary of the exclusion suggestions"""
+        lines = []
+        for kind_report in self.kinds:
+            lines.append(
+                f"{kind_report.kind}: {kind_report.index_entries_before} ->"
+                f" {kind_report.index_entries_after} index entries per entity"
+            )
+            if kind_report.unused_fields:
+                lines.append(
+                    "  exclude_from_indexes: " + ", ".join(kind_report.unused_fields)
+                )
+        return "\n".join(lines)
+
+
+class IndexAdvisor:
+    """Collects the queries run on the models of a registry, and reports the
+    composite indexes they need, and the properties which are never queried.
+
+    Index entry estimates are taken from the recorded sample entities of a
+    kind, or else from a synthesized sample (with one item per list)."""
+
+    def __init__(
+        self,
+        registry: DatastoreModelHelperRegistry,
+        converter: EntityProtobufConverter | None = None,
+    ):
+        self.registry = registry
+        self.converter = converter or EntityProtobufConverter(registry)
+        self._usages: dict[str, list[QueryUsage]] = {}
+        self._samples: dict[str, list[Any]] = {}
+
+    def record(self, usage: QueryUsage):
+        """record the use of a query"""
+        self._usages.setdefault(usage.kind, []).append(usage)
+
+    def record_query(self, query: Any):
+        """record a google.cloud.datastore.Query"""
+        equality: list[str] = []
+        inequality: list[str] = []
+        for property_name, operator in self._flatten_filters(query.filters):
+            if operator in INEQUALITY_OPERATORS:
+                inequality.append(property_name)
+            else:
+                equality.append(property_name)
+
+        if not query.kind:
+            raise IndexAdvisorException("Kindless queries cannot be advised")
+        self.record(
+            QueryUsage(
+                query.kind,
+                equality,
+                inequality,
+                list(query.order),
+                query.ancestor is not None,
+            )
+        )
+
+    @classmethod
+    def _flatten_filters(cls, filters: Iterable[Any]) -> list[tuple[str, str]]:
+        flat = []
+        for query_filter in filters:
+            if isinstance(query_filter, tuple):
+                flat.append((query_filter[0], query_filter[1]))
+            elif hasattr(query_filter, "property_name"):
+                flat.append((query_filter.property_name, query_filter.operator))
+            elif hasattr(query_filter, "filters"):
+                # composite And / Or filters
+                flat.extend(cls._flatten_filters(query_filter.filters))
+        return flat
+
+    def record_entity(self, entity_pb: Any):
+        """record a sample entity, for the index entry estimates of its kind"""
+        entity_pb = raw_pb(entity_pb)
+        kind = entity_pb.key.path[-1].kind
+        self._samples.setdefault(kind, []).append(entity_pb)
+
+    def _index_entries(self, clazz: type) -> dict[str, float]:
+        """the mean index entries per entity, by datastore property name"""
+        helper = self.registry.get_by_class(clazz)
+        samples = self._samples.get(helper.kind or "")
+        if not samples:
+            samples = [
+                raw_pb(self.converter.to_protobuf(build_sample(self.registry, clazz)))
+            ]
+
+        totals: dict[str, float] = {}
+        for entity_pb in samples:
+            for name, (_, entries) in estimate_entity_size(
+                entity_pb
+            ).properties.items():
+                totals[name] = totals.get(name, 0) + entries
+        return {name: total / len(samples) for name, total in totals.items()}
+
+    def report(self, models: Sequence[type] | None = None) -> IndexReport:
+        """the index advice for models, by default all models with a kind"""
+        if models is None:
+            models = [clazz for clazz, _ in self.registry.describe()]
+
+        kind_reports = []
+        for clazz in models:
+            helper = self.registry.get_by_class(clazz)
+            if helper.kind is None:
+                continue
+
+            usages = self._usages.get(helper.kind, [])
+            composite_indexes = list(
+                dict.fromkeys(
+                    index
+                    for index in (usage.composite_index() for usage in usages)
+                    if index is not None
+                )
+            )
+            used = set().union(*[usage.properties() for usage in usages])
+
+            entries = self._index_entries(clazz)
+            queried_fields = []
+            unused_fields = []
+            unused_entries = 0.0
+            for name, descriptor in helper.descriptors.items():
+                if entries.get(name, 0) == 0:
+                    continue  # not indexed
+                if name in used:
+                    queried_fields.append(descriptor.field_name)
+                else:
+                    unused_fields.append(descriptor.field_name)
+                    unused_entries += entries[name]
+
+            # every composite index has an entry per entity (more for lists)
+            before = sum(entries.values()) + len(composite_indexes)
+            kind_reports.append(
+                KindIndexReport(
+                    helper.kind,
+                    composite_indexes,
+                    queried_fields,
+                    unused_fields,
+                    round(before),
+                    round(before - unused_entries),
+                )
+            )
+
+        return IndexReport(kind_reports)
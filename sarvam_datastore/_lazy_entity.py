@@ -0,0 +1,112 @@
+from typing import TYPE_CHECKING, Any
+from pydantic import BaseModel
+from ._model_helper import DatastoreModelHelper
+from ._descriptors import ReferenceDescriptor
+
+if TYPE_CHECKING:
+    from ._converter import EntityProtobufConverter
+
+
+class LazyEntity:
+    """A read-only proxy for a model, which holds on to the entity protobuf and
+    decodes each field on first attribute access. Decoded values are cached.
+
+    Useful for wide entities where only a few fields are read. Use `to_model`
+    to get the full model instance, which decodes all remaining fields.
+    """
+
+    __slots__ = ("_converter", "_helper", "_entity_pb", "_values", "_key_decoded")
+
+    def __init__(
+        self,
+        converter: "EntityProtobufConverter",
+        helper: DatastoreModelHelper,
+        entity_pb: Any,
+    ):
+        """create a lazy entity
+
+        Args:
+            converter (EntityProtobufConverter): converter used to decode fields
+            helper (DatastoreModelHelper): model helper of the entity's model
+            entity_pb (Any): the raw entity protobuf
+        """
+        object.__setattr__(self, "_converter", converter)
+        object.__setattr__(self, "_helper", helper)
+        object.__setattr__(self, "_entity_pb", entity_pb)
+        object.__setattr__(self, "_values", {})
+        object.__setattr__(self, "_key_decoded", False)
+
+    @property
+    def model_class(self) -> type[BaseModel]:
+        return self._helper.cls
+
+    def __getattr__(self, name: str) -> Any:
+        values = self._values
+        if name in values:
+            return values[name]
+
+        value = self._decode_field(name)
+        values[name] = value
+        return value
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"LazyEntity is read-only, cannot set {name}")
+
+    def _decode_key(self):
+        helper = self._helper
+        key_descriptor = helper.key_descriptor
+        if key_descriptor is not None and not self._key_decoded:
+            self._values.update(
+                self._converter.from_protobuf_key_values(
+                    key_descriptor, self._entity_pb.key
+                )
+            )
+            object.__setattr__(self, "_key_decoded", True)
+
+    def _decode_field(self, name: str) -> Any:
+        helper = self._helper
+        model_field = helper.cls.model_fields.get(name)
+        if model_field is None:
+            raise AttributeError(f"{helper.cls.__name__} has no field {name}") from None
+
+        if helper.key is not None and name in helper.key_field_names:
+            self._decode_key()
+            if name in self._values:
+                return self._values[name]
+        else:
+            property = helper.field_descriptors.get(name)
+            if property is not None:
+                properties_pb = self._entity_pb.properties
+                datastore_name = property.datastore_field_name
+                if not isinstance(property, ReferenceDescriptor):
+                    return self._converter.from_protobuf_property(
+                        properties_pb, datastore_name, property
+                    )
+                if datastore_name in properties_pb:
+                    key_values = self._converter.from_protobuf_key_values(
+                        property.key, properties_pb[datastore_name].key_value
+                    )
+                    self._values.update(key_values)
+                    if name in self._values:
+                        return self._values[name]
+
+        # fields which are not stored, or missing from an incomplete key
+        if model_field.is_required():
+            raise AttributeError(f"{helper.cls.__name__}.{name} is not set")
+        return model_field.get_default(call_default_factory=True)
+
+    def to_model(self) -> Any:
+        """decode all fields, and return an instance of the model, tracked like
+        the models decoded by the converter"""
+        helper = self._helper
+        self._decode_key()
+        for name in helper.field_properties:
+            getattr(self, name)
+
+        return self._converter._loaded(
+            helper, helper.cls.model_construct(**self._values)
+        )
+
+    def __repr__(self):
+        decoded = ", ".join(f"{k}={v!r}" for k, v in self._values.items())
+        return f"LazyEntity[{self._helper.cls.__name__}]({decoded})"
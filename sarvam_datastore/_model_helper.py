@@ -1,10 +1,23 @@
+import array
 from typing import Dict, Tuple, get_args, get_origin, _GenericAlias  # type: ignore
 from types import GenericAlias, UnionType
+from collections.abc import Iterable
 from dataclasses import is_dataclass
-from pydantic import BaseModel, AwareDatetime, NaiveDatetime
+from functools import cached_property
+from pydantic import BaseModel, AwareDatetime, NaiveDatetime, TypeAdapter
 from enum import Enum, StrEnum, IntEnum
 from datetime import datetime, date, time, timedelta
 from ._geo_point import GeoPoint
+from ._compression import CompressionCodec, is_codec_available
+from ._descriptors import (
+    PathItemDescriptor,
+    KeyDescriptor,
+    PropertyDescriptor,
+    AtomicDescriptor,
+    EntityDescriptor,
+    ReferenceDescriptor,
+    VectorDescriptor,
+)
 
 ATOMIC_TYPES = (
     bool
@@ -79,11 +92,14 @@ class DatastoreProperty(BaseModel):
     is_optional: bool = False
     exclude_from_indexes: bool = False
     generic_type: GenericType = GenericType.NONE
+    packed: bool = False
 
 
 class AtomicProperty(DatastoreProperty):
     field_type: type  # TODO: ATOMIC_TYPES
     enum_class: type | None = None
+    compression: CompressionCodec | None = None
+    compression_min_size: int = 0
 
 
 class EntityProperty(DatastoreProperty):
@@ -95,12 +111,60 @@ class ReferenceProperty(DatastoreProperty):
     key: DatastoreModelKey
 
 
+class DecodeEngine(StrEnum):
+    """How EntityProtobufConverter builds model instances when decoding"""
+
+    SETATTR = "setattr"
+    """model_construct(), then setattr of each field"""
+    CONSTRUCT = "construct"
+    """one model_construct(**values) call per entity, with a dict of values"""
+    VALIDATE = "validate"
+    """model_validate of the dict of values, in bulk for a page of entities"""
+
+
+class VectorDtype(StrEnum):
+    FLOAT32 = "float32"
+    FLOAT64 = "float64"
+
+
+class DatastoreVector:
+    """Marks a field as a packed vector, e.g.
+    `embedding: Annotated[list[float], DatastoreVector(VectorDtype.FLOAT32)]`.
+
+    Vectors are stored as a little-endian blob, which is never indexed.
+    """
+
+    def __init__(self, dtype: VectorDtype = VectorDtype.FLOAT32):
+        self.dtype = VectorDtype(dtype)
+
+    def __repr__(self):
+        return f"DatastoreVector({self.dtype.value})"
+
+
+class VectorProperty(DatastoreProperty):
+    dtype: VectorDtype = VectorDtype.FLOAT32
+    container: type = list  # list, array.array or numpy.ndarray
+    exclude_from_indexes: bool = True
+
+
 class DatastoreConfig(BaseModel):
     key: list[tuple[str, str]] = []
     key_references: list[list[tuple[str, str]]] = []
     exclude_from_indexes: list[str] = []
     renamed_fields: dict[str, str] = {}
     ignore_fields: list[str] = []
+    decode_engine: DecodeEngine = DecodeEngine.SETATTR
+    vector_fields: dict[str, VectorDtype] = {}
+    compressed_fields: list[str] = []
+    compression_codec: CompressionCodec = CompressionCodec.ZLIB
+    compression_min_size: int = 1024
+    packed_fields: list[str] = []
+    # reference field name -> model field the referenced object is set on, when
+    # prefetched. The model fields are not stored.
+    reference_fields: dict[str, str] = {}
+    # find the fields of decoded models changed since, for
+    # DatastoreRepository.update_fields
+    track_changes: bool = False
 
 
 class DatastoreModelException(Exception):
@@ -112,7 +176,10 @@ class DatastoreModelHelper:
         self.kind: str | None = None
         self.cls: type[BaseModel] = cls
         self.properties: Dict[str, DatastoreProperty] = {}
+        # properties by model field name, including all fields of a reference
+        self.field_properties: Dict[str, DatastoreProperty] = {}
         self.key: DatastoreModelKey | None = None
+        self.key_field_names: set[str] = set()
 
         if config is not None:
             self.config = config
@@ -125,11 +192,114 @@ class DatastoreModelHelper:
                 *self.config.ignore_fields,
                 *[f for _, f in self.config.key],
                 *[f for ref_list in self.config.key_references for _, f in ref_list],
+                *self.config.reference_fields.values(),
             ]
         )
 
         self._process_class_fields()
 
+    @classmethod
+    def compile_key(cls, key: DatastoreModelKey) -> KeyDescriptor:
+        """the frozen, slotted form of a key definition"""
+        return KeyDescriptor(
+            path_items=tuple(
+                PathItemDescriptor(
+                    kind=path_item.kind,
+                    field_name=path_item.field_name,
+                    field_type=path_item.field_type,
+                )
+                for path_item in key.path_items
+            ),
+            kind=key.kind(),
+        )
+
+    @classmethod
+    def compile_property(cls, property: DatastoreProperty) -> PropertyDescriptor:
+        """the frozen, slotted form of a property"""
+        common = dict(
+            datastore_field_name=property.datastore_field_name,
+            field_name=property.field_name,
+            is_optional=property.is_optional,
+            exclude_from_indexes=property.exclude_from_indexes,
+            generic_type=property.generic_type,
+            packed=property.packed,
+        )
+        if isinstance(property, VectorProperty):
+            return VectorDescriptor(
+                **common, dtype=property.dtype, container=property.container
+            )
+        elif isinstance(property, AtomicProperty):
+            pb_type = ATOMIC_TYPE_TO_DATASTORE_TYPE[property.field_type]
+            return AtomicDescriptor(
+                **common,
+                field_type=property.field_type,
+                enum_class=property.enum_class,
+                compression=property.compression,
+                compression_min_size=property.compression_min_size,
+                pb_type=pb_type,
+                is_enum=property.field_type in (IntEnum, StrEnum),
+                is_timestamp=pb_type == "timestamp_value",
+            )
+        elif isinstance(property, EntityProperty):
+            return EntityDescriptor(
+                **common, entity_type=property.entity_type, clazz=property.clazz
+            )
+        elif isinstance(property, ReferenceProperty):
+            return ReferenceDescriptor(**common, key=cls.compile_key(property.key))
+        raise DatastoreModelException(
+            f"Unknown property type {type(property)} for field {property.field_name}"
+        )
+
+    def property_names(self, field_names: Iterable[str]) -> list[str]:
+        """the datastore property names of model fields, e.g. for a property
+        mask. Key fields are skipped, they are decoded from the entity key.
+
+        Args:
+            field_names (Iterable[str]): model field names
+
+        Returns:
+            list[str]: the distinct datastore property names
+        """
+        names: dict[str, None] = {}
+        for field_name in field_names:
+            if field_name in self.key_field_names:
+                continue
+            property = self.field_properties.get(field_name)
+            if property is None:
+                raise DatastoreModelException(
+                    f"{self.cls.__name__} has no stored field {field_name}"
+                )
+            names[property.datastore_field_name] = None
+        return list(names)
+
+    @cached_property
+    def descriptors(self) -> Dict[str, PropertyDescriptor]:
+        """the compiled properties, by datastore field name. Compiled on first
+        use, so the properties must not be changed after that."""
+        return {
+            name: self.compile_property(property)
+            for name, property in self.properties.items()
+        }
+
+    @cached_property
+    def field_descriptors(self) -> Dict[str, PropertyDescriptor]:
+        """the compiled properties by model field name, like field_properties"""
+        descriptors = self.descriptors
+        return {
+            field_name: descriptors[property.datastore_field_name]
+            for field_name, property in self.field_properties.items()
+        }
+
+    @cached_property
+    def key_descriptor(self) -> KeyDescriptor | None:
+        """the compiled key, if the model has one"""
+        return self.compile_key(self.key) if self.key is not None else None
+
+    @cached_property
+    def list_adapter(self) -> TypeAdapter:
+        """validates a list of dicts into a list of model instances, in one call"""
+        return TypeAdapter(list[self.cls])  # type: ignore
+
     @classmethod
     def _parse_optional(cls, field_name, annotation: type) -> Tuple[type, bool]:
         is_optional = False
@@ -153,12 +323,16 @@ class DatastoreModelHelper:
 
         return actual_annotation, is_optional
 
-    def _process_class_config(self):
-        if hasattr(self.cls, "DatastoreConfig"):
-            self.config = DatastoreConfig(**self.cls.DatastoreConfig.__dict__)
+    @classmethod
+    def class_config(cls, model_cls: type) -> DatastoreConfig:
+        """the config declared by the DatastoreConfig inner class of model_cls"""
+        if hasattr(model_cls, "DatastoreConfig"):
+            return DatastoreConfig(**model_cls.DatastoreConfig.__dict__)
         else:
-            self.config = DatastoreConfig()
+            return DatastoreConfig()
 
+    def _process_class_config(self):
+        self.config = self.class_config(self.cls)
         return self.config
 
     def _process_key_fields(self, key_config: list[tuple[str, str]]):
@@ -185,6 +359,7 @@ class DatastoreModelHelper:
         if len(self.config.key) > 0:
             self.key = self._process_key_fields(self.config.key)
             self.kind = self.key.kind()
+            self.key_field_names = {f for _, f in self.config.key}
 
     def _add_property(self, property: DatastoreProperty):
         if property.field_name in self.config.renamed_fields:
@@ -195,7 +370,44 @@ class DatastoreModelHelper:
         if property.field_name in self.config.exclude_from_indexes:
             property.exclude_from_indexes = True
 
+        if property.field_name in self.config.compressed_fields:
+            self._set_compression(property)
+
+        if property.field_name in self.config.packed_fields:
+            if property.generic_type == GenericType.NONE and not isinstance(
+                property, EntityProperty
+            ):
+                raise DatastoreModelException(
+                    f"Packed field {property.field_name} must be a list, a dict"
+                    " or an embedded entity"
+                )
+            property.packed = True
+
         self.properties[property.datastore_field_name] = property
+        if isinstance(property, ReferenceProperty):
+            for path_item in property.key.path_items:
+                self.field_properties[path_item.field_name] = property
+        else:
+            self.field_properties[property.field_name] = property
+
+    def _set_compression(self, property: DatastoreProperty):
+        if not isinstance(property, AtomicProperty) or property.field_type not in [
+            str,
+            bytes,
+        ]:
+            raise DatastoreModelException(
+                f"Compressed field {property.field_name} must be of type str or bytes"
+            )
+
+        codec = self.config.compression_codec
+        if not is_codec_available(codec):
+            raise DatastoreModelException(
+                f"Compressed field {property.field_name}: codec {codec} is not"
+                " available - install zstandard"
+            )
+
+        property.compression = codec
+        property.compression_min_size = self.config.compression_min_size
 
     def _add_references(self):
         # Handle optional references
@@ -208,6 +420,17 @@ class DatastoreModelHelper:
                 )
             )
 
+        for field_name, target in self.config.reference_fields.items():
+            if not isinstance(self.properties.get(field_name), ReferenceProperty):
+                raise DatastoreModelException(
+                    f"Reference field {field_name} is not the last field of a"
+                    " key reference"
+                )
+            if target not in self.cls.model_fields:
+                raise DatastoreModelException(
+                    f"Reference target {target} of {field_name} is not a field"
+                )
+
     def _add_entity_property(
         self,
         field_name: str,
@@ -244,6 +467,30 @@ class DatastoreModelHelper:
         )
         self._add_property(property)
 
+    def _add_vector_property(
+        self, field_name: str, annotation: type, dtype: VectorDtype
+    ):
+        container, is_optional = self._parse_optional(field_name, annotation)
+        if get_origin(container) == list and get_args(container) == (float,):
+            container = list
+        if (
+            container not in [list, array.array]
+            and getattr(container, "__module__", None) != "numpy"
+        ):
+            raise DatastoreModelException(
+                f"Vector field {field_name} is of type {annotation}."
+                " It can only be a list[float], array.array or numpy.ndarray"
+            )
+
+        property = VectorProperty(
+            datastore_field_name=field_name,
+            field_name=field_name,
+            is_optional=is_optional,
+            dtype=dtype,
+            container=container,
+        )
+        self._add_property(property)
+
     def add_datastore_property(self, field_name: str, annotation: type):
         item_annotation, is_optional = self._parse_optional(field_name, annotation)
 
@@ -318,7 +565,15 @@ class DatastoreModelHelper:
         for field_name, field in self.cls.model_fields.items():
             if field_name in self.key_or_ignore_fields:
                 continue
-            self.add_datastore_property(field_name, field.annotation)
+
+            vector_dtype = self.config.vector_fields.get(field_name)
+            for metadata in field.metadata:
+                if isinstance(metadata, DatastoreVector):
+                    vector_dtype = metadata.dtype
+            if vector_dtype is not None:
+                self._add_vector_property(field_name, field.annotation, vector_dtype)
+            else:
+                self.add_datastore_property(field_name, field.annotation)
 
 
 # TODO
@@ -1,5 +1,10 @@
 from datetime import datetime, timezone
+import importlib
+import pkgutil
+from types import ModuleType
+from pydantic import BaseModel
 from ._model_helper import (
+    DatastoreConfig,
     DatastoreModelHelper,
 )
 import logging
@@ -14,22 +19,145 @@ class DatastoreModelHelperRegistryException(Exception):
 
 
 class DatastoreModelHelperRegistry:
-    def __init__(self) -> None:
+    def __init__(self, auto_register: bool = False) -> None:
+        """create a registry
+
+        Args:
+            auto_register (bool): build helpers on demand for pydantic models
+                which were not registered, e.g. embedded entity models
+        """
+        self.auto_register = auto_register
         self._model_helpers: dict[str, DatastoreModelHelper] = {}
         self._model_helpers_embedded: dict[type, DatastoreModelHelper] = {}
+        # classes registered lazily, whose helpers are not built yet
+        self._pending: dict[type, DatastoreConfig] = {}
+        self._pending_kinds: dict[str, type] = {}
+
+    def _check_kind(self, kind: str | None, clazz: type):
+        if kind is None:
+            return
+        if kind in self._model_helpers or (
+            kind in self._pending_kinds and self._pending_kinds[kind] is not clazz
+        ):
+            raise DatastoreModelHelperRegistryException(
+                f"Model helper with kind {kind} already registered"
+            )
 
     def register(self, model_helper: DatastoreModelHelper):
-        self._model_helpers_embedded[model_helper.cls] = model_helper
+        self._check_kind(model_helper.kind, model_helper.cls)
+        self._pending.pop(model_helper.cls, None)
+        if model_helper.kind is not None:
+            self._pending_kinds.pop(model_helper.kind, None)
 
+        self._model_helpers_embedded[model_helper.cls] = model_helper
         if model_helper.kind is not None:
-            if model_helper.kind in self._model_helpers:
-                raise DatastoreModelHelperRegistryException(
-                    f"Model helper with kind {model_helper.kind} already registered"
-                )
             self._model_helpers[model_helper.kind] = model_helper
 
+    def register_class(self, clazz: type, config: DatastoreConfig | None = None):
+        """register a model class, whose helper is only built on first use
+
+        Args:
+            clazz (type): the model class
+            config (DatastoreConfig | None): (Optional) the config, by default
+                the DatastoreConfig inner class of the model
+        """
+        if clazz in self._model_helpers_embedded or clazz in self._pending:
+            return
+
+        if config is None:
+            config = DatastoreModelHelper.class_config(clazz)
+        kind = config.key[-1][0] if len(config.key) > 0 else None
+        self._check_kind(kind, clazz)
+
+        self._pending[clazz] = config
+        if kind is not None:
+            self._pending_kinds[kind] = clazz
+
+    def scan(self, package: ModuleType | str, recursive: bool = True) -> list[type]:
+        """import the modules of a package, and lazily register the pydantic
+        models defined in them which have a DatastoreConfig inner class
+
+        Args:
+            package (ModuleType | str): the package, or its name
+            recursive (bool): also scan sub packages
+
+        Returns:
+            list[type]: the registered model classes
+        """
+        if isinstance(package, str):
+            package = importlib.import_module(package)
+
+        modules = [package]
+        if hasattr(package, "__path__"):
+            walk = pkgutil.walk_packages if recursive else pkgutil.iter_modules
+            modules.extend(
+                importlib.import_module(module_info.name)
+                for module_info in walk(package.__path__, package.__name__ + ".")
+            )
+
+        classes = []
+        for module in modules:
+            for value in list(vars(module).values()):
+                if (
+                    isinstance(value, type)
+                    and issubclass(value, BaseModel)
+                    and value.__module__ == module.__name__
+                    and hasattr(value, "DatastoreConfig")
+                ):
+                    self.register_class(value)
+                    classes.append(value)
+        return classes
+
+    def _build(self, clazz: type) -> DatastoreModelHelper:
+        model_helper = DatastoreModelHelper(clazz, self._pending[clazz])
+        self.register(model_helper)
+        return model_helper
+
+    def has_kind(self, kind: str) -> bool:
+        """whether a model is registered (built or pending) for the kind"""
+        return kind in self._model_helpers or kind in self._pending_kinds
+
     def get_by_kind(self, kind: str):
-        return self._model_helpers[kind]
+        model_helper = self._model_helpers.get(kind)
+        if model_helper is None:
+            return self._build(self._pending_kinds[kind])
+        return model_helper
 
     def get_by_class(self, clazz: type):
-        return self._model_helpers_embedded[clazz]
+        model_helper = self._model_helpers_embedded.get(clazz)
+        if model_helper is not None:
+            return model_helper
+
+        if clazz not in self._pending:
+            if not (
+                self.auto_register
+                and isinstance(clazz, type)
+                and issubclass(clazz, BaseModel)
+            ):
+                raise KeyError(clazz)
+            self.register_class(clazz)
+        return self._build(clazz)
+
+    def describe(self) -> list[tuple[type, DatastoreConfig]]:
+        """a picklable description of the registered model helpers, from which
+        the registry can be rebuilt, e.g. in another process.
+
+        The model classes are pickled by reference, so they must be importable.
+        """
+        return [
+            *[
+                (helper.cls, helper.config)
+                for helper in self._model_helpers_embedded.values()
+            ],
+            *self._pending.items(),
+        ]
+
+    @classmethod
+    def from_description(
+        cls, description: list[tuple[type, DatastoreConfig]]
+    ) -> "DatastoreModelHelperRegistry":
+        """build a registry from the output of describe()"""
+        registry = cls()
+        for clazz, config in description:
+            registry.register_class(clazz, config)
+        return registry
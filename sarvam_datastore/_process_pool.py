@@ -0,0 +1,169 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Sequence
+from google.cloud.datastore_v1.types import Entity as Entitypb
+from ._converter import EntityProtobufConverter, EntityRawpb, raw_pb
+from ._model_helper import DatastoreConfig
+from ._model_registry import DatastoreModelHelperRegistry
+
+# the converter of a worker process, built by _init_worker
+_worker_converter: EntityProtobufConverter | None = None
+
+
+def _init_worker(description: list[tuple[type, DatastoreConfig]]):
+    global _worker_converter
+    registry = DatastoreModelHelperRegistry.from_description(description)
+    _worker_converter = EntityProtobufConverter(registry)
+
+
+def _get_worker_converter() -> EntityProtobufConverter:
+    if _worker_converter is None:
+        raise RuntimeError("worker process was not initialized with a registry")
+    return _worker_converter
+
+
+def _decode_chunk(entities_bytes: list[bytes], clazz: type | None) -> list[Any]:
+    converter = _get_worker_converter()
+    return [
+        converter.from_protobuf(EntityRawpb.FromString(entity_bytes), clazz)
+        for entity_bytes in entities_bytes
+    ]
+
+
+def _encode_chunk(objs: list[Any], project: str, namespace: str) -> list[bytes]:
+    converter = _get_worker_converter()
+    entities_bytes = []
+    for obj in objs:
+        entity_pb = EntityRawpb()
+        converter.to_protobuf_raw(entity_pb, obj, project, namespace)
+        entities_bytes.append(entity_pb.SerializeToString())
+    return entities_bytes
+
+
+def _reencode_chunk(
+    entities_bytes: list[bytes], clazz: type | None, project: str, namespace: str
+) -> list[bytes]:
+    return _encode_chunk(_decode_chunk(entities_bytes, clazz), project, namespace)
+
+
+class ProcessPoolConverter:
+    """Runs EntityProtobufConverter conversions in a pool of worker processes,
+    so that bulk conversions scale with the number of cores, and don't block
+    the event loop.
+
+    Entities are shipped to the workers as serialized bytes, in chunks. Each
+    worker rebuilds the registry from DatastoreModelHelperRegistry.describe(),
+    so all model classes must be importable (i.e. not created dynamically).
+    """
+
+    def __init__(
+        self,
+        registry: DatastoreModelHelperRegistry,
+        max_workers: int | None = None,
+        chunk_size: int = 500,
+    ):
+        """create the process pool
+
+        Args:
+            registry (DatastoreModelHelperRegistry): registry to rebuild in workers
+            max_workers (int | None): number of worker processes, defaults to
+                the number of cpus
+            chunk_size (int): number of entities sent to a worker at a time
+        """
+        self._chunk_size = chunk_size
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(registry.describe(),),
+        )
+
+    def _chunks(self, items: Sequence[Any]):
+        for i in range(0, len(items), self._chunk_size):
+            yield items[i : i + self._chunk_size]
+
+    async def _map_chunks(self, fn, items: Sequence[Any], *args) -> list[Any]:
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *[
+                loop.run_in_executor(self._executor, fn, chunk, *args)
+                for chunk in self._chunks(items)
+            ]
+        )
+        return [item for chunk_result in results for item in chunk_result]
+
+    @classmethod
+    def _serialize(cls, entity_pbs: Sequence[Any]) -> list[bytes]:
+        return [
+            entity_pb
+            if isinstance(entity_pb, bytes)
+            else raw_pb(entity_pb).SerializeToString()
+            for entity_pb in entity_pbs
+        ]
+
+    @classmethod
+    def _deserialize(cls, entities_bytes: list[bytes]) -> list[Entitypb]:
+        return [
+            Entitypb.wrap(EntityRawpb.FromString(entity_bytes))
+            for entity_bytes in entities_bytes
+        ]
+
+    async def from_protobuf_multi(
+        self, entity_pbs: Sequence[Any], clazz: type | None = None
+    ) -> list[Any]:
+        """convert entity protobufs (or their serialized bytes) to objects
+
+        Args:
+            entity_pbs (Sequence[Any]): entity protobufs, or serialized entities
+            clazz (type | None): model class, found from the kind when None
+
+        Returns:
+            list[Any]: the objects, in the same order
+        """
+        return await self._map_chunks(_decode_chunk, self._serialize(entity_pbs), clazz)
+
+    async def to_protobuf_multi(
+        self,
+        objs: Sequence[Any],
+        project: str = "",
+        namespace: str = "",
+        serialized: bool = False,
+    ) -> list[Entitypb] | list[bytes]:
+        """convert objects to entity protobufs
+
+        Args:
+            objs (Sequence[Any]): objects to convert
+            project (str): datastore project for the keys
+            namespace (str): datastore namespace for the keys
+            serialized (bool): return serialized entities rather than protobufs
+
+        Returns:
+            list[Entitypb] | list[bytes]: the entities, in the same order
+        """
+        entities_bytes = await self._map_chunks(_encode_chunk, objs, project, namespace)
+        return entities_bytes if serialized else self._deserialize(entities_bytes)
+
+    async def reencode_multi(
+        self,
+        entity_pbs: Sequence[Any],
+        clazz: type | None = None,
+        project: str = "",
+        namespace: str = "",
+        serialized: bool = False,
+    ) -> list[Entitypb] | list[bytes]:
+        """decode entity protobufs to objects, and encode them again, in the
+        workers, e.g. to move entities to another project or namespace, or to
+        rewrite them after a model change"""
+        entities_bytes = await self._map_chunks(
+            _reencode_chunk, self._serialize(entity_pbs), clazz, project, namespace
+        )
+        return entities_bytes if serialized else self._deserialize(entities_bytes)
+
+    def close(self, wait: bool = True):
+        """shut down the worker processes"""
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -1,15 +1,31 @@
+import asyncio
 import logging
-from typing import Any, List, Sequence
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Iterable, List, Sequence
 from google.cloud import datastore
 from google.cloud.datastore_v1 import DatastoreAsyncClient
 from google.cloud.datastore_v1.types import Mutation
-from google.cloud.datastore.helpers import key_from_protobuf
+from google.cloud.datastore.helpers import get_read_options, key_from_protobuf
+from google.cloud.datastore.query import _pb_from_query
+from google.cloud.datastore_v1.types import query as query_pb2
+from google.cloud.datastore_v1.types import PropertyMask
 from google.cloud.datastore_v1.types import entity as entity_pb2
 from ._converter import EntityProtobufConverter
+from ._columnar import ColumnBatch
+from ._warm_up import round_trip
+from ._client_pool import DatastoreClientPool
+from ._write_throttle import WriteThrottle
+from ._hedging import HedgingPolicy
+from ._entity_size import MAX_COMMIT_BYTES, MAX_COMMIT_MUTATIONS, split_by_size
 
 from ._datastore_iterator import DatastoreIterator
 
 
+class DatastoreRepositoryException(Exception):
+    pass
+
+
 class DatastoreMutationResult:
     """Represents the result of a Mutation (insert, delete, update, upsert)"""
 
@@ -27,6 +43,29 @@ class DatastoreMutationResult:
         return f"Key - {self.key or 'None'}, version - {self.version}"
 
 
+class PartialCommitException(DatastoreRepositoryException):
+    """A split upsert_multi failed after some of its commits succeeded"""
+
+    def __init__(
+        self,
+        message: str,
+        results: List[DatastoreMutationResult],
+        committed_keys: List[datastore.Key],
+    ):
+        """a new exception
+
+        Args:
+            message (str): the message
+            results (List[DatastoreMutationResult]): the results of the
+                mutations which were committed
+            committed_keys (List[datastore.Key]): the keys of the entities
+                which were committed, in the order of the objects
+        """
+        super().__init__(message)
+        self.results = results
+        self.committed_keys = committed_keys
+
+
 class DatastoreBatch:
     """A batch of mutations"""
 
@@ -45,6 +84,7 @@ class DatastoreBatch:
         self._converter = converter
         self._mutations: List[Mutation] = []
         self._mutation_results: List[DatastoreMutationResult] = []
+        self._size_bytes = 0
         self._project = project
         self._namespace = namespace
 
@@ -56,20 +96,30 @@ class DatastoreBatch:
         """
         return len(self._mutations) > 0
 
-    def has_capacity(self, citems: int):
+    def has_capacity(self, citems: int, cbytes: int = 0):
         """does the batch have capacity to take the given number of items.
 
         Args:
             citems (int): the number of items to add
+            cbytes (int): (Optional) the serialized size of the items to add
 
         Returns:
             _type_: bool
         """
-        return len(self._mutations) + citems < 500
+        return (
+            len(self._mutations) + citems < MAX_COMMIT_MUTATIONS
+            and self._size_bytes + cbytes <= MAX_COMMIT_BYTES
+        )
+
+    @property
+    def size_bytes(self) -> int:
+        """the serialized size of the mutations"""
+        return self._size_bytes
 
     def clear(self):
         """clear all mutations"""
         self._mutations = []
+        self._size_bytes = 0
 
     def add_item(self, object: Any):
         """add one item to the list of mutations
@@ -81,6 +131,7 @@ class DatastoreBatch:
             upsert=self._converter.to_protobuf(object, self._project, self._namespace)
         )
         self._mutations.append(mut)
+        self._size_bytes += Mutation.pb(mut).ByteSize()
 
     def add_items(self, objects: Sequence[Any] | None):
         """Add multiple objects to the batch
@@ -117,14 +168,136 @@ class DatastoreBatch:
         return self._mutation_results
 
 
+# kind of the key looked up by warm_up, which is not expected to exist
+WARM_UP_KIND = "SarvamDatastoreWarmUp"
+
+# the maximum number of keys in one lookup
+MAX_LOOKUP_KEYS = 1000
+
+# alias of the count aggregation of DatastoreRepository.count
+COUNT_ALIAS = "count"
+# the reserved property name of the entity key
+KEY_PROPERTY = "__key__"
+
+
+def _property_path(name: str) -> str:
+    """a property mask path of a property name, quoted with backticks unless
+    it is a simple identifier"""
+    if name.isidentifier() and name.isascii():
+        return name
+    return "`" + name.replace("\\", "\\\\").replace("`", "\\`") + "`"
+
+
+def _key_id(key_pb: Any) -> tuple:
+    """the namespace and path of a key protobuf, to match looked up keys"""
+    return (
+        key_pb.partition_id.namespace_id,
+        tuple((item.kind, item.id, item.name) for item in key_pb.path),
+    )
+
+
 class DatastoreRepository:
     def __init__(
-        self, converter: EntityProtobufConverter, project: str, namespace: str
+        self,
+        converter: EntityProtobufConverter,
+        project: str,
+        namespace: str,
+        client_pool: DatastoreClientPool | None = None,
+        write_throttle: WriteThrottle | None = None,
+        hedging_policy: HedgingPolicy | None = None,
+        eventual: bool = False,
+        read_time: datetime | None = None,
     ):
+        """create a repository
+
+        Args:
+            converter (EntityProtobufConverter): converts models to entities
+            project (str): datastore project
+            namespace (str): default datastore namespace
+            client_pool (DatastoreClientPool | None): (Optional) the clients
+                to use, by default the DatastoreClientPool of the running
+                event loop
+            write_throttle (WriteThrottle | None): (Optional) rate limits the
+                writes per kind, and retries them on overload errors
+            hedging_policy (HedgingPolicy | None): (Optional) hedges and
+                retries the lookups and query page fetches
+            eventual (bool): (Optional) default consistency of the reads,
+                eventual rather than strong
+            read_time (datetime | None): (Optional) default time of the
+                reads, e.g. to read a snapshot for an export. Not allowed
+                together with eventual.
+        """
+        if eventual and read_time is not None:
+            raise ValueError("At most one of eventual or read_time is allowed.")
         self._converter = converter
         self._project = project
         self._namespace_default = namespace
-        self.client = DatastoreAsyncClient()
+        self._client_pool = client_pool
+        self.write_throttle = write_throttle
+        self.hedging_policy = hedging_policy
+        self.eventual = eventual
+        self.read_time = read_time
+
+    @property
+    def client_pool(self) -> DatastoreClientPool:
+        """the client pool given, or the default pool of the running loop"""
+        if self._client_pool is not None:
+            return self._client_pool
+        return DatastoreClientPool.default()
+
+    @property
+    def client(self) -> DatastoreAsyncClient:
+        """a client from the pool, picked on every access"""
+        return self.client_pool.client()
+
+    async def warm_up(
+        self, models: Sequence[type] | None = None, namespace=None
+    ) -> dict[str, float]:
+        """take the one time costs of the first requests, e.g. from a readiness
+        probe: open the grpc channels of the client pool, fetch credentials
+        with a lookup of a missing key, and encode and decode a synthesized
+        sample of each model
+
+        Args:
+            models (Sequence[type] | None): (Optional) the model classes, by
+                default all classes in the registry
+            namespace (str): (Optional) namespace for the lookup and samples
+
+        Returns:
+            dict[str, float]: the seconds taken by each step, by step name
+        """
+        timings: dict[str, float] = {}
+
+        start = time.perf_counter()
+        clients = self.client_pool.all_clients()
+        for client in clients:
+            channel = getattr(client.transport, "grpc_channel", None)
+            if channel is not None and hasattr(channel, "channel_ready"):
+                await channel.channel_ready()
+        timings["channel"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        key = self.get_key(WARM_UP_KIND, "warm-up", namespace=namespace)
+        for client in clients:
+            await client.lookup(keys=[key.to_protobuf()], project_id=self._project)
+        timings["lookup"] = time.perf_counter() - start
+
+        if models is None:
+            models = [clazz for clazz, _ in self._converter.registry.describe()]
+        for clazz in models:
+            start = time.perf_counter()
+            round_trip(
+                self._converter, clazz, self._project, self._namespace(namespace)
+            )
+            timings[f"model:{clazz.__name__}"] = time.perf_counter() - start
+
+        logging.info(
+            "warm up: "
+            + ", ".join(
+                f"{step} {seconds * 1000:.1f}ms" for step, seconds in timings.items()
+            )
+        )
+        return timings
 
     def get_key(self, *args, namespace=None) -> datastore.Key:
         return datastore.Key(
@@ -182,8 +355,26 @@ class DatastoreRepository:
         return multi_response[0]
 
     async def upsert_multi(
-        self, objects: Sequence[Any], exists_ok=True, namespace=None
+        self, objects: Sequence[Any], exists_ok=True, namespace=None, split=False
     ) -> List[DatastoreMutationResult]:
+        """upsert objects in one commit
+
+        Args:
+            objects (Sequence[Any]): the objects
+            exists_ok (bool): (Optional) unused
+            namespace (str): (Optional) namespace of the entities
+            split (bool): (Optional) commit objects exceeding the mutations or
+                the request size allowed in one commit in several commits.
+                The upsert is then not atomic: if a commit fails, the earlier
+                ones stay committed, and PartialCommitException lists them.
+
+        Raises:
+            DatastoreRepositoryException: if the objects exceed one commit,
+                and split is not set
+
+        Returns:
+            List[DatastoreMutationResult]: the results, in the order of objects
+        """
         mutations = [
             Mutation(
                 upsert=self._converter.to_protobuf(
@@ -193,20 +384,131 @@ class DatastoreRepository:
             for object in objects
         ]
 
-        return await self._mutate_multi(mutations, exists_ok)
+        return await self._mutate_multi_split(mutations, exists_ok, split)
+
+    async def update_fields(
+        self, object: Any, fields: Sequence[str] | None = None, namespace=None
+    ) -> DatastoreMutationResult | None:
+        """update only some fields of a stored entity: only these properties
+        are encoded and sent, with a mutation property mask, and the other
+        properties are left as stored
+
+        Args:
+            object (Any): the object, with its key fields set
+            fields (Sequence[str] | None): (Optional) the model fields to
+                update, by default the fields changed since the object was
+                decoded, for models with DatastoreConfig.track_changes
+            namespace (str): (Optional) namespace of the entity
+
+        Returns:
+            DatastoreMutationResult | None: the result, or None if there was
+                nothing to update
+        """
+        helper = self._converter.registry.get_by_class(type(object))
+        change_tracker = self._converter.change_tracker
+        if fields is None:
+            if not (helper.config.track_changes and change_tracker.is_tracked(object)):
+                raise DatastoreRepositoryException(
+                    f"Changes of this {helper.cls.__name__} are not tracked, "
+                    "pass fields"
+                )
+            fields = change_tracker.changed_fields(object)
+
+        property_names = helper.property_names(fields)
+        if len(property_names) == 0:
+            return None
+
+        mut = Mutation(
+            update=self._converter.to_protobuf_partial(
+                object, fields, self._project, self._namespace(namespace)
+            ),
+            property_mask=PropertyMask(
+                paths=[_property_path(name) for name in property_names]
+            ),
+        )
+        multi_response = await self._mutate_multi([mut])
+        # other changes are still pending
+        change_tracker.mark_saved(object, fields)
+        return multi_response[0]
 
     async def delete_multi(self, keys: List[datastore.Key], namespace=None):
         mutations = [Mutation(delete=key.to_protobuf()) for key in keys]
         return await self._mutate_multi(mutations, True)
 
-    async def _mutate_multi(self, mutations: List[Mutation], exists_ok=True):
-        txn = await self.client.begin_transaction(project_id=self._project)
-        cr = await self.client.commit(
+    async def _mutate_multi_split(
+        self, mutations: List[Mutation], exists_ok=True, split=False
+    ):
+        """commit the mutations, split into several (not atomic) commits if
+        they exceed the number of mutations or the request size allowed in
+        one commit and split is set"""
+        sizes = [Mutation.pb(mut).ByteSize() for mut in mutations]
+        chunks = split_by_size(mutations, sizes)
+        if len(chunks) <= 1:
+            return await self._mutate_multi(mutations, exists_ok)
+        if not split:
+            raise DatastoreRepositoryException(
+                f"{len(mutations)} mutations of {sum(sizes)} bytes exceed one "
+                f"commit ({MAX_COMMIT_MUTATIONS} mutations, {MAX_COMMIT_BYTES} "
+                "bytes), pass split=True to commit them in several commits"
+            )
+
+        response: List[DatastoreMutationResult] = []
+        committed_keys: List[datastore.Key] = []
+        for idx, chunk in enumerate(chunks):
+            try:
+                results = await self._mutate_multi(chunk, exists_ok)
+            except Exception as e:
+                if idx == 0:
+                    raise
+                raise PartialCommitException(
+                    f"Commit {idx + 1} of {len(chunks)} failed, "
+                    f"{len(response)} of {len(mutations)} mutations committed",
+                    response,
+                    committed_keys,
+                ) from e
+
+            response.extend(results)
+            committed_keys.extend(
+                result.key or key_from_protobuf(self._mutation_key_pb(mutation))
+                for mutation, result in zip(chunk, results)
+            )
+        return response
+
+    @classmethod
+    def _mutation_key_pb(cls, mutation: Mutation) -> Any:
+        mutation_pb = Mutation.pb(mutation)
+        operation = mutation_pb.WhichOneof("operation")
+        if operation == "delete":
+            return mutation_pb.delete
+        return getattr(mutation_pb, operation).key
+
+    @classmethod
+    def _mutation_kind_counts(cls, mutations: List[Mutation]) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for mutation in mutations:
+            key_pb = cls._mutation_key_pb(mutation)
+            kind = key_pb.path[-1].kind if len(key_pb.path) > 0 else ""
+            counts[kind] = counts.get(kind, 0) + 1
+        return counts
+
+    async def _commit(self, mutations: List[Mutation]):
+        client = self.client
+        txn = await client.begin_transaction(project_id=self._project)
+        return await client.commit(
             transaction=txn.transaction,
             mutations=mutations,
             project_id=self._project,
         )
 
+    async def _mutate_multi(self, mutations: List[Mutation], exists_ok=True):
+        if self.write_throttle is None:
+            cr = await self._commit(mutations)
+        else:
+            cr = await self.write_throttle.run(
+                self._mutation_kind_counts(mutations),
+                lambda: self._commit(mutations),
+            )
+
         def key_or_none(key_pb):
             if len(key_pb.path) == 0:
                 return None
@@ -220,24 +522,351 @@ class DatastoreRepository:
 
         return response
 
-    async def get(self, key: datastore.Key) -> Any | None:
-        lr = await self.client.lookup(
-            keys=[key.to_protobuf()], project_id=self._project
+    def _consistency(
+        self, eventual: bool | None, read_time: datetime | None
+    ) -> tuple[bool, datetime | None]:
+        """the consistency of a read: the repository defaults, unless the call
+        sets eventual or read_time"""
+        if eventual is None and read_time is None:
+            return self.eventual, self.read_time
+        return bool(eventual), read_time
+
+    def _read_options(self, eventual: bool | None, read_time: datetime | None):
+        eventual, read_time = self._consistency(eventual, read_time)
+        return get_read_options(eventual, None, read_time)
+
+    async def _read(self, method: str, **kwargs):
+        """call the read RPC method of a client, hedged if there is a policy"""
+        if self.hedging_policy is None:
+            return await getattr(self.client, method)(**kwargs)
+
+        # the policy retries, within its budget, instead of the client; each
+        # copy of the read picks a client (channel) from the pool
+        return await self.hedging_policy.call(
+            lambda: getattr(self.client, method)(retry=None, **kwargs)
         )
 
+    async def _lookup(
+        self, keys_pb: List[Any], read_options: Any, property_mask: Any = None
+    ):
+        request = {
+            "project_id": self._project,
+            "keys": keys_pb,
+            "read_options": read_options,
+        }
+        if property_mask is not None:
+            request["property_mask"] = property_mask
+        return await self._read("lookup", request=request)
+
+    def _property_mask(self, kinds: Iterable[str], fields: Sequence[str]):
+        """the lookup property mask of the model fields, for the models of
+        kinds. Only the keys are looked up if the fields are all key fields:
+        an empty mask would return every property."""
+        names: dict[str, None] = {}
+        registry = self._converter.registry
+        for kind in kinds:
+            names.update(
+                dict.fromkeys(registry.get_by_kind(kind).property_names(fields))
+            )
+        if len(names) == 0:
+            return PropertyMask(paths=[KEY_PROPERTY])
+        return PropertyMask(paths=[_property_path(name) for name in names])
+
+    async def get(
+        self,
+        key: datastore.Key,
+        eventual: bool | None = None,
+        read_time: datetime | None = None,
+        fields: Sequence[str] | None = None,
+    ) -> Any | None:
+        """look up one key
+
+        Args:
+            key (datastore.Key): the key
+            eventual (bool | None): (Optional) eventually consistent read
+            read_time (datetime | None): (Optional) read as of this time
+            fields (Sequence[str] | None): (Optional) model fields to look up
+                and decode, into a partial model. The key fields are always
+                decoded.
+
+        Returns:
+            Any | None: the object, or None if the key was not found
+        """
+        read_options = self._read_options(eventual, read_time)
+        property_mask = None
+        if fields is not None:
+            property_mask = self._property_mask([key.kind], fields)
+        lr = await self._lookup([key.to_protobuf()], read_options, property_mask)
+
         if len(lr.found) == 1:
             entity_pb = lr.found[0].entity
+            if fields is not None:
+                return self._converter.from_protobuf_partial(entity_pb, fields)
             return self._converter.from_protobuf(entity_pb)
 
         return None
 
+    async def get_multi(
+        self,
+        keys: Sequence[datastore.Key],
+        eventual: bool | None = None,
+        read_time: datetime | None = None,
+        prefetch: Sequence[str] = (),
+        fields: Sequence[str] | None = None,
+    ) -> List[Any | None]:
+        """look up several keys, with one lookup per MAX_LOOKUP_KEYS keys
+
+        Args:
+            keys (Sequence[datastore.Key]): the keys
+            eventual (bool | None): (Optional) eventually consistent read
+            read_time (datetime | None): (Optional) read as of this time
+            prefetch (Sequence[str]): (Optional) reference fields whose
+                referenced objects are looked up, in one batch, and set on
+                the DatastoreConfig.reference_fields targets
+            fields (Sequence[str] | None): (Optional) model fields to look up
+                and decode, into partial models. The key fields, and the
+                prefetch fields, are always decoded.
+
+        Returns:
+            List[Any | None]: the objects, in the order of keys, or None for
+                the keys which were not found
+        """
+        read_options = self._read_options(eventual, read_time)
+        if fields is not None:
+            fields = [*fields, *prefetch]
+        objects = await self._get_multi_pb(
+            [key.to_protobuf() for key in keys], read_options, fields
+        )
+        if len(prefetch) > 0:
+            await self._prefetch(
+                objects, prefetch, [key.namespace for key in keys], read_options
+            )
+        return objects
+
+    async def _get_multi_pb(
+        self,
+        keys_pb: List[Any],
+        read_options: Any,
+        fields: Sequence[str] | None = None,
+    ):
+        property_mask = None
+        if fields is not None:
+            kinds = dict.fromkeys(key_pb.path[-1].kind for key_pb in keys_pb)
+            property_mask = self._property_mask(kinds, fields)
+        found: dict[tuple, Any] = {}
+
+        async def lookup_chunk(chunk: List[Any]):
+            while len(chunk) > 0:
+                lr = await self._lookup(chunk, read_options, property_mask)
+                for result in lr.found:
+                    found[_key_id(result.entity.key)] = result.entity
+                # keys deferred by datastore are looked up again
+                chunk = list(lr.deferred)
+
+        await asyncio.gather(
+            *[
+                lookup_chunk(keys_pb[idx : idx + MAX_LOOKUP_KEYS])
+                for idx in range(0, len(keys_pb), MAX_LOOKUP_KEYS)
+            ]
+        )
+
+        entity_pbs = [found.get(_key_id(key_pb)) for key_pb in keys_pb]
+        found_pbs = [entity_pb for entity_pb in entity_pbs if entity_pb is not None]
+        if fields is not None:
+            objects = iter(
+                [
+                    self._converter.from_protobuf_partial(entity_pb, fields)
+                    for entity_pb in found_pbs
+                ]
+            )
+        else:
+            objects = iter(self._converter.from_protobuf_multi(found_pbs))
+        return [
+            None if entity_pb is None else next(objects) for entity_pb in entity_pbs
+        ]
+
+    async def _prefetch(
+        self,
+        objects: Sequence[Any],
+        prefetch: Sequence[str],
+        namespaces: Sequence[str | None],
+        read_options: Any,
+    ):
+        """look up the objects referenced by the prefetch fields of objects,
+        deduplicated and in one batch, and set them on the reference targets"""
+        targets: list[tuple[Any, str, tuple | None]] = []
+        keys_pb: dict[tuple, Any] = {}
+        registry = self._converter.registry
+        for obj, namespace in zip(objects, namespaces):
+            if obj is None:
+                continue
+            helper = registry.get_by_class(type(obj))
+            for field_name in prefetch:
+                target = helper.config.reference_fields.get(field_name)
+                if target is None:
+                    raise DatastoreRepositoryException(
+                        f"{helper.cls.__name__}.{field_name} has no"
+                        " DatastoreConfig.reference_fields target to prefetch"
+                    )
+                property = helper.field_descriptors[field_name]
+                if getattr(obj, field_name, None) is None:
+                    # unset optional reference
+                    targets.append((obj, target, None))
+                    continue
+
+                key_pb = self._converter.to_protobuf_key(
+                    obj, property.key, self._project, self._namespace(namespace)
+                )
+                key_id = _key_id(key_pb)
+                keys_pb.setdefault(key_id, key_pb)
+                targets.append((obj, target, key_id))
+
+        key_ids = list(keys_pb)
+        referenced = dict(
+            zip(key_ids, await self._get_multi_pb(list(keys_pb.values()), read_options))
+        )
+        for obj, target, key_id in targets:
+            setattr(obj, target, None if key_id is None else referenced[key_id])
+
     def run_query(
-        self, query: datastore.Query, limit: int | None = None
+        self,
+        query: datastore.Query,
+        limit: int | None = None,
+        lazy=False,
+        eventual: bool | None = None,
+        read_time: datetime | None = None,
+        prefetch: Sequence[str] = (),
+        models: bool = False,
     ) -> DatastoreIterator:
-        return DatastoreIterator(query, self.client, limit=limit)
+        """run a query
+
+        Args:
+            query (datastore.Query): the query
+            limit (int | None): (Optional) maximum number of results
+            lazy (bool): (Optional) return LazyEntity results
+            eventual (bool | None): (Optional) eventually consistent read
+            read_time (datetime | None): (Optional) read as of this time
+            prefetch (Sequence[str]): (Optional) reference fields whose
+                referenced objects are looked up, in one batch per page, and
+                set on the DatastoreConfig.reference_fields targets. Implies
+                models.
+            models (bool): (Optional) return model instances, decoded by the
+                converter of the repository, rather than datastore.Entity
+
+        Returns:
+            DatastoreIterator: the results
+        """
+        if lazy and len(prefetch) > 0:
+            raise DatastoreRepositoryException("Lazy results cannot be prefetched")
+
+        eventual, read_time = self._consistency(eventual, read_time)
+        on_page = None
+        if len(prefetch) > 0:
+            read_options = get_read_options(eventual, None, read_time)
+
+            async def prefetch_page(objects: list):
+                await self._prefetch(
+                    objects, prefetch, [query.namespace] * len(objects), read_options
+                )
 
-    def run_query_raw(self, query: datastore.Query) -> DatastoreIterator:
-        return DatastoreIterator(query, self.client, raw_entity=True)
+            on_page = prefetch_page
+
+        return DatastoreIterator(
+            query,
+            self.client,
+            limit=limit,
+            eventual=eventual,
+            read_time=read_time,
+            converter=(
+                self._converter if models or lazy or on_page is not None else None
+            ),
+            lazy=lazy,
+            hedging=self.hedging_policy,
+            on_page=on_page,
+        )
+
+    def run_query_columns(
+        self,
+        query: datastore.Query,
+        clazz: type | None = None,
+        limit: int | None = None,
+        eventual: bool | None = None,
+        read_time: datetime | None = None,
+    ) -> AsyncIterator[ColumnBatch]:
+        """run a query, decoding each page of results into a ColumnBatch"""
+        eventual, read_time = self._consistency(eventual, read_time)
+        iterator = DatastoreIterator(
+            query,
+            self.client,
+            limit=limit,
+            eventual=eventual,
+            read_time=read_time,
+            converter=self._converter,
+            hedging=self.hedging_policy,
+        )
+        return iterator.column_batches(clazz)
+
+    def run_query_raw(
+        self,
+        query: datastore.Query,
+        eventual: bool | None = None,
+        read_time: datetime | None = None,
+    ) -> DatastoreIterator:
+        eventual, read_time = self._consistency(eventual, read_time)
+        return DatastoreIterator(
+            query,
+            self.client,
+            eventual=eventual,
+            read_time=read_time,
+            raw_entity=True,
+            hedging=self.hedging_policy,
+        )
+
+    async def count(
+        self,
+        query: datastore.Query,
+        limit: int | None = None,
+        eventual: bool | None = None,
+        read_time: datetime | None = None,
+    ) -> int:
+        """count the results of a query, with a count aggregation
+
+        Args:
+            query (datastore.Query): the query
+            limit (int | None): (Optional) stop counting at limit results
+            eventual (bool | None): (Optional) eventually consistent read
+            read_time (datetime | None): (Optional) read as of this time
+
+        Returns:
+            int: the number of results
+        """
+        count_pb = query_pb2.AggregationQuery.Aggregation.Count()
+        if limit is not None:
+            count_pb.up_to = limit
+        aggregation_query = query_pb2.AggregationQuery(
+            nested_query=_pb_from_query(query),
+            aggregations=[
+                query_pb2.AggregationQuery.Aggregation(
+                    alias=COUNT_ALIAS, count=count_pb
+                )
+            ],
+        )
+
+        response = await self._read(
+            "run_aggregation_query",
+            request={
+                "project_id": query.project,
+                "partition_id": entity_pb2.PartitionId(
+                    project_id=query.project, namespace_id=query.namespace
+                ),
+                "read_options": self._read_options(eventual, read_time),
+                "aggregation_query": aggregation_query,
+            },
+        )
+        results = response.batch.aggregation_results
+        if len(results) == 0:
+            return 0
+        return results[0].aggregate_properties[COUNT_ALIAS].integer_value
 
     async def delete_multi_raw(self, keys_pb: List[entity_pb2.Key], namespace=None):
         mutations = [Mutation(delete=key_pb) for key_pb in keys_pb]
@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Annotated
-from zoneinfo import ZoneInfo, available_timezones
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError, available_timezones
 import logging
 
 from pydantic_settings import BaseSettings
@@ -11,52 +12,77 @@ logger = logging.getLogger(__name__)
 
 # TODO: solve issue on windows, where "Asia/Kolkata seems not to be available"
 DEFAULT_TIME_ZONE = "Asia/Kolkata"
+ALT_DEFAULT_TIME_ZONE = "Asia/Calcutta"
+DEFAULT_TIME_DELTA = timedelta(hours=5, minutes=30)
 
 
-def set_default_time_zone():
-    global DEFAULT_TIME_ZONE
-    if DEFAULT_TIME_ZONE in available_timezones():
-        return
+def _zone_info(name: str) -> ZoneInfo | None:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=None)
+def resolve_default_time_zone() -> str:
+    """the name of the default time zone. The tz database is only scanned if
+    neither Asia/Kolkata nor Asia/Calcutta can be loaded."""
+    if _zone_info(DEFAULT_TIME_ZONE) is not None:
+        return DEFAULT_TIME_ZONE
 
     logger.warning(f"ZoneInfo {DEFAULT_TIME_ZONE} not found.")
 
     # try calcutta
-    ALT_DEFAULT_TIME_ZONE = "Asia/Calcutta"
-    if ALT_DEFAULT_TIME_ZONE in available_timezones():
-        DEFAULT_TIME_ZONE = ALT_DEFAULT_TIME_ZONE
+    if _zone_info(ALT_DEFAULT_TIME_ZONE) is not None:
         logger.warning(f"Using default time zone of {ALT_DEFAULT_TIME_ZONE}")
-        return
+        return ALT_DEFAULT_TIME_ZONE
 
-    default_time_delta = timedelta(hours=5, minutes=30)
-    # try for any timezone not with 5 hours, 30 minutes offset
-    for tz_name in available_timezones():
-        tz = ZoneInfo(tz_name)
-        if tz.utcoffset(datetime.now()) == default_time_delta:
-            DEFAULT_TIME_ZONE = tz_name
+    # try for any timezone with 5 hours, 30 minutes offset
+    now = datetime.now()
+    for tz_name in sorted(available_timezones()):
+        tz = _zone_info(tz_name)
+        if tz is not None and tz.utcoffset(now) == DEFAULT_TIME_DELTA:
+            logger.warning(f"Using default time zone of {tz_name}")
+            return tz_name
 
     logger.error(
         (
-            f"No timezone with {default_time_delta} offset found."
+            f"No timezone with {DEFAULT_TIME_DELTA} offset found."
             " - you MUST set the LOCAL_TIME_ZONE environment variable."
         )
     )
+    return DEFAULT_TIME_ZONE
 
 
-set_default_time_zone()
+def set_default_time_zone():
+    global DEFAULT_TIME_ZONE
+    DEFAULT_TIME_ZONE = resolve_default_time_zone()
 
 
 class ModelSettings(BaseSettings):
     """Use environment variable LOCAL_TIME_ZONE, to capture current time zone"""
 
-    local_time_zone: Annotated[str, Field(env="LOCAL_TIME_ZONE")] = DEFAULT_TIME_ZONE
+    local_time_zone: Annotated[
+        str, Field(env="LOCAL_TIME_ZONE", default_factory=resolve_default_time_zone)
+    ]
+
 
+@lru_cache(maxsize=None)
+def get_model_settings() -> ModelSettings:
+    """the settings, read from the environment on first use"""
+    return ModelSettings()
 
-model_settings = ModelSettings()
 
-local_tz = ZoneInfo(model_settings.local_time_zone)
-"""local_tz contains the current time zone"""
+@lru_cache(maxsize=None)
+def local_time_zone() -> ZoneInfo:
+    """local_time_zone returns the local_time_zone, resolved on first use"""
+    return ZoneInfo(get_model_settings().local_time_zone)
 
 
-def local_time_zone():
-    """local_time_zone returns the local_time_zone"""
-    return local_tz
+def __getattr__(name: str):
+    # model_settings and local_tz were module attributes, built on import
+    if name == "model_settings":
+        return get_model_settings()
+    elif name == "local_tz":
+        return local_time_zone()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,110 @@
+"""Encodes and decodes datastore timestamp values, for all the time flavors in
+ATOMIC_TYPES, working directly on the seconds / nanos of the raw protobuf
+Timestamp, with as few intermediate objects as possible.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Callable, Iterable
+from pydantic import NaiveDatetime, AwareDatetime
+
+_UTC = timezone.utc
+UTC_EPOCH = datetime(1970, 1, 1, tzinfo=_UTC)
+NAIVE_EPOCH = datetime(1970, 1, 1)
+EPOCH_ORDINAL = NAIVE_EPOCH.toordinal()
+SECONDS_PER_DAY = 86400
+
+
+class TimestampCodecException(Exception):
+    pass
+
+
+def to_seconds_nanos(value: Any) -> tuple[int, int]:
+    """returns the (seconds, nanos) since the utc epoch of a datetime, date,
+    time or timedelta. Naive values are taken to be in utc."""
+    if isinstance(value, datetime):
+        delta = value - (NAIVE_EPOCH if value.tzinfo is None else UTC_EPOCH)
+    elif isinstance(value, date):
+        return (value.toordinal() - EPOCH_ORDINAL) * SECONDS_PER_DAY, 0
+    elif isinstance(value, timedelta):
+        delta = value
+    elif isinstance(value, time):
+        if value.tzinfo is None:
+            seconds = value.hour * 3600 + value.minute * 60 + value.second
+            return seconds, value.microsecond * 1000
+        delta = datetime.combine(UTC_EPOCH, value) - UTC_EPOCH
+    else:
+        raise TimestampCodecException(
+            f"Cannot convert {type(value)} to a timestamp value"
+        )
+
+    return (
+        delta.days * SECONDS_PER_DAY + delta.seconds,
+        delta.microseconds * 1000,
+    )
+
+
+def encode_timestamp(timestamp_pb: Any, value: Any) -> None:
+    """writes value into the (raw) Timestamp protobuf timestamp_pb"""
+    timestamp_pb.seconds, timestamp_pb.nanos = to_seconds_nanos(value)
+
+
+def _decode_aware(seconds: int, nanos: int) -> datetime:
+    return UTC_EPOCH + timedelta(0, seconds, nanos // 1000)
+
+
+def _decode_naive(seconds: int, nanos: int) -> datetime:
+    return NAIVE_EPOCH + timedelta(0, seconds, nanos // 1000)
+
+
+def _decode_date(seconds: int, nanos: int) -> date:
+    return date.fromordinal(EPOCH_ORDINAL + seconds // SECONDS_PER_DAY)
+
+
+def _decode_time(seconds: int, nanos: int) -> time:
+    seconds = seconds % SECONDS_PER_DAY
+    return time(seconds // 3600, seconds // 60 % 60, seconds % 60, nanos // 1000, _UTC)
+
+
+def _decode_timedelta(seconds: int, nanos: int) -> timedelta:
+    return timedelta(0, seconds, nanos // 1000)
+
+
+_DECODERS: dict[type, Callable[[int, int], Any]] = {
+    datetime: _decode_aware,
+    AwareDatetime: _decode_aware,
+    NaiveDatetime: _decode_naive,
+    date: _decode_date,
+    time: _decode_time,
+    timedelta: _decode_timedelta,
+}
+
+
+def decode_timestamp(seconds: int, nanos: int, field_type: type) -> Any:
+    """converts (seconds, nanos) since the utc epoch to field_type"""
+    return _DECODERS.get(field_type, _decode_aware)(seconds, nanos)
+
+
+def encode_timestamps(
+    values_pb: Any, values: Iterable[Any], exclude_from_indexes: bool = False
+) -> None:
+    """appends values as timestamp values to the (raw) repeated Value
+    protobuf values_pb"""
+    add = values_pb.add
+    for value in values:
+        timestamp_pb = add(exclude_from_indexes=exclude_from_indexes).timestamp_value
+        timestamp_pb.seconds, timestamp_pb.nanos = to_seconds_nanos(value)
+
+
+def decode_timestamps(values_pb: Iterable[Any], field_type: type) -> list[Any]:
+    """decodes the (raw) repeated Value protobuf values_pb holding timestamp
+    values into a list of field_type"""
+    decoder = _DECODERS.get(field_type, _decode_aware)
+    values = []
+    append = values.append
+    for value_pb in values_pb:
+        if value_pb.WhichOneof("value_type") != "timestamp_value":
+            raise TimestampCodecException(
+                f"Expected timestamp_value, got {value_pb.WhichOneof('value_type')}"
+            )
+        timestamp_pb = value_pb.timestamp_value
+        append(decoder(timestamp_pb.seconds, timestamp_pb.nanos))
+    return values
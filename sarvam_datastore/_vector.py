@@ -0,0 +1,58 @@
+"""Packs float vectors into little-endian blobs, and unpacks them again into
+a list, an array.array or (zero-copy) a numpy array."""
+import array
+import sys
+from typing import Any
+from ._model_helper import VectorDtype
+
+_TYPECODES = {VectorDtype.FLOAT32: "f", VectorDtype.FLOAT64: "d"}
+_NUMPY_DTYPES = {VectorDtype.FLOAT32: "<f4", VectorDtype.FLOAT64: "<f8"}
+_IS_BIG_ENDIAN = sys.byteorder == "big"
+
+
+class VectorException(Exception):
+    pass
+
+
+def _numpy() -> Any:
+    try:
+        import numpy
+
+        return numpy
+    except ImportError:  # pragma: no cover
+        raise VectorException("numpy vector fields need numpy") from None
+
+
+def pack_vector(value: Any, dtype: VectorDtype) -> bytes:
+    """packs a sequence of floats, array.array or numpy array into a
+    little-endian blob of dtype"""
+    # numpy is only imported by this module when it is used, and value can
+    # only be a numpy array if numpy was imported already
+    np = sys.modules.get("numpy")
+    if np is not None and isinstance(value, np.ndarray):
+        return np.asarray(value, dtype=_NUMPY_DTYPES[dtype]).tobytes()
+
+    typecode = _TYPECODES[dtype]
+    if not (isinstance(value, array.array) and value.typecode == typecode):
+        value = array.array(typecode, value)
+    if _IS_BIG_ENDIAN:
+        value = array.array(typecode, value)
+        value.byteswap()
+    return value.tobytes()
+
+
+def unpack_vector(blob: bytes, dtype: VectorDtype, container: type) -> Any:
+    """unpacks a little-endian blob of dtype into container (list, array.array
+    or numpy.ndarray). numpy arrays are read-only views on the blob."""
+    if getattr(container, "__module__", None) == "numpy":
+        return _numpy().frombuffer(blob, dtype=_NUMPY_DTYPES[dtype])
+
+    typecode = _TYPECODES[dtype]
+    if len(blob) % array.array(typecode).itemsize != 0:
+        raise VectorException(f"Vector blob of {len(blob)} bytes is not {dtype}")
+
+    value = array.array(typecode)
+    value.frombytes(blob)
+    if _IS_BIG_ENDIAN:
+        value.byteswap()
+    return value.tolist() if container == list else value
@@ -0,0 +1,100 @@
+"""Synthesizes sample instances of models, to run the converter paths of each
+model once before serving traffic."""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any
+from ._converter import EntityProtobufConverter, EntityRawpb, raw_pb
+from ._descriptors import (
+    AtomicDescriptor,
+    EntityDescriptor,
+    ReferenceDescriptor,
+    VectorDescriptor,
+)
+from ._geo_point import GeoPoint
+from ._model_helper import EntityType, GenericType
+from ._model_registry import DatastoreModelHelperRegistry
+
+_SAMPLE_ATOMIC_VALUES: dict[type, Any] = {
+    bool: True,
+    int: 1,
+    float: 1.5,
+    str: "warm-up",
+    bytes: b"warm-up",
+    GeoPoint: GeoPoint(latitude=12.97, longitude=77.59),
+    datetime: datetime(2024, 1, 1, tzinfo=timezone.utc),
+    date: date(2024, 1, 1),
+    time: time(12, 30),
+    timedelta: timedelta(hours=1),
+}
+
+
+class WarmUpException(Exception):
+    pass
+
+
+def _sample_atomic(property: AtomicDescriptor) -> Any:
+    if property.is_enum and property.enum_class is not None:
+        return next(iter(property.enum_class))
+    if property.is_timestamp and property.field_type not in _SAMPLE_ATOMIC_VALUES:
+        # NaiveDatetime, AwareDatetime
+        naive = property.field_type.__name__.startswith("Naive")
+        sample = _SAMPLE_ATOMIC_VALUES[datetime]
+        return sample.replace(tzinfo=None) if naive else sample
+    return _SAMPLE_ATOMIC_VALUES[property.field_type]
+
+
+def build_sample(registry: DatastoreModelHelperRegistry, clazz: type) -> Any:
+    """an instance of clazz, with a value for each stored field, including the
+    keys, references and embedded entities"""
+    helper = registry.get_by_class(clazz)
+    values: dict[str, Any] = {}
+    key_descriptor = helper.key_descriptor
+    if key_descriptor is not None:
+        for path_item in key_descriptor.path_items:
+            values[path_item.field_name] = (
+                1 if path_item.field_type == int else "warm-up"
+            )
+
+    for property in helper.descriptors.values():
+        if isinstance(property, ReferenceDescriptor):
+            for path_item in property.key.path_items:
+                values[path_item.field_name] = (
+                    1 if path_item.field_type == int else "warm-up"
+                )
+            continue
+
+        if isinstance(property, VectorDescriptor):
+            value: Any = [0.5, 1.5]
+        elif isinstance(property, AtomicDescriptor):
+            value = _sample_atomic(property)
+        elif isinstance(property, EntityDescriptor):
+            if property.entity_type == EntityType.DICT:
+                value = {}
+            else:
+                value = build_sample(registry, property.clazz)  # type: ignore
+        else:
+            raise WarmUpException(
+                f"Cannot build a sample for field {property.field_name}"
+            )
+
+        if property.generic_type == GenericType.LIST:
+            value = [value]
+        elif property.generic_type == GenericType.DICT:
+            value = {"warm-up": value}
+        values[property.field_name] = value
+
+    if hasattr(helper.cls, "model_construct"):
+        return helper.cls.model_construct(**values)
+    return helper.cls(**values)  # data classes
+
+
+def round_trip(
+    converter: EntityProtobufConverter,
+    clazz: type,
+    project: str = "",
+    namespace: str = "",
+) -> Any:
+    """encode a sample of clazz, serialize and parse it, and decode it again"""
+    sample = build_sample(converter.registry, clazz)
+    entity_pb = raw_pb(converter.to_protobuf(sample, project, namespace))
+    entity_pb = EntityRawpb.FromString(entity_pb.SerializeToString())
+    return converter.from_protobuf(entity_pb, clazz)
@@ -0,0 +1,233 @@
+"""Rate limits writes per kind, following the 500/50/5 rule for ramping up
+traffic to a new kind: start at 500 operations per second, and increase by
+50% every 5 minutes in which the writes ran near the allowed rate. Overload
+errors halve the rate of the kind, which then grows back additively (AIMD),
+at most once per adjustment interval, and the write is retried with backoff."""
+import asyncio
+from collections import deque
+import random
+import time
+from typing import Any, Awaitable, Callable, Mapping
+from google.api_core import exceptions as core_exceptions
+
+# errors with which Datastore signals overload. The commit was not applied.
+OVERLOAD_ERRORS = (core_exceptions.ResourceExhausted, core_exceptions.Aborted)
+
+
+class ThrottleEvent:
+    """A throttle event: "wait" (waited for tokens), "backoff" (rate decreased
+    on overload) or "retry" (write retried after an overload error)"""
+
+    __slots__ = ("time", "kind", "event_type", "rate", "seconds")
+
+    def __init__(
+        self, time: float, kind: str, event_type: str, rate: float, seconds: float
+    ):
+        self.time = time
+        self.kind = kind
+        self.event_type = event_type
+        self.rate = rate
+        self.seconds = seconds
+
+    def __repr__(self):
+        return (
+            f"ThrottleEvent({self.event_type}, kind={self.kind},"
+            f" rate={self.rate:.1f}, seconds={self.seconds:.3f})"
+        )
+
+
+class _KindState:
+    __slots__ = (
+        "rate",
+        "ceiling",
+        "tokens",
+        "updated_at",
+        "ramp_at",
+        "spent",
+        "adjusted_at",
+    )
+
+    def __init__(self, rate: float, now: float):
+        self.rate = rate
+        # the rate allowed by the ramp-up schedule
+        self.ceiling = rate
+        self.tokens = rate
+        self.updated_at = now
+        self.ramp_at = now
+        # operations acquired since ramp_at
+        self.spent = 0.0
+        # time of the last additive increase or backoff
+        self.adjusted_at = now
+
+
+class WriteThrottle:
+    """A token bucket rate limiter per kind, for the write path of
+    DatastoreRepository"""
+
+    def __init__(
+        self,
+        initial_rate: float = 500.0,
+        ramp_up_factor: float = 1.5,
+        ramp_up_interval: float = 300.0,
+        ramp_up_threshold: float = 0.8,
+        max_rate: float | None = None,
+        min_rate: float = 5.0,
+        backoff_factor: float = 0.5,
+        additive_increase: float = 50.0,
+        adjust_interval: float = 30.0,
+        max_retries: int = 5,
+        initial_backoff: float = 0.1,
+        max_backoff: float = 30.0,
+        max_events: int = 1000,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ):
+        """create a throttle
+
+        Args:
+            initial_rate (float): operations per second for a new kind
+            ramp_up_factor (float): increase of the rate per ramp up interval
+            ramp_up_interval (float): seconds between rate increases
+            ramp_up_threshold (float): fraction of the allowed rate the writes
+                must reach over an interval for the rate to be increased
+            max_rate (float | None): (Optional) the maximum rate per kind
+            min_rate (float): the minimum rate per kind, after backoffs
+            backoff_factor (float): rate multiplier on overload errors
+            additive_increase (float): rate increase after a backoff, up to
+                the ramp up schedule, on a successful write
+            adjust_interval (float): minimum seconds between additive
+                increases, and between a backoff and the first increase
+            max_retries (int): retries of a write after overload errors
+            initial_backoff (float): seconds before the first retry, doubled
+                for every further retry
+            max_backoff (float): maximum seconds between retries
+            max_events (int): number of recent events kept
+            clock (Callable[[], float]): monotonic clock, in seconds
+            sleep (Callable[[float], Awaitable[Any]]): async sleep
+        """
+        self.initial_rate = initial_rate
+        self.ramp_up_factor = ramp_up_factor
+        self.ramp_up_interval = ramp_up_interval
+        self.ramp_up_threshold = ramp_up_threshold
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.backoff_factor = backoff_factor
+        self.additive_increase = additive_increase
+        self.adjust_interval = adjust_interval
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.events: deque[ThrottleEvent] = deque(maxlen=max_events)
+        self._clock = clock
+        self._sleep = sleep
+        self._states: dict[str, _KindState] = {}
+
+    def _state(self, kind: str) -> _KindState:
+        now = self._clock()
+        state = self._states.get(kind)
+        if state is None:
+            state = self._states[kind] = _KindState(self.initial_rate, now)
+
+        intervals = int((now - state.ramp_at) // self.ramp_up_interval)
+        if intervals > 0:
+            state.ramp_at += intervals * self.ramp_up_interval
+            # the writes acquired before now ran in the first of the intervals,
+            # the others were idle
+            observed = state.spent / self.ramp_up_interval
+            state.spent = 0.0
+            if intervals == 1 and observed >= self.ramp_up_threshold * state.ceiling:
+                at_ceiling = state.rate >= state.ceiling
+                # raised by the factor, but at most to a factor of the
+                # throughput actually seen
+                state.ceiling = max(
+                    state.ceiling,
+                    min(state.ceiling, observed) * self.ramp_up_factor,
+                )
+                if self.max_rate is not None:
+                    state.ceiling = min(state.ceiling, self.max_rate)
+                if at_ceiling:
+                    # not backing off, follow the schedule
+                    state.rate = state.ceiling
+
+        # refill the bucket, which holds at most one second of writes
+        state.tokens = min(
+            state.rate, state.tokens + (now - state.updated_at) * state.rate
+        )
+        state.updated_at = now
+        return state
+
+    def rate(self, kind: str) -> float:
+        """the current rate of kind, in operations per second"""
+        return self._state(kind).rate
+
+    def rates(self) -> dict[str, float]:
+        """the current rates, by kind"""
+        return {kind: self._state(kind).rate for kind in list(self._states)}
+
+    def _event(self, kind: str, event_type: str, rate: float, seconds: float):
+        self.events.append(
+            ThrottleEvent(self._clock(), kind, event_type, rate, seconds)
+        )
+
+    async def acquire(self, kind: str, count: int = 1):
+        """wait until count operations on kind are allowed"""
+        state = self._state(kind)
+        # tokens may go negative for large batches, later writes wait it off
+        state.tokens -= count
+        state.spent += count
+        if state.tokens < 0:
+            seconds = -state.tokens / state.rate
+            self._event(kind, "wait", state.rate, seconds)
+            await self._sleep(seconds)
+
+    def on_success(self, kind: str):
+        state = self._state(kind)
+        if state.rate >= state.ceiling:
+            return
+        now = self._clock()
+        if now - state.adjusted_at >= self.adjust_interval:
+            state.rate = min(state.ceiling, state.rate + self.additive_increase)
+            state.adjusted_at = now
+
+    def on_overload(self, kind: str):
+        state = self._state(kind)
+        state.rate = max(self.min_rate, state.rate * self.backoff_factor)
+        state.adjusted_at = self._clock()
+        state.tokens = min(state.tokens, 0)
+        self._event(kind, "backoff", state.rate, 0)
+
+    async def run(self, counts: Mapping[str, int], write: Callable[[], Awaitable[Any]]):
+        """run write, after acquiring counts operations per kind, and retry it
+        with backoff on overload errors
+
+        Args:
+            counts (Mapping[str, int]): number of operations by kind
+            write (Callable[[], Awaitable[Any]]): the write, e.g. a commit
+
+        Returns:
+            Any: the result of write
+        """
+        attempt = 0
+        while True:
+            for kind, count in counts.items():
+                await self.acquire(kind, count)
+
+            try:
+                result = await write()
+            except OVERLOAD_ERRORS:
+                for kind in counts:
+                    self.on_overload(kind)
+                if attempt >= self.max_retries:
+                    raise
+
+                seconds = min(self.max_backoff, self.initial_backoff * 2**attempt)
+                seconds *= random.uniform(0.5, 1.0)
+                for kind in counts:
+                    self._event(kind, "retry", self._state(kind).rate, seconds)
+                await self._sleep(seconds)
+                attempt += 1
+                continue
+
+            for kind in counts:
+                self.on_success(kind)
+            return result
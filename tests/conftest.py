@@ -1,17 +1,32 @@
 import asyncio
 import inspect
-from typing import List, Tuple
+from typing import Iterable, List, Tuple
 import pytest
 import pytest_asyncio
 from pydantic import create_model, BaseModel
+from google.api_core import exceptions as core_exceptions
+from google.cloud.datastore_v1.types import (
+    AggregationResult,
+    AggregationResultBatch,
+    BeginTransactionResponse,
+    CommitResponse,
+    EntityResult,
+    LookupResponse,
+    MutationResult,
+    QueryResultBatch,
+    RunAggregationQueryResponse,
+    RunQueryResponse,
+)
 
 from sarvam_datastore import (
+    DatastoreClientPool,
     DatastoreRepository,
     DatastoreConfig,
     DatastoreModelHelper,
     DatastoreModelHelperRegistry,
     EntityProtobufConverter,
 )
+from sarvam_datastore._repository import _key_id
 from tests.fixture_helper import delete_items_of_kind
 from tests.model_mocker import SampleEmbedded
 from tests.sample_model import AllocatedIdEntity, EmbeddedEntity, StandAloneEntity
@@ -91,6 +106,137 @@ async def repo(
     await delete_items_of_kind("AllocatedId", repo, config.datastore_namespace)
 
 
+class FakeClock:
+    """a clock which only moves when it sleeps, or when now is set"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeTransport:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    """an in memory datastore client, which records the requests it gets"""
+
+    def __init__(self):
+        self.entity_pbs: dict = {}
+        # the results of every run_query
+        self.page: list = []
+        # the count of every run_aggregation_query
+        self.count = 0
+        # defer all but the first key of a lookup, as datastore may do
+        self.defer = False
+        # when set, lookups wait for it, e.g. to keep them in flight
+        self.blocked: asyncio.Event | None = None
+        # the commit, counted from 0, which fails with ServiceUnavailable
+        self.fail_at: int | None = None
+        self.transport = FakeTransport()
+        self.requests: list = []
+        self.lookups: list[int] = []
+        self.commits: list[int] = []
+        self.mutations: list = []
+
+    def add(self, entity_pbs: Iterable):
+        for entity_pb in entity_pbs:
+            self.entity_pbs[_key_id(entity_pb.key)] = entity_pb
+
+    async def lookup(self, request, retry=None):
+        keys = request["keys"]
+        self.lookups.append(len(keys))
+        self.requests.append(request)
+        if self.blocked is not None:
+            await self.blocked.wait()
+        found, deferred = (keys[:1], keys[1:]) if self.defer else (keys, [])
+        return LookupResponse(
+            found=[
+                EntityResult(entity=self.entity_pbs[_key_id(key)])
+                for key in found
+                if _key_id(key) in self.entity_pbs
+            ],
+            deferred=deferred,
+        )
+
+    async def run_query(self, request, retry=None):
+        self.requests.append(request)
+        return RunQueryResponse(
+            batch=QueryResultBatch(
+                entity_results=[EntityResult(entity=pb) for pb in self.page],
+                more_results=QueryResultBatch.MoreResultsType.NO_MORE_RESULTS,
+            )
+        )
+
+    async def run_aggregation_query(self, request, retry=None):
+        self.requests.append(request)
+        return RunAggregationQueryResponse(
+            batch=AggregationResultBatch(
+                aggregation_results=[
+                    AggregationResult(
+                        aggregate_properties={"count": {"integer_value": self.count}}
+                    )
+                ]
+            )
+        )
+
+    async def begin_transaction(self, project_id):
+        return BeginTransactionResponse(transaction=b"txn")
+
+    async def commit(self, transaction, mutations, project_id):
+        if len(self.commits) == self.fail_at:
+            raise core_exceptions.ServiceUnavailable("unavailable")
+        self.commits.append(len(mutations))
+        self.mutations.extend(mutations)
+        return CommitResponse(
+            mutation_results=[
+                MutationResult(version=len(self.commits)) for _ in mutations
+            ]
+        )
+
+
+@pytest.fixture()
+def fake_clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture()
+def fake_client() -> FakeClient:
+    return FakeClient()
+
+
+@pytest.fixture()
+def fake_client_factory() -> type[FakeClient]:
+    return FakeClient
+
+
+@pytest.fixture()
+def make_repository(fake_client: FakeClient):
+    """makes repositories which send their requests to fake_client"""
+
+    def make(converter: EntityProtobufConverter, **kwargs) -> DatastoreRepository:
+        return DatastoreRepository(
+            converter,
+            "project",
+            "namespace",
+            client_pool=DatastoreClientPool(size=1, client_factory=lambda: fake_client),
+            **kwargs,
+        )
+
+    return make
+
+
 def pytest_collection_modifyitems(config, items):
     for item in items:
         if inspect.iscoroutinefunction(item.function):
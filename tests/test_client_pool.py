@@ -0,0 +1,81 @@
+import asyncio
+import pytest
+from sarvam_datastore import ChannelSelection, DatastoreClientPool
+from sarvam_datastore._client_pool import DatastoreClientPoolException
+
+LOOKUP = {"keys": []}
+
+
+async def test_round_robin(fake_client_factory):
+    clients = []
+
+    def client_factory():
+        clients.append(fake_client_factory())
+        return clients[-1]
+
+    pool = DatastoreClientPool(size=3, client_factory=client_factory)
+    transports = []
+    for _ in range(7):
+        client = pool.client()
+        await client.lookup(LOOKUP)
+        transports.append(client.transport)
+    assert [transports.index(transport) for transport in transports] == [
+        *[0, 1, 2] * 2,
+        0,
+    ]
+    assert [len(client.lookups) for client in clients] == [3, 2, 2]
+
+    await pool.close()
+    assert all(client.transport.closed for client in clients)
+    with pytest.raises(DatastoreClientPoolException):
+        pool.client()
+
+
+async def test_least_loaded(fake_client_factory):
+    clients = [fake_client_factory(), fake_client_factory()]
+    pool = DatastoreClientPool(
+        size=2,
+        selection=ChannelSelection.LEAST_LOADED,
+        client_factory=iter(clients).__next__,
+    )
+    clients[0].blocked = asyncio.Event()
+    busy = asyncio.create_task(pool.client().lookup(LOOKUP))
+    await asyncio.sleep(0)
+    assert pool.in_flight == [1, 0]
+
+    # the idle client is picked, whatever the round robin position
+    await pool.client().lookup(LOOKUP)
+    await pool.client().lookup(LOOKUP)
+    assert [len(client.lookups) for client in clients] == [1, 2]
+
+    clients[0].blocked.set()
+    await busy
+    assert pool.in_flight == [0, 0]
+    await pool.close()
+
+
+async def test_default_pool(fake_client_factory):
+    pool = DatastoreClientPool(size=2, client_factory=fake_client_factory)
+    DatastoreClientPool.set_default(pool)
+    try:
+        assert DatastoreClientPool.default() is pool
+    finally:
+        DatastoreClientPool.set_default(None)
+    assert DatastoreClientPool.default() is not pool
+
+
+def test_default_pool_per_loop():
+    async def default_pool():
+        return DatastoreClientPool.default()
+
+    # grpc channels can not be shared between event loops
+    loop = asyncio.new_event_loop()
+    try:
+        first = loop.run_until_complete(default_pool())
+        assert loop.run_until_complete(default_pool()) is first
+    finally:
+        loop.close()
+    assert asyncio.run(default_pool()) is not first
+
+    with pytest.raises(DatastoreClientPoolException):
+        DatastoreClientPool.default()
@@ -0,0 +1,99 @@
+import pytest
+from sarvam_datastore import (
+    DatastoreModelHelper,
+    DatastoreModelHelperRegistry,
+    EntityProtobufConverter,
+    EntitySizeException,
+    EntitySizeStats,
+)
+from sarvam_datastore._entity_size import MAX_ENTITY_BYTES, split_by_size
+from sarvam_datastore._repository import (
+    DatastoreRepositoryException,
+    PartialCommitException,
+)
+from .sample_model import EmbeddedEntity, StandAloneEntity
+
+
+def make_registry():
+    registry = DatastoreModelHelperRegistry()
+    registry.register(DatastoreModelHelper(StandAloneEntity))
+    registry.register(DatastoreModelHelper(EmbeddedEntity))
+    return registry
+
+
+def test_estimate_size():
+    converter = EntityProtobufConverter(make_registry())
+    entity_pb = converter.to_protobuf(StandAloneEntity(aref=1), "test", "test")
+    size = converter.estimate_size(entity_pb)
+
+    assert size.kind == "StandAlone"
+    assert size.total_bytes == type(entity_pb).pb(entity_pb).ByteSize()
+    assert set(size.properties) == set(entity_pb.properties)
+    # unindexed properties have no index entries, arrays and embedded entities
+    # have one per indexed value
+    assert size.properties["aunindexed"][1] == 0
+    assert size.properties["anarray"][1] == 2 * 2
+    assert size.properties["aembedded"][1] == 2 * 2
+    assert size.index_entries == sum(i for _, i in size.properties.values())
+
+
+def test_size_guard():
+    stats = EntitySizeStats()
+    converter = EntityProtobufConverter(
+        make_registry(), size_guard=True, size_stats=stats
+    )
+    converter.to_protobuf(StandAloneEntity(aref=1))
+
+    with pytest.raises(EntitySizeException) as exc_info:
+        converter.to_protobuf(
+            StandAloneEntity(aref=2, aunindexed="x" * MAX_ENTITY_BYTES)
+        )
+    assert exc_info.value.kind == "StandAlone"
+    assert exc_info.value.properties[0] == "aunindexed"
+
+    with pytest.raises(EntitySizeException) as exc_info:
+        converter.to_protobuf(
+            StandAloneEntity(aref=3, anarray=[str(i) for i in range(10001)])
+        )
+    assert exc_info.value.properties[0] == "anarray"
+
+    assert stats.kinds() == ["StandAlone"]
+    assert stats.count("StandAlone") == 3
+    assert sum(stats.histogram("StandAlone").values()) == 3
+    assert stats.mean_bytes("StandAlone") > 0
+
+
+def test_split_by_size():
+    items = list(range(10))
+    assert split_by_size(items, [1] * 10, max_bytes=3) == [
+        [0, 1, 2],
+        [3, 4, 5],
+        [6, 7, 8],
+        [9],
+    ]
+    assert split_by_size(items, [1] * 10, max_count=5) == [items[:5], items[5:]]
+    assert split_by_size([0, 1], [5, 1], max_bytes=3) == [[0], [1]]
+    assert split_by_size([], []) == []
+
+
+async def test_upsert_multi_split(fake_client, make_repository):
+    repository = make_repository(EntityProtobufConverter(make_registry()))
+    objects = [StandAloneEntity(astr=str(i), aref=i) for i in range(600)]
+
+    # not atomic, so only split on request
+    with pytest.raises(DatastoreRepositoryException):
+        await repository.upsert_multi(objects)
+    assert fake_client.commits == []
+
+    results = await repository.upsert_multi(objects, split=True)
+    assert fake_client.commits == [500, 100]
+    assert len(results) == 600
+
+    fake_client.commits = []
+    fake_client.fail_at = 1
+    with pytest.raises(PartialCommitException) as exc_info:
+        await repository.upsert_multi(objects, split=True)
+    assert len(exc_info.value.results) == 500
+    assert [key.name for key in exc_info.value.committed_keys] == [
+        str(i) for i in range(500)
+    ]
@@ -0,0 +1,103 @@
+import asyncio
+import pytest
+from google.api_core import exceptions as core_exceptions
+from sarvam_datastore import (
+    DatastoreModelHelperRegistry,
+    EntityProtobufConverter,
+    HedgingPolicy,
+    RetryBudget,
+)
+from .sample_model import AllocatedIdEntity
+
+
+async def no_sleep(seconds: float):
+    pass
+
+
+def test_retry_budget(fake_clock):
+    budget = RetryBudget(ratio=0.5, min_per_second=1, max_balance=2, clock=fake_clock)
+    assert budget.try_withdraw()
+    assert budget.try_withdraw()
+    assert not budget.try_withdraw()
+
+    budget.record_request()
+    budget.record_request()
+    assert budget.try_withdraw()
+
+    fake_clock.now = 1.5
+    assert budget.balance == 1.5
+
+
+def test_learned_delay():
+    policy = HedgingPolicy(initial_delay=0.5, min_samples=10, percentile=90)
+    assert policy.hedge_delay() == 0.5
+
+    for ms in range(1, 101):
+        policy.record_latency(ms / 1000)
+    assert policy.hedge_delay() == pytest.approx(0.091)
+
+    assert HedgingPolicy(delay=0.2).hedge_delay() == 0.2
+
+
+async def test_hedge_wins():
+    policy = HedgingPolicy(delay=0.01)
+    delays = [1.0, 0.0]
+
+    async def read():
+        delay = delays.pop(0)
+        await asyncio.sleep(delay)
+        return delay
+
+    assert await policy.call(read) == 0.0
+    assert (policy.hedges, policy.hedge_wins) == (1, 1)
+
+
+async def test_no_hedge_without_budget():
+    budget = RetryBudget(ratio=0, min_per_second=0, max_balance=0)
+    policy = HedgingPolicy(delay=0.001, retry_budget=budget)
+
+    async def read():
+        await asyncio.sleep(0.02)
+        return "slow"
+
+    assert await policy.call(read) == "slow"
+    assert policy.hedges == 0
+    assert policy.budget_exhausted == 1
+
+
+async def test_retry_transient_errors():
+    policy = HedgingPolicy(delay=1.0, max_retries=2, sleep=no_sleep)
+    attempts = []
+
+    async def read():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise core_exceptions.ServiceUnavailable("unavailable")
+        return "found"
+
+    assert await policy.call(read) == "found"
+    assert policy.retries == 2
+
+    async def invalid():
+        raise core_exceptions.InvalidArgument("invalid")
+
+    with pytest.raises(core_exceptions.InvalidArgument):
+        await policy.call(invalid)
+    assert policy.retries == 2
+
+
+async def test_get_multi(fake_client, make_repository):
+    registry = DatastoreModelHelperRegistry()
+    registry.register_class(AllocatedIdEntity)
+    converter = EntityProtobufConverter(registry)
+    objects = [AllocatedIdEntity(aint=i, astr=str(i)) for i in (1, 2, 3)]
+    fake_client.add(
+        [converter.to_protobuf(obj, "project", "namespace") for obj in objects]
+    )
+    fake_client.defer = True
+    repository = make_repository(converter, hedging_policy=HedgingPolicy(delay=1.0))
+
+    keys = [repository.get_key("AllocatedId", i) for i in (3, 4, 1)]
+    found = await repository.get_multi(keys)
+    assert found == [objects[2], None, objects[0]]
+    assert fake_client.lookups == [3, 2, 1]
@@ -0,0 +1,70 @@
+import subprocess
+import sys
+
+# modules which the converter only path must not import
+CLIENT_STACK = [
+    "sarvam_datastore._repository",
+    "sarvam_datastore._datastore_iterator",
+    "google.cloud.datastore",
+    "google.api_core.page_iterator_async",
+    "numpy",
+]
+
+
+# coarse, so that slow machines pass. benchmarks/import_time.py measures the
+# import time more precisely
+CONVERTER_ONLY_BUDGET_MS = 3000
+REPEAT = 3
+
+
+def import_times(statement: str) -> dict[str, int]:
+    """the self import time in us, by module, for a fresh interpreter running
+    statement"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, module = line[len("import time:") :].split("|")
+        times[module.strip()] = int(self_us)
+    return times
+
+
+def imported_modules(statement: str) -> set[str]:
+    return set(import_times(statement))
+
+
+def test_converter_only_import():
+    modules = imported_modules(
+        "from sarvam_datastore import DatastoreModelHelper,"
+        " DatastoreModelHelperRegistry, EntityProtobufConverter, LazyEntity"
+    )
+    assert "sarvam_datastore._converter" in modules
+    assert [module for module in CLIENT_STACK if module in modules] == []
+
+
+def test_repository_import():
+    modules = imported_modules("from sarvam_datastore import DatastoreRepository")
+    assert "sarvam_datastore._repository" in modules
+    assert "google.api_core.page_iterator_async" in modules
+
+
+def test_converter_only_import_time():
+    statement = (
+        "from sarvam_datastore import DatastoreModelHelper,"
+        " DatastoreModelHelperRegistry, EntityProtobufConverter"
+    )
+    best_ms = min(sum(import_times(statement).values()) / 1000 for _ in range(REPEAT))
+    assert best_ms < CONVERTER_ONLY_BUDGET_MS
+
+
+def test_star_import():
+    # every name of __all__ must be importable
+    assert "sarvam_datastore._repository" in imported_modules(
+        "from sarvam_datastore import *"
+    )
@@ -0,0 +1,85 @@
+from google.cloud import datastore
+from google.cloud.datastore.query import PropertyFilter
+from sarvam_datastore import (
+    DatastoreModelHelper,
+    DatastoreModelHelperRegistry,
+    EntityProtobufConverter,
+    IndexAdvisor,
+    QueryUsage,
+)
+from .sample_model import EmbeddedEntity, StandAloneEntity
+
+
+def make_registry():
+    registry = DatastoreModelHelperRegistry()
+    registry.register(DatastoreModelHelper(StandAloneEntity))
+    registry.register(DatastoreModelHelper(EmbeddedEntity))
+    return registry
+
+
+def test_composite_index():
+    assert QueryUsage("K", equality=["a", "b"]).composite_index() is None
+    assert QueryUsage("K", inequality=["a"], orders=["-a"]).composite_index() is None
+    assert QueryUsage("K", equality=["b"], inequality=["a"]).composite_index() == (
+        False,
+        (("b", "asc"), ("a", "asc")),
+    )
+    assert QueryUsage(
+        "K", equality=["c"], inequality=["a"], orders=["a", "-b"], ancestor=True
+    ).composite_index() == (True, (("c", "asc"), ("a", "asc"), ("b", "desc")))
+
+    # sorting on an equality filtered property changes nothing
+    assert QueryUsage("K", equality=["a"], orders=["a"]).composite_index() is None
+    assert (
+        QueryUsage("K", equality=["a"], orders=["-a"], ancestor=True).composite_index()
+        is None
+    )
+    assert QueryUsage("K", equality=["a"], inequality=["a"]).composite_index() is None
+    assert QueryUsage(
+        "K", equality=["a"], orders=["a", "b", "-b"]
+    ).composite_index() == (False, (("a", "asc"), ("b", "asc")))
+
+
+def test_index_advisor():
+    registry = make_registry()
+    advisor = IndexAdvisor(registry)
+
+    query = datastore.Query(
+        client=None,
+        kind="StandAlone",
+        project="test",
+        filters=[PropertyFilter("anint", "=", 1), PropertyFilter("atime", ">", 0)],
+        order=["-atime"],
+    )
+    advisor.record_query(query)
+    advisor.record_query(query)
+    advisor.record(QueryUsage("StandAlone", equality=["aembedded.x"]))
+
+    report = advisor.report()
+    assert [kind_report.kind for kind_report in report.kinds] == ["StandAlone"]
+    assert report.index_yaml() == (
+        "indexes:\n"
+        "- kind: StandAlone\n"
+        "  properties:\n"
+        "  - name: anint\n"
+        "  - name: atime\n"
+        "    direction: desc\n"
+    )
+
+    kind_report = report.kinds[0]
+    assert set(kind_report.queried_fields) == {"anint", "atime", "aembedded"}
+    assert "astr" not in kind_report.unused_fields  # key field
+    assert "aunindexed" not in kind_report.unused_fields  # already excluded
+    assert "abytes" in kind_report.unused_fields
+    assert "aref" in kind_report.unused_fields
+
+    # estimates from recorded entities, with one composite index entry
+    converter = EntityProtobufConverter(registry)
+    entity_pb = converter.to_protobuf(StandAloneEntity(aref=1))
+    advisor.record_entity(entity_pb)
+    kind_report = advisor.report().kinds[0]
+    assert kind_report.index_entries_before == (
+        converter.estimate_size(entity_pb).index_entries + 1
+    )
+    assert kind_report.index_entries_after < kind_report.index_entries_before
+    assert "abytes" in report.summary()
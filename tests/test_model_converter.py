@@ -1,14 +1,27 @@
+import array
 from datetime import date, datetime, time, timedelta
-from typing import Dict, List
-from pydantic import BaseModel, NaiveDatetime, AwareDatetime
+from typing import Annotated, Dict, List
+from google.cloud import datastore
+from google.cloud.datastore_v1.types import Value as Valuepb
+from pydantic import BaseModel, ConfigDict, NaiveDatetime, AwareDatetime
 import pytest
 from sarvam_datastore import (
+    ColumnBatch,
+    ColumnarDecoder,
+    CompressionCodec,
     DatastoreModelHelperRegistry,
     DatastoreModelHelper,
     DatastoreConfig,
+    DatastoreVector,
+    DecodeEngine,
+    EncodingCache,
     EntityProtobufConverter,
     GeoPoint,
+    VectorDtype,
 )
+from sarvam_datastore._columnar import ColumnarException
+from sarvam_datastore._converter import EntityProtobufConverterException
+from sarvam_datastore._encoding_cache import fingerprint
 from .model_mocker import (
     DatamodelHelperMock,
     SampleEmbedded,
@@ -79,3 +92,419 @@ def test_exclude(
     for field_name, prop in entity_pb.properties.items():
         if field_name in model_config.exclude_from_indexes:
             assert prop.exclude_from_indexes
+
+
+@pytest.mark.parametrize(
+    "model_dict, model_config",
+    [
+        [
+            {"a": (str, ...), "b": (int, ...), "c": (List[SampleEmbedded], ...)},
+            DatastoreConfig(key=[("Parent", "a"), ("Child", "b")]),
+        ]
+    ],
+)
+def test_converter_by_kind(
+    model_dict,
+    model_config,
+    registry: DatastoreModelHelperRegistry,
+    helper_model: DatastoreModelHelper,
+    converter: EntityProtobufConverter,
+) -> None:
+    mocker = DatamodelHelperMock(registry)
+    expected_obj = mocker.generate(helper_model)
+    entity_pb = converter.to_protobuf(expected_obj, "test", "test")
+    assert entity_pb.key.path[-1].kind == "Child"
+    actual_obj = converter.from_protobuf(entity_pb)
+    assert actual_obj == expected_obj
+
+
+@pytest.mark.parametrize(
+    "model_dict, model_config",
+    [
+        [
+            {
+                "a": (int, ...),
+                "b": (str, ...),
+                "c": (List[SampleEmbedded], ...),
+                "d": (Dict[str, int], ...),
+                "e": (int, ...),
+            },
+            DatastoreConfig(key=[("Lazy", "a")], key_references=[[("Ref", "e")]]),
+        ]
+    ],
+)
+def test_lazy_entity(
+    model_dict,
+    model_config,
+    model: type[BaseModel],
+    registry: DatastoreModelHelperRegistry,
+    helper_model: DatastoreModelHelper,
+    converter: EntityProtobufConverter,
+) -> None:
+    mocker = DatamodelHelperMock(registry)
+    expected_obj = mocker.generate(helper_model)
+    expected_obj.e = 42
+    entity_pb = converter.to_protobuf(expected_obj, "test", "test")
+
+    lazy_obj = converter.from_protobuf_lazy(entity_pb)
+    assert lazy_obj.b == expected_obj.b
+    assert lazy_obj.a == expected_obj.a
+    assert lazy_obj.e == expected_obj.e
+    assert "c" not in lazy_obj._values
+    assert lazy_obj.c is lazy_obj.c
+    assert lazy_obj.to_model() == expected_obj
+    with pytest.raises(AttributeError):
+        lazy_obj.not_a_field
+
+
+@pytest.mark.parametrize(
+    "model_dict, model_config",
+    [
+        [
+            {
+                "a": (int, ...),
+                "b": (str | None, ...),
+                "c": (float, ...),
+                "d": (datetime, ...),
+                "e": (SampleIntEnum, ...),
+                "f": (List[int], ...),
+            },
+            DatastoreConfig(key=[("Columnar", "a")]),
+        ]
+    ],
+)
+def test_columnar_decode(
+    model_dict,
+    model_config,
+    registry: DatastoreModelHelperRegistry,
+    helper_model: DatastoreModelHelper,
+    converter: EntityProtobufConverter,
+) -> None:
+    np = pytest.importorskip("numpy")
+    mocker = DatamodelHelperMock(registry)
+    pages = [[mocker.generate(helper_model) for _ in range(5)] for _ in range(2)]
+    decoder = ColumnarDecoder(converter, helper_model)
+    batches = [
+        decoder.decode([converter.to_protobuf(obj) for obj in page]) for page in pages
+    ]
+    batch = ColumnBatch.concat(batches)
+    objs = [obj for page in pages for obj in page]
+
+    assert len(batch) == 10
+    assert batch["a"].dtype == np.int64
+    assert batch["c"].dtype == np.float64
+    assert list(batch["a"].values) == [obj.a for obj in objs]
+    assert list(batch["c"].values) == [obj.c for obj in objs]
+    assert list(batch["e"].values) == [int(obj.e) for obj in objs]
+    assert list(batch["b"].mask) == [obj.b is None for obj in objs]
+    assert list(batch["f"].values) == [obj.f for obj in objs]
+    assert list(batch["d"].values) == [
+        int(obj.d.timestamp()) * 1_000_000_000 + obj.d.microsecond * 1000
+        for obj in objs
+    ]
+
+
+def test_columnar_decode_keys():
+    pytest.importorskip("numpy")
+
+    class Child(BaseModel):
+        a: str
+        b: int
+
+        class DatastoreConfig:
+            key = [("Parent", "a"), ("Child", "b")]
+
+    class Sibling(BaseModel):
+        a: str
+        b: int
+        c: int
+
+        class DatastoreConfig:
+            key = [("Parent", "a"), ("Child", "b")]
+            key_references = [[("Parent", "a"), ("Other", "c")]]
+
+    registry = DatastoreModelHelperRegistry()
+    helper = DatastoreModelHelper(Child)
+    registry.register(helper)
+    converter = EntityProtobufConverter(registry)
+    entity_pbs = [converter.to_protobuf(Child(a=a, b=1)) for a in ("x", "y")]
+
+    # keys shorter than the key of the model have no values for the rest
+    del entity_pbs[1].key.path[1]
+    batch = ColumnarDecoder(converter, helper).decode(entity_pbs)
+    assert list(batch["a"].values) == ["x", "y"]
+    assert list(batch["b"].mask) == [False, True]
+
+    # the key column is not replaced by a column of the reference
+    with pytest.raises(ColumnarException):
+        ColumnarDecoder(converter, DatastoreModelHelper(Sibling))
+
+
+@pytest.mark.parametrize(
+    "model_dict, model_config",
+    [
+        [
+            {"a": (int, ...), "b": (int, ...), "c": (str, ...)},
+            DatastoreConfig(key=[("Cached", "a")]),
+        ]
+    ],
+)
+def test_encoding_cache(
+    model_dict,
+    model_config,
+    registry: DatastoreModelHelperRegistry,
+    helper_model: DatastoreModelHelper,
+) -> None:
+    cache = EncodingCache(max_bytes=1_000)
+    converter = EntityProtobufConverter(registry, encoding_cache=cache)
+    mocker = DatamodelHelperMock(registry)
+    obj = mocker.generate(helper_model)
+    obj.b = -1
+
+    entity_pb = converter.to_protobuf(obj, "test", "test")
+    assert converter.to_protobuf(obj, "test", "test") == entity_pb
+    assert cache.hits == 1
+
+    # changed objects are encoded again
+    obj.b = -2
+    changed_pb = converter.to_protobuf(obj, "test", "test")
+    assert changed_pb.properties["b"].integer_value == -2
+    assert cache.hits == 1
+
+    # changes to the returned entity do not change the cache
+    changed_pb.properties["b"].integer_value = 10
+    cached_pb = converter.to_protobuf(obj, "test", "test")
+    assert cached_pb.properties["b"].integer_value == -2
+    assert cache.hits == 2
+
+    # values with equal hashes are still told apart
+    assert hash(0) == hash(2**61 - 1)
+    obj.b = 0
+    assert converter.to_protobuf(obj, "test", "test").properties["b"].integer_value == 0
+    obj.b = 2**61 - 1
+    collided_pb = converter.to_protobuf(obj, "test", "test")
+    assert collided_pb.properties["b"].integer_value == 2**61 - 1
+    assert cache.hits == 2
+
+    class Point(BaseModel):
+        x: float
+
+    class Points(BaseModel):
+        points: list[float]
+
+    # -0.0 == 0.0, but they are encoded differently
+    assert fingerprint(Point(x=0.0)) != fingerprint(Point(x=-0.0))
+    assert fingerprint(Point(x=float("nan"))) == fingerprint(Point(x=float("nan")))
+    # containers could change in place, so their objects are not cached
+    assert fingerprint(Points(points=[])) is None
+
+    # the cache is bounded
+    objs = [mocker.generate(helper_model) for _ in range(100)]
+    for obj in objs:
+        converter.to_protobuf(obj, "test", "test")
+    assert cache.size_bytes <= cache.max_bytes
+    assert cache.evictions > 0
+
+
+@pytest.mark.parametrize("decode_engine", list(DecodeEngine))
+@pytest.mark.parametrize(
+    "model_dict, model_config",
+    [
+        [
+            {
+                "a": (int, ...),
+                "b": (str | None, ...),
+                "c": (List[SampleEmbedded], ...),
+                "d": (Dict[str, int], ...),
+                "e": (datetime, ...),
+                "f": (SampleStrEnum, ...),
+            },
+            DatastoreConfig(key=[("Engine", "a")]),
+        ]
+    ],
+)
+def test_decode_engines(
+    decode_engine: DecodeEngine,
+    model_dict,
+    model_config: DatastoreConfig,
+    registry: DatastoreModelHelperRegistry,
+    helper_model: DatastoreModelHelper,
+    converter: EntityProtobufConverter,
+) -> None:
+    model_config.decode_engine = decode_engine
+    mocker = DatamodelHelperMock(registry)
+    expected_objs = [mocker.generate(helper_model) for _ in range(5)]
+    entity_pbs = [converter.to_protobuf(obj, "test", "test") for obj in expected_objs]
+
+    assert [converter.from_protobuf(pb) for pb in entity_pbs] == expected_objs
+    assert converter.from_protobuf_multi(entity_pbs) == expected_objs
+
+
+@pytest.mark.parametrize(
+    "model_dict, model_config",
+    [[{"a": (str, ...), "b": (str, ...)}, DatastoreConfig(key=[("Page", "a")])]],
+)
+async def test_query_page_decoding(
+    model_dict,
+    model_config,
+    model: type[BaseModel],
+    converter: EntityProtobufConverter,
+    fake_client,
+    make_repository,
+) -> None:
+    repository = make_repository(converter)
+    obj = model(a="a1", b="b1")
+    entity_pb = converter.to_protobuf(obj, "project", "namespace")
+
+    # unregistered kinds are decoded as plain entities
+    other_pb = converter.to_protobuf(obj, "project", "namespace")
+    other_pb.key.path[0].kind = "Other"
+    fake_client.page = [entity_pb, other_pb]
+    query = repository.get_query_filtered("Page")
+    results = [result async for result in repository.run_query(query, models=True)]
+    assert results[0] == obj
+    assert results[1]["b"] == "b1"
+
+    # without models, every result is a plain entity
+    results = [result async for result in repository.run_query(query)]
+    assert [type(result) for result in results] == [datastore.Entity] * 2
+
+    # decode errors are raised, not hidden
+    entity_pb.properties["b"] = Valuepb(integer_value=1)
+    fake_client.page = [entity_pb]
+    with pytest.raises(EntityProtobufConverterException):
+        [result async for result in repository.run_query(query, models=True)]
+
+
+def test_vector_round_trip():
+    np = pytest.importorskip("numpy")
+
+    class VectorEntity(BaseModel):
+        id: int
+        as_list: Annotated[List[float], DatastoreVector(VectorDtype.FLOAT64)]
+        as_array: Annotated[array.array, DatastoreVector(VectorDtype.FLOAT32)]
+        as_numpy: Annotated[np.ndarray, DatastoreVector(VectorDtype.FLOAT32)]
+        optional: Annotated[list[float] | None, DatastoreVector()] = None
+
+        model_config = ConfigDict(arbitrary_types_allowed=True)
+
+        class DatastoreConfig:
+            key = [("Vector", "id")]
+
+    registry = DatastoreModelHelperRegistry()
+    registry.register(DatastoreModelHelper(VectorEntity))
+    converter = EntityProtobufConverter(registry)
+
+    embedding = [i / 7 for i in range(768)]
+    obj = VectorEntity(
+        id=1,
+        as_list=embedding,
+        as_array=array.array("f", embedding),
+        as_numpy=np.array(embedding, dtype=np.float32),
+    )
+    entity_pb = converter.to_protobuf(obj, "test", "test")
+    for name in ["as_list", "as_array", "as_numpy"]:
+        assert entity_pb.properties[name].exclude_from_indexes
+        assert "blob_value" in entity_pb.properties[name]
+    assert len(entity_pb.properties["as_array"].blob_value) == 768 * 4
+
+    actual = converter.from_protobuf(entity_pb)
+    assert actual.as_list == embedding
+    assert actual.as_array == obj.as_array
+    assert actual.as_numpy.dtype == np.float32
+    assert np.array_equal(actual.as_numpy, obj.as_numpy)
+    assert actual.optional is None
+
+    # vectors written as a list of floats can still be read
+    entity_pb.properties["as_list"] = Valuepb(
+        array_value={"values": [{"double_value": v} for v in embedding[:3]]}
+    )
+    assert converter.from_protobuf(entity_pb).as_list == embedding[:3]
+
+
+@pytest.mark.parametrize("codec", list(CompressionCodec))
+def test_compressed_fields(codec: CompressionCodec):
+    if codec == CompressionCodec.ZSTD:
+        pytest.importorskip("zstandard")
+
+    class CompressedEntity(BaseModel):
+        id: int
+        text: str
+        data: bytes
+        texts: List[str] = []
+
+        class DatastoreConfig:
+            key = [("Compressed", "id")]
+            compressed_fields = ["text", "data", "texts"]
+            compression_min_size = 100
+
+    CompressedEntity.DatastoreConfig.compression_codec = codec
+    registry = DatastoreModelHelperRegistry()
+    registry.register(DatastoreModelHelper(CompressedEntity))
+    converter = EntityProtobufConverter(registry)
+
+    obj = CompressedEntity(
+        id=1, text='{"a": 1} ' * 1000, data=b"\x01\x02" * 1000, texts=["x" * 500, "y"]
+    )
+    entity_pb = converter.to_protobuf(obj, "test", "test")
+    for name in ["text", "data"]:
+        assert entity_pb.properties[name].exclude_from_indexes
+        assert len(entity_pb.properties[name].blob_value) < 200
+    assert "blob_value" in entity_pb.properties["texts"].array_value.values[0]
+    assert entity_pb.properties["texts"].array_value.values[1].string_value == "y"
+    assert converter.from_protobuf(entity_pb) == obj
+
+    # small values which look like compressed ones are not misread
+    small = CompressedEntity(id=2, text="\xffSDZ\x01", data=b"\xffSDZ\x01abc")
+    small_pb = converter.to_protobuf(small, "test", "test")
+    assert small_pb.properties["text"].string_value == small.text
+    assert small_pb.properties["data"].blob_value.endswith(small.data)
+    assert converter.from_protobuf(small_pb) == small
+
+    # values written before compression was enabled
+    entity_pb.properties["text"] = Valuepb(string_value="plain")
+    entity_pb.properties["data"] = Valuepb(blob_value=b"plain")
+    actual = converter.from_protobuf(entity_pb)
+    assert actual.text == "plain"
+    assert actual.data == b"plain"
+
+
+@pytest.mark.parametrize(
+    "model_dict, model_config",
+    [
+        [
+            {
+                "a": (int, ...),
+                "b": (Dict[str, int], ...),
+                "c": (List[SampleEmbedded], ...),
+                "d": (Dict[str, SampleEmbedded], ...),
+                "e": (SampleEmbedded, ...),
+            },
+            DatastoreConfig(key=[("Packed", "a")], packed_fields=["b", "c", "d", "e"]),
+        ]
+    ],
+)
+def test_packed_fields(
+    model_dict,
+    model_config,
+    registry: DatastoreModelHelperRegistry,
+    helper_model: DatastoreModelHelper,
+    converter: EntityProtobufConverter,
+) -> None:
+    mocker = DatamodelHelperMock(registry)
+    expected_obj = mocker.generate(helper_model)
+    expected_obj.c = [SampleEmbedded(a=1, b="b")]
+    entity_pb = converter.to_protobuf(expected_obj, "test", "test")
+    for name in ["b", "c", "d", "e"]:
+        assert entity_pb.properties[name].exclude_from_indexes
+        assert "blob_value" in entity_pb.properties[name]
+    assert converter.from_protobuf(entity_pb) == expected_obj
+
+    # values written before the field was packed
+    unpacked_config = model_config.model_copy(update={"packed_fields": []})
+    unpacked_registry = DatastoreModelHelperRegistry()
+    unpacked_registry.register(DatastoreModelHelper(SampleEmbedded))
+    unpacked_registry.register(DatastoreModelHelper(helper_model.cls, unpacked_config))
+    unpacked_pb = EntityProtobufConverter(unpacked_registry).to_protobuf(expected_obj)
+    assert "array_value" in unpacked_pb.properties["c"]
+    assert converter.from_protobuf(unpacked_pb) == expected_obj
@@ -1,8 +1,10 @@
+import array
+import pickle
 from dataclasses import dataclass
 from datetime import date, datetime, time, timedelta
 from enum import IntEnum
-from typing import Any, List, Tuple
-from pydantic import BaseModel, create_model, NaiveDatetime, AwareDatetime
+from typing import Annotated, Any, List, Tuple
+from pydantic import BaseModel, ConfigDict, create_model, NaiveDatetime, AwareDatetime
 import pytest
 from sarvam_datastore._model_helper import (
     DatastoreModelHelper,
@@ -12,8 +14,13 @@ from sarvam_datastore._model_helper import (
     DatastoreModelException,
     ReferenceProperty,
     GenericType,
+    DatastoreVector,
+    VectorDtype,
+    VectorProperty,
 )
+from sarvam_datastore._descriptors import AtomicDescriptor, ReferenceDescriptor
 from sarvam_datastore import GeoPoint
+from .model_mocker import SampleIntEnum
 
 from contextlib import nullcontext
 
@@ -163,3 +170,71 @@ def test_dataclass_property():
     assert isinstance(helper.properties["test_member"], EntityProperty)
     assert helper.properties["test_member"].entity_type == "data_class"
     assert helper.properties["test_member"].clazz == DataclassModel
+
+
+def test_vector_property():
+    class VectorModel(BaseModel):
+        by_annotation: Annotated[list[float], DatastoreVector(VectorDtype.FLOAT64)]
+        by_config: list[float] | None
+        as_array: Annotated[array.array, DatastoreVector()]
+
+        model_config = ConfigDict(arbitrary_types_allowed=True)
+
+        class DatastoreConfig:
+            vector_fields = {"by_config": "float32"}
+
+    helper = DatastoreModelHelper(VectorModel)
+
+    by_annotation = helper.properties["by_annotation"]
+    assert isinstance(by_annotation, VectorProperty)
+    assert by_annotation.dtype == VectorDtype.FLOAT64
+    assert by_annotation.container == list
+    assert by_annotation.exclude_from_indexes
+
+    by_config = helper.properties["by_config"]
+    assert isinstance(by_config, VectorProperty)
+    assert by_config.dtype == VectorDtype.FLOAT32
+    assert by_config.is_optional
+
+    assert helper.properties["as_array"].container == array.array
+
+    with pytest.raises(DatastoreModelException):
+        DatastoreModelHelper(
+            create_model("TestModel", test_member=(list[str], ...)),
+            DatastoreConfig(vector_fields={"test_member": "float32"}),
+        )
+
+
+def test_descriptors():
+    class DescribedModel(BaseModel):
+        id: int
+        an_enum: SampleIntEnum
+        created: datetime
+        tags: List[str]
+        parent_id: int
+
+        class DatastoreConfig:
+            key = [("Described", "id")]
+            key_references = [[("Parent", "parent_id")]]
+            exclude_from_indexes = ["tags"]
+
+    helper = DatastoreModelHelper(DescribedModel)
+
+    an_enum = helper.descriptors["an_enum"]
+    assert isinstance(an_enum, AtomicDescriptor)
+    assert an_enum.pb_type == "integer_value"
+    assert an_enum.is_enum and not an_enum.is_timestamp
+    assert helper.descriptors["created"].is_timestamp
+
+    tags = helper.descriptors["tags"]
+    assert tags.generic_type == GenericType.LIST
+    assert tags.exclude_from_indexes
+
+    parent = helper.field_descriptors["parent_id"]
+    assert isinstance(parent, ReferenceDescriptor)
+    assert parent.key.kind == "Parent"
+    assert helper.key_descriptor.path_items[0].field_name == "id"
+
+    with pytest.raises(AttributeError):
+        an_enum.is_optional = True
+    assert pickle.loads(pickle.dumps(an_enum)) == an_enum
@@ -0,0 +1,50 @@
+import pytest
+from sarvam_datastore import (
+    DatastoreModelHelperRegistry,
+    EntityProtobufConverter,
+)
+from sarvam_datastore._model_registry import DatastoreModelHelperRegistryException
+from .sample_model import AllocatedIdEntity, EmbeddedEntity, StandAloneEntity
+
+
+def test_scan_is_lazy():
+    registry = DatastoreModelHelperRegistry(auto_register=True)
+    classes = registry.scan("tests.sample_model")
+
+    assert set(classes) == {StandAloneEntity, AllocatedIdEntity}
+    assert registry._model_helpers_embedded == {}
+
+    helper = registry.get_by_kind("StandAlone")
+    assert helper.cls is StandAloneEntity
+    assert registry.get_by_class(StandAloneEntity) is helper
+    assert list(registry._model_helpers_embedded) == [StandAloneEntity]
+
+    # embedded models are resolved on demand by the converter
+    converter = EntityProtobufConverter(registry)
+    obj = StandAloneEntity(aref=1)
+    assert converter.from_protobuf(converter.to_protobuf(obj)) == obj
+    assert EmbeddedEntity in registry._model_helpers_embedded
+    assert AllocatedIdEntity not in registry._model_helpers_embedded
+
+    assert {clazz for clazz, _ in registry.describe()} == {
+        StandAloneEntity,
+        EmbeddedEntity,
+        AllocatedIdEntity,
+    }
+
+
+def test_register_class():
+    registry = DatastoreModelHelperRegistry()
+    registry.register_class(StandAloneEntity)
+
+    with pytest.raises(KeyError):
+        registry.get_by_class(EmbeddedEntity)
+
+    with pytest.raises(DatastoreModelHelperRegistryException):
+        registry.register_class(
+            AllocatedIdEntity, registry.describe()[0][1].model_copy()
+        )
+
+    assert registry.get_by_kind("StandAlone").cls is StandAloneEntity
+    with pytest.raises(KeyError):
+        registry.get_by_kind("AllocatedId")
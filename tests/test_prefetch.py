@@ -0,0 +1,143 @@
+import pytest
+from pydantic import BaseModel
+from sarvam_datastore import (
+    DatastoreModelHelper,
+    DatastoreModelHelperRegistry,
+    EntityProtobufConverter,
+)
+from sarvam_datastore._model_helper import DatastoreModelException
+from sarvam_datastore._repository import (
+    DatastoreRepositoryException,
+    _property_path,
+)
+
+
+class Owner(BaseModel):
+    id: str
+    name: str
+    bio: str = ""
+    photo: bytes | None = None
+
+    class DatastoreConfig:
+        key = [("Owner", "id")]
+
+
+class Dataset(BaseModel):
+    id: int
+    owner_id: str | None = None
+    owner: Owner | None = None
+
+    class DatastoreConfig:
+        key = [("Dataset", "id")]
+        key_references = [[("Owner", "owner_id")]]
+        reference_fields = {"owner_id": "owner"}
+
+
+@pytest.fixture()
+def converter():
+    registry = DatastoreModelHelperRegistry()
+    registry.register_class(Owner)
+    registry.register_class(Dataset)
+    return EntityProtobufConverter(registry)
+
+
+def test_reference_target_not_stored(converter):
+    owner = Owner(id="o1", name="Owner 1")
+    entity_pb = converter.to_protobuf(
+        Dataset(id=1, owner_id="o1", owner=owner), "project", "namespace"
+    )
+    assert set(entity_pb.properties) == {"owner_id"}
+
+    class Invalid(BaseModel):
+        id: int
+        name: str
+
+        class DatastoreConfig:
+            key = [("Invalid", "id")]
+            reference_fields = {"name": "id"}
+
+    with pytest.raises(DatastoreModelException):
+        DatastoreModelHelper(Invalid)
+
+
+async def test_prefetch_query_page(converter, fake_client, make_repository):
+    owners = [Owner(id=f"o{i}", name=f"Owner {i}") for i in range(3)]
+    datasets = [
+        Dataset(id=i, owner_id="missing" if i == 9 else f"o{i % 3}") for i in range(10)
+    ]
+    fake_client.add(
+        [converter.to_protobuf(owner, "project", "namespace") for owner in owners]
+    )
+    fake_client.page = [
+        converter.to_protobuf(dataset, "project", "namespace") for dataset in datasets
+    ]
+    repository = make_repository(converter)
+
+    query = repository.get_query_filtered("Dataset")
+    results = [
+        dataset async for dataset in repository.run_query(query, prefetch=["owner_id"])
+    ]
+    # one lookup for the page, of the distinct owners
+    assert fake_client.lookups == [4]
+    assert [dataset.owner for dataset in results] == [
+        *[owners[i % 3] for i in range(9)],
+        None,
+    ]
+
+    with pytest.raises(DatastoreRepositoryException):
+        repository.run_query(query, lazy=True, prefetch=["owner_id"])
+
+
+async def test_prefetch_get_multi(converter, fake_client, make_repository):
+    owner = Owner(id="o1", name="Owner 1")
+    datasets = [Dataset(id=1, owner_id="o1"), Dataset(id=2, owner_id="missing")]
+    fake_client.add(
+        [
+            converter.to_protobuf(obj, "project", "namespace")
+            for obj in [owner, *datasets]
+        ]
+    )
+    repository = make_repository(converter)
+
+    keys = [repository.get_key("Dataset", i) for i in (1, 2, 3)]
+    found = await repository.get_multi(keys, prefetch=["owner_id"])
+    assert fake_client.lookups == [3, 2]
+    assert found[0].owner == owner
+    assert found[1].owner is None
+    assert found[2] is None
+
+
+async def test_get_fields(converter, fake_client, make_repository):
+    owner = Owner(id="o1", name="Owner 1", bio="a long bio", photo=b"...")
+    dataset = Dataset(id=1, owner_id="o1")
+    fake_client.add(
+        [converter.to_protobuf(obj, "project", "namespace") for obj in [owner, dataset]]
+    )
+    repository = make_repository(converter)
+
+    partial = await repository.get(repository.get_key("Owner", "o1"), fields=["name"])
+    # the fake ignores the mask, the fields are picked when decoding
+    assert fake_client.requests[0]["property_mask"].paths == ["name"]
+    assert (partial.id, partial.name, partial.bio) == ("o1", "Owner 1", "")
+    assert partial.model_fields_set == {"id", "name"}
+
+    found = await repository.get_multi(
+        [repository.get_key("Dataset", 1)], fields=["id"], prefetch=["owner_id"]
+    )
+    assert fake_client.requests[1]["property_mask"].paths == ["owner_id"]
+    assert found[0].owner == owner
+
+    # only the key, not every property
+    key_only = await repository.get(repository.get_key("Owner", "o1"), fields=["id"])
+    assert fake_client.requests[-1]["property_mask"].paths == ["__key__"]
+    assert key_only.id == "o1"
+    assert key_only.model_fields_set == {"id"}
+
+    with pytest.raises(DatastoreModelException):
+        await repository.get(repository.get_key("Owner", "o1"), fields=["missing"])
+
+
+def test_property_path():
+    assert _property_path("name") == "name"
+    assert _property_path("a.b") == "`a.b`"
+    assert _property_path("it`s") == "`it\\`s`"
@@ -0,0 +1,37 @@
+from sarvam_datastore import (
+    DatastoreModelHelper,
+    DatastoreModelHelperRegistry,
+    EntityProtobufConverter,
+    ProcessPoolConverter,
+)
+from .sample_model import EmbeddedEntity, StandAloneEntity
+
+
+def make_registry():
+    registry = DatastoreModelHelperRegistry()
+    registry.register(DatastoreModelHelper(StandAloneEntity))
+    registry.register(DatastoreModelHelper(EmbeddedEntity))
+    return registry
+
+
+async def test_process_pool_round_trip():
+    registry = make_registry()
+    converter = EntityProtobufConverter(registry)
+    objs = [StandAloneEntity(astr=f"key-{i}", aref=i) for i in range(25)]
+
+    with ProcessPoolConverter(registry, max_workers=2, chunk_size=10) as pool:
+        entity_pbs = await pool.to_protobuf_multi(objs, "test", "test")
+        assert entity_pbs == [
+            converter.to_protobuf(obj, "test", "test") for obj in objs
+        ]
+
+        actual = await pool.from_protobuf_multi(entity_pbs)
+        assert actual == [converter.from_protobuf(pb) for pb in entity_pbs]
+
+        reencoded = await pool.reencode_multi(
+            entity_pbs, StandAloneEntity, "other", "other", serialized=True
+        )
+        assert reencoded == [
+            converter.to_protobuf(obj, "other", "other")._pb.SerializeToString()
+            for obj in actual
+        ]
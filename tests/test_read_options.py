@@ -0,0 +1,67 @@
+from datetime import datetime, timezone
+import pytest
+from google.cloud.datastore_v1.types import (
+    ReadOptions,
+)
+from sarvam_datastore import (
+    DatastoreModelHelperRegistry,
+    EntityProtobufConverter,
+)
+
+EVENTUAL = ReadOptions.ReadConsistency.EVENTUAL
+SNAPSHOT = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture()
+def converter():
+    return EntityProtobufConverter(DatastoreModelHelperRegistry())
+
+
+async def test_get_consistency(converter, fake_client, make_repository):
+    repository = make_repository(converter)
+    key = repository.get_key("Kind", 1)
+
+    await repository.get(key)
+    await repository.get(key, eventual=True)
+    await repository.get_multi([key], read_time=SNAPSHOT)
+    strong, eventual, snapshot = [
+        request["read_options"] for request in fake_client.requests
+    ]
+    assert strong.read_consistency == 0
+    assert eventual.read_consistency == EVENTUAL
+    assert snapshot.read_time == SNAPSHOT
+
+
+async def test_repository_defaults(converter, fake_client, make_repository):
+    repository = make_repository(converter, eventual=True)
+    key = repository.get_key("Kind", 1)
+
+    await repository.get(key)
+    # settings of a call replace the defaults
+    await repository.get(key, read_time=SNAPSHOT)
+    eventual, snapshot = [request["read_options"] for request in fake_client.requests]
+    assert eventual.read_consistency == EVENTUAL
+    assert snapshot.read_consistency == 0
+    assert snapshot.read_time == SNAPSHOT
+
+    with pytest.raises(ValueError):
+        await repository.get(key, eventual=True, read_time=SNAPSHOT)
+
+    iterator = repository.run_query(repository.get_query_filtered("Kind"))
+    assert iterator._eventual
+
+    # defaults which no read could use
+    with pytest.raises(ValueError):
+        make_repository(converter, eventual=True, read_time=SNAPSHOT)
+
+
+async def test_count(converter, fake_client, make_repository):
+    fake_client.count = 7
+    repository = make_repository(converter, read_time=SNAPSHOT)
+    query = repository.get_query_filtered("Kind")
+
+    assert await repository.count(query, limit=10) == 7
+    request = fake_client.requests[0]
+    assert request["read_options"].read_time == SNAPSHOT
+    count = request["aggregation_query"].aggregations[0].count
+    assert count.up_to == 10
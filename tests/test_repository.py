@@ -77,3 +77,42 @@ async def test_update_entity(repo: DatastoreRepository):
     actual2: AllocatedIdEntity = await repo.get(mr.key)  # type: ignore
     assert mr.key.id == actual2.aint
     assert actual2.astr == "12"
+
+
+async def test_warm_up(repo: DatastoreRepository):
+    timings = await repo.warm_up([StandAloneEntity, AllocatedIdEntity])
+    assert list(timings) == [
+        "channel",
+        "lookup",
+        "model:StandAloneEntity",
+        "model:AllocatedIdEntity",
+    ]
+
+
+async def test_get_multi(repo: DatastoreRepository):
+    mrs = await repo.upsert_multi([AllocatedIdEntity(astr="a"), AllocatedIdEntity()])
+    keys = [mr.key for mr in mrs]
+    missing = repo.get_key("AllocatedId", 1)
+
+    found = await repo.get_multi([keys[1], missing, keys[0]])
+    assert [obj and obj.aint for obj in found] == [keys[1].id, None, keys[0].id]
+
+
+async def test_count(config: SampleSettings, repo: DatastoreRepository):
+    await repo.insert(AllocatedIdEntity())
+    query = repo.get_query_filtered("AllocatedId")
+    assert await repo.count(query, limit=1, eventual=True) == 1
+
+
+async def test_update_fields(repo: DatastoreRepository):
+    expected = AllocatedIdEntity(astr="before")
+    mr = await repo.insert(expected)
+
+    actual: AllocatedIdEntity = await repo.get(mr.key)  # type: ignore
+    actual.abool = True
+    actual.astr = "not sent"
+    await repo.update_fields(actual, fields=["abool"])
+
+    updated: AllocatedIdEntity = await repo.get(mr.key)  # type: ignore
+    assert updated.abool
+    assert updated.astr == "before"
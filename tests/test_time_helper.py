@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+# runs in a new interpreter, and fails if the tz database is scanned
+SCRIPT = textwrap.dedent(
+    """
+    import zoneinfo
+
+    def scan():
+        raise AssertionError("available_timezones called")
+
+    zoneinfo.available_timezones = scan
+    import sarvam_datastore
+    from sarvam_datastore import _time_helper
+
+    assert _time_helper.local_time_zone.cache_info().currsize == 0
+    print(_time_helper.local_time_zone().key, _time_helper.local_tz.key)
+    """
+)
+
+
+def run_script(local_time_zone: str | None) -> list[str]:
+    env = {k: v for k, v in os.environ.items() if k != "LOCAL_TIME_ZONE"}
+    if local_time_zone is not None:
+        env["LOCAL_TIME_ZONE"] = local_time_zone
+
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout.split()
+
+
+def test_import_does_not_scan_time_zones():
+    assert run_script(None) == ["Asia/Kolkata", "Asia/Kolkata"]
+
+
+def test_local_time_zone_from_environment():
+    assert run_script("Europe/Paris") == ["Europe/Paris", "Europe/Paris"]
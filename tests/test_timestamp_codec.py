@@ -0,0 +1,68 @@
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+from pydantic import NaiveDatetime, AwareDatetime
+import pytest
+from google.cloud.datastore_v1.types import Value as Valuepb
+from sarvam_datastore._timestamp_codec import (
+    decode_timestamp,
+    decode_timestamps,
+    encode_timestamps,
+    to_seconds_nanos,
+)
+
+UTC = timezone.utc
+
+
+@pytest.mark.parametrize(
+    "field_type, value, expected_seconds, expected_nanos",
+    [
+        [
+            datetime,
+            datetime(2023, 5, 1, 10, 30, 15, 123456, UTC),
+            1682937015,
+            123456000,
+        ],
+        [AwareDatetime, datetime(1969, 12, 31, 23, 59, 59, 500000, UTC), -1, 500000000],
+        [
+            AwareDatetime,
+            datetime(2023, 5, 1, 16, 0, 15, 1, ZoneInfo("Asia/Kolkata")),
+            1682937015,
+            1000,
+        ],
+        [NaiveDatetime, datetime(2023, 5, 1, 10, 30, 15, 5), 1682937015, 5000],
+        [date, date(2023, 5, 1), 1682899200, 0],
+        [date, date(1960, 1, 1), -315619200, 0],
+        [time, time(10, 30, 15, 42, UTC), 37815, 42000],
+        [timedelta, timedelta(days=2, seconds=5, microseconds=7), 172805, 7000],
+        [timedelta, timedelta(seconds=-1.5), -2, 500000000],
+    ],
+)
+def test_timestamp_round_trip(field_type, value, expected_seconds, expected_nanos):
+    seconds, nanos = to_seconds_nanos(value)
+    assert (seconds, nanos) == (expected_seconds, expected_nanos)
+
+    actual = decode_timestamp(seconds, nanos, field_type)
+    assert type(actual) is type(value)
+    assert actual == value
+    if field_type in (datetime, AwareDatetime, time):
+        assert actual.tzinfo == UTC
+
+
+def test_naive_time_is_utc():
+    seconds, nanos = to_seconds_nanos(time(1, 2, 3))
+    assert decode_timestamp(seconds, nanos, time) == time(1, 2, 3, tzinfo=UTC)
+
+
+@pytest.mark.parametrize("field_type", [datetime, date, time, timedelta])
+def test_timestamps_list(field_type):
+    values = {
+        datetime: [datetime(2020, 1, d, tzinfo=UTC) for d in range(1, 10)],
+        date: [date(2020, 1, d) for d in range(1, 10)],
+        time: [time(d, d, d, d, tzinfo=UTC) for d in range(1, 10)],
+        timedelta: [timedelta(hours=-d, microseconds=d) for d in range(1, 10)],
+    }[field_type]
+
+    value_pb = Valuepb.pb()()
+    encode_timestamps(value_pb.array_value.values, values, True)
+    assert all(v.exclude_from_indexes for v in value_pb.array_value.values)
+    assert decode_timestamps(value_pb.array_value.values, field_type) == values
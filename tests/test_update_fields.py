@@ -0,0 +1,109 @@
+import pytest
+from pydantic import BaseModel
+from google.cloud.datastore_v1.types import (
+    Mutation,
+)
+from sarvam_datastore import (
+    DatastoreModelHelperRegistry,
+    EntityProtobufConverter,
+)
+from sarvam_datastore._repository import DatastoreRepositoryException
+
+
+class Job(BaseModel):
+    id: int
+    status: str
+    attempts: int = 0
+    log: str = ""
+    tags: list[str] = []
+
+    class DatastoreConfig:
+        key = [("Job", "id")]
+        track_changes = True
+
+
+class Untracked(BaseModel):
+    id: int
+    status: str
+
+    class DatastoreConfig:
+        key = [("Untracked", "id")]
+
+
+@pytest.fixture()
+def converter():
+    registry = DatastoreModelHelperRegistry()
+    registry.register_class(Job)
+    registry.register_class(Untracked)
+    return EntityProtobufConverter(registry)
+
+
+def test_to_protobuf_partial(converter):
+    job = Job(id=1, status="done", log="x" * 1000)
+    entity_pb = converter.to_protobuf_partial(job, ["status", "id"], "p", "n")
+    assert set(entity_pb.properties) == {"status"}
+    assert entity_pb.key.path[0].id == 1
+    assert Mutation.pb(Mutation(update=entity_pb)).ByteSize() < 100
+
+
+def test_track_changes(converter):
+    tracker = converter.change_tracker
+    job = Job(id=1, status="queued", log="started")
+    loaded = converter.from_protobuf(converter.to_protobuf(job, "p", "n"))
+    assert loaded == job
+    assert tracker.changed_fields(loaded) == []
+    # pydantic state is left alone
+    assert loaded.model_fields_set == set(Job.model_fields)
+
+    loaded.status = "running"
+    loaded.tags.append("retry")
+    loaded.log = "started"
+    assert tracker.changed_fields(loaded) == ["status", "tags"]
+
+    # lazily decoded models are tracked too
+    lazy = converter.from_protobuf_lazy(converter.to_protobuf(job, "p", "n"))
+    lazy_job = lazy.to_model()
+    assert tracker.is_tracked(lazy_job)
+    lazy_job.attempts = 3
+    assert tracker.changed_fields(lazy_job) == ["attempts"]
+
+    untracked = converter.from_protobuf(
+        converter.to_protobuf(Untracked(id=1, status="new"), "p", "n")
+    )
+    assert not tracker.is_tracked(untracked)
+
+
+async def test_update_fields(converter, fake_client, make_repository):
+    repository = make_repository(converter)
+    job = converter.from_protobuf(
+        converter.to_protobuf(Job(id=1, status="queued"), "project", "namespace")
+    )
+
+    # nothing changed, nothing sent
+    assert await repository.update_fields(job) is None
+    assert fake_client.mutations == []
+
+    job.status = "running"
+    job.attempts += 1
+    result = await repository.update_fields(job)
+    assert result.version == 1
+    mutation = fake_client.mutations[0]
+    assert set(mutation.update.properties) == {"status", "attempts"}
+    assert set(mutation.property_mask.paths) == {"status", "attempts"}
+    assert converter.change_tracker.changed_fields(job) == []
+
+    # only the written fields stop being changed
+    job.status = "done"
+    job.log = "finished"
+    await repository.update_fields(job, fields=["log"])
+    assert list(fake_client.mutations[1].property_mask.paths) == ["log"]
+    assert converter.change_tracker.changed_fields(job) == ["status"]
+
+
+async def test_update_fields_untracked(converter, make_repository):
+    repository = make_repository(converter)
+    with pytest.raises(DatastoreRepositoryException):
+        await repository.update_fields(Untracked(id=1, status="new"))
+    # not decoded, so there are no changes to find
+    with pytest.raises(DatastoreRepositoryException):
+        await repository.update_fields(Job(id=1, status="new"))
@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import Annotated, Dict, List
+from pydantic import BaseModel, NaiveDatetime
+from sarvam_datastore import (
+    DatastoreModelHelperRegistry,
+    DatastoreVector,
+    EntityProtobufConverter,
+)
+from sarvam_datastore._warm_up import build_sample, round_trip
+from .model_mocker import SampleEmbedded, SampleIntEnum, SampleStrEnum
+from .sample_model import StandAloneEntity
+
+
+class WarmUpModel(BaseModel):
+    id: str
+    an_int_enum: SampleIntEnum
+    str_enums: List[SampleStrEnum]
+    created: datetime
+    naive: NaiveDatetime | None
+    embedded: Dict[str, SampleEmbedded]
+    vector: Annotated[list[float], DatastoreVector()]
+    parent: int
+
+    class DatastoreConfig:
+        key = [("WarmUp", "id")]
+        key_references = [[("Parent", "parent")]]
+
+
+def test_round_trip():
+    registry = DatastoreModelHelperRegistry(auto_register=True)
+    converter = EntityProtobufConverter(registry)
+
+    for clazz in [WarmUpModel, StandAloneEntity]:
+        sample = build_sample(registry, clazz)
+        assert round_trip(converter, clazz, "test", "test") == sample
+
+    sample = build_sample(registry, WarmUpModel)
+    assert sample.an_int_enum == SampleIntEnum.A
+    assert sample.str_enums == [SampleStrEnum.A]
+    assert sample.naive.tzinfo is None
+    assert isinstance(sample.embedded["warm-up"], SampleEmbedded)
@@ -0,0 +1,116 @@
+import pytest
+from google.api_core import exceptions as core_exceptions
+from sarvam_datastore import WriteThrottle
+
+
+def make_throttle(clock, **kwargs) -> WriteThrottle:
+    return WriteThrottle(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+async def test_ramp_up(fake_clock):
+    throttle = make_throttle(fake_clock)
+    assert throttle.rate("Kind") == 500
+
+    # writes at the allowed rate for an interval raise it by 50%
+    await throttle.acquire("Kind", 500 * 300)
+    assert fake_clock.now == pytest.approx(299)
+    assert throttle.rate("Kind") == 500
+    fake_clock.now = 300
+    assert throttle.rate("Kind") == 750
+    await throttle.acquire("Kind", 750 * 300)
+    fake_clock.now = 600
+    assert throttle.rate("Kind") == 1125
+    assert throttle.rates() == {"Kind": 1125}
+
+    # but not above a factor of the writes seen
+    await throttle.acquire("Kind", 1000 * 300)
+    fake_clock.now = 900
+    assert throttle.rate("Kind") == 1500
+
+    capped = make_throttle(fake_clock, max_rate=600)
+    assert capped.rate("Kind") == 500
+    await capped.acquire("Kind", 500 * 300)
+    fake_clock.now += 300
+    assert capped.rate("Kind") == 600
+
+
+async def test_no_ramp_up_when_idle(fake_clock):
+    throttle = make_throttle(fake_clock)
+
+    # a few writes, then hours without any
+    await throttle.acquire("Kind", 10)
+    for _ in range(7 * 24):
+        fake_clock.now += 3600
+        assert throttle.rate("Kind") == 500
+
+    throttle.on_overload("Kind")
+    assert throttle.rate("Kind") == 250
+
+
+async def test_wait_for_tokens(fake_clock):
+    throttle = make_throttle(fake_clock, initial_rate=100)
+
+    await throttle.acquire("Kind", 100)
+    assert fake_clock.sleeps == []
+
+    # one batch past the bucket, waits for the deficit
+    await throttle.acquire("Kind", 50)
+    assert fake_clock.sleeps == [0.5]
+    assert [event.event_type for event in throttle.events] == ["wait"]
+
+    # other kinds have their own bucket
+    await throttle.acquire("Other", 100)
+    assert fake_clock.sleeps == [0.5]
+
+
+async def test_backoff_and_retry(fake_clock):
+    throttle = make_throttle(fake_clock, initial_rate=100, additive_increase=10)
+    attempts = []
+
+    async def write():
+        attempts.append(fake_clock.now)
+        if len(attempts) < 3:
+            raise core_exceptions.ResourceExhausted("overloaded")
+        return "committed"
+
+    assert await throttle.run({"Kind": 1}, write) == "committed"
+    assert len(attempts) == 3
+    # halved twice, not increased within the adjustment interval
+    assert throttle.rate("Kind") == 25
+    event_types = [event.event_type for event in throttle.events]
+    assert event_types.count("backoff") == 2
+    assert event_types.count("retry") == 2
+
+    # increased additively, at most once per adjustment interval
+    fake_clock.now += 31
+    throttle.on_success("Kind")
+    throttle.on_success("Kind")
+    assert throttle.rate("Kind") == 35
+    fake_clock.now += 31
+    throttle.on_success("Kind")
+    assert throttle.rate("Kind") == 45
+
+
+async def test_retries_exhausted(fake_clock):
+    throttle = make_throttle(fake_clock, max_retries=2, min_rate=100)
+    attempts = []
+
+    async def write():
+        attempts.append(fake_clock.now)
+        raise core_exceptions.Aborted("contention")
+
+    with pytest.raises(core_exceptions.Aborted):
+        await throttle.run({"Kind": 1}, write)
+    assert len(attempts) == 3
+    assert throttle.rate("Kind") == 100
+
+
+async def test_other_errors_not_retried(fake_clock):
+    throttle = make_throttle(fake_clock)
+
+    async def write():
+        raise core_exceptions.InvalidArgument("bad entity")
+
+    with pytest.raises(core_exceptions.InvalidArgument):
+        await throttle.run({"Kind": 1}, write)
+    assert throttle.rate("Kind") == 500